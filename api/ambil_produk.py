@@ -1,27 +1,18 @@
 import requests
-import json
-import os
+
+from helper import config
 
 def get_token():
-    token_path = os.path.join("core", "token.json")
-    if not os.path.exists(token_path):
+    if not config.token_exists():
         raise Exception("Token file not found")
-    with open(token_path, "r") as f:
-        data = json.load(f)
     # GUNAKAN access_token!
-    return data.get("access_token")
+    return config.get_access_token()
 
 def get_base_url():
-    setup_path = os.path.join("core", "setup.json")
-    if not os.path.exists(setup_path):
-        raise Exception("Setup file not found")
-    with open(setup_path, "r") as f:
-        data = json.load(f)
-    api_info = data.get("api", {})
-    base_url = api_info.get("base_url")
+    base_url = config.get_api_base_url()
     if not base_url:
         raise Exception("base_url not found in setup.json")
-    return base_url.rstrip("/")
+    return base_url
 
 def ambil_kategori_xl():
     base_url = get_base_url()
@@ -44,10 +35,8 @@ def ambil_produk_xl(kategori):
 
 def simpan_produk_ke_db(produk_list):
     """
-    Simpan produk (list of dict) ke database lewat models/produk_xl.py.
-    Jika tabel belum ada, akan otomatis dibuat.
+    Simpan produk (list of dict) ke database lewat models/produk_xl.py dalam satu transaksi.
+    Return ringkasan perubahan dari bulk_upsert_produk.
     """
-    from models.produk_xl import insert_or_update_produk, init_db
-    init_db()  # <-- Pastikan tabel sudah ada!
-    for produk in produk_list:
-        insert_or_update_produk(produk)
\ No newline at end of file
+    from models.produk_xl import bulk_upsert_produk
+    return bulk_upsert_produk(produk_list)
\ No newline at end of file
@@ -1,14 +1,10 @@
 import requests
-import json
-import os
 
-SETUP_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "core", "setup.json")
-TOKEN_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "core", "token.json")
+from helper import config
 
 def load_api_config():
-    with open(SETUP_PATH, "r") as f:
-        setup = json.load(f)
-    return setup["api"]["base_url"], setup["api"]["email"], setup["api"]["password"]
+    api = config.get_api_config()
+    return api["base_url"], api["email"], api["password"]
 
 def ambil_token():
     base_url, email, password = load_api_config()
@@ -20,8 +16,7 @@ def ambil_token():
     response = requests.post(url, json=payload)
     if response.status_code == 200:
         result = response.json()
-        with open(TOKEN_PATH, "w") as f_token:
-            json.dump(result, f_token, indent=2)
+        config.save_token_data(result)
         print("Token berhasil diambil dan disimpan di core/token.json")
     else:
         print(f"Error: {response.status_code} - {response.text}")
@@ -1,21 +1,6 @@
 import requests
-import os
-import json
 
-def get_api_base_url_and_token():
-    setup_path = os.path.join("core", "setup.json")
-    if not os.path.exists(setup_path):
-        raise Exception("setup.json not found.")
-    with open(setup_path, "r") as f:
-        data = json.load(f)
-        api = data.get("api", {})
-        token_path = os.path.join("core", "token.json")
-        if not os.path.exists(token_path):
-            raise Exception("token.json not found.")
-        with open(token_path, "r") as tf:
-            token_data = json.load(tf)
-            access_token = token_data.get("access_token")
-        return api.get("base_url"), access_token
+from helper.config import get_api_base_url_and_token
 
 def refresh_xl_session(msisdn: str):
     base_url, access_token = get_api_base_url_and_token()
@@ -0,0 +1,165 @@
+"""
+Circuit breaker dan timeout adaptif per endpoint API supplier, dipakai oleh api.client.
+
+Status per endpoint:
+- closed: request jalan normal; kegagalan beruntun (timeout / error jaringan / HTTP 5xx)
+  dihitung, dan setelah failure_threshold kali breaker menjadi open.
+- open: request langsung ditolak dengan SupplierUnavailable (tanpa menunggu timeout)
+  selama open_seconds.
+- half-open: setelah open_seconds, satu request percobaan dibiarkan lewat; sukses -> closed,
+  gagal -> open lagi.
+
+Timeout adaptif: dari latency request sukses terakhir, timeout = p95 * ADAPTIVE_MULTIPLIER
+(dibatasi ADAPTIVE_MIN_TIMEOUT .. timeout statis endpoint), sehingga saat supplier lambat
+handler tidak selalu menunggu timeout penuh. Endpoint yang tidak idempoten (settlement,
+deposit) tetap memakai timeout statis: timeout prematur di sana bisa berarti transaksi
+sukses di supplier tapi dianggap gagal di bot.
+
+Parameter bisa diubah di setup.json "circuit_breaker": {"failure_threshold": 5, "open_seconds": 30}.
+"""
+from __future__ import annotations
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from helper import config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_OPEN_SECONDS = 30.0
+
+LATENCY_WINDOW = 50
+ADAPTIVE_MIN_SAMPLES = 20
+ADAPTIVE_MULTIPLIER = 3.0
+ADAPTIVE_MIN_TIMEOUT = 3.0
+ADAPTIVE_EXEMPT = {"settlement", "deposit"}
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class SupplierUnavailable(Exception):
+    """Request ditolak karena circuit breaker endpoint sedang open."""
+
+    def __init__(self, endpoint: str, retry_after: float):
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+        super().__init__(f"Supplier sedang gangguan, silakan coba lagi dalam {max(1, int(retry_after + 0.999))} detik.")
+
+
+def _settings() -> Dict[str, Any]:
+    return config.read_setup().get("circuit_breaker") or {}
+
+
+def _failure_threshold() -> int:
+    try:
+        return max(1, int(_settings().get("failure_threshold", DEFAULT_FAILURE_THRESHOLD)))
+    except (TypeError, ValueError):
+        return DEFAULT_FAILURE_THRESHOLD
+
+
+def _open_seconds() -> float:
+    try:
+        return max(1.0, float(_settings().get("open_seconds", DEFAULT_OPEN_SECONDS)))
+    except (TypeError, ValueError):
+        return DEFAULT_OPEN_SECONDS
+
+
+class CircuitBreaker:
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.stats = {"success": 0, "failure": 0, "rejected": 0, "opened": 0}
+
+    def retry_after(self) -> float:
+        """Detik sampai request boleh dicoba lagi (0 = boleh sekarang)."""
+        if self.state == CLOSED:
+            return 0.0
+        if self.state == OPEN:
+            return max(0.0, self.opened_at + _open_seconds() - time.monotonic())
+        # half-open: hanya satu request percobaan sekaligus
+        return 1.0 if self.probe_in_flight else 0.0
+
+    def before_request(self) -> None:
+        """Raise SupplierUnavailable jika request tidak boleh dikirim sekarang."""
+        wait = self.retry_after()
+        if wait > 0:
+            self.stats["rejected"] += 1
+            raise SupplierUnavailable(self.endpoint, wait)
+        if self.state == OPEN:
+            self.state = HALF_OPEN
+            logger.info("Circuit %s half-open: sending probe request", self.endpoint)
+        if self.state == HALF_OPEN:
+            self.probe_in_flight = True
+
+    def record_success(self, latency: float) -> None:
+        self.stats["success"] += 1
+        self.latencies.append(latency)
+        self.failures = 0
+        self.probe_in_flight = False
+        if self.state != CLOSED:
+            logger.info("Circuit %s closed: supplier responded again (%.2fs)", self.endpoint, latency)
+            self.state = CLOSED
+
+    def record_failure(self, reason: str) -> None:
+        self.stats["failure"] += 1
+        self.failures += 1
+        self.probe_in_flight = False
+        if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= _failure_threshold()):
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+            self.stats["opened"] += 1
+            logger.warning(
+                "Circuit %s open for %ss after %s consecutive failures (last: %s)",
+                self.endpoint, _open_seconds(), self.failures, reason,
+            )
+
+    def abort(self) -> None:
+        """Request dibatalkan (bukan kesalahan supplier): lepas slot percobaan half-open."""
+        self.probe_in_flight = False
+
+    def timeout(self, static_timeout: float) -> float:
+        """Timeout total untuk request berikutnya (adaptif, maksimal static_timeout)."""
+        if self.endpoint in ADAPTIVE_EXEMPT or len(self.latencies) < ADAPTIVE_MIN_SAMPLES:
+            return static_timeout
+        ordered = sorted(self.latencies)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return min(static_timeout, max(ADAPTIVE_MIN_TIMEOUT, p95 * ADAPTIVE_MULTIPLIER))
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get(endpoint: str) -> CircuitBreaker:
+    breaker = _breakers.get(endpoint)
+    if breaker is None:
+        breaker = _breakers[endpoint] = CircuitBreaker(endpoint)
+    return breaker
+
+
+def is_open(endpoint: str) -> bool:
+    """True jika request ke endpoint saat ini akan ditolak."""
+    breaker = _breakers.get(endpoint)
+    return breaker is not None and breaker.retry_after() > 0
+
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    """Status, counter, dan timeout aktif per endpoint yang pernah dipakai."""
+    out: Dict[str, Dict[str, Any]] = {}
+    for endpoint, b in _breakers.items():
+        out[endpoint] = {**b.stats, "state": b.state, "failures": b.failures, "samples": len(b.latencies)}
+    return out
+
+
+def reset(endpoint: Optional[str] = None) -> None:
+    if endpoint is None:
+        _breakers.clear()
+    else:
+        _breakers.pop(endpoint, None)
@@ -0,0 +1,412 @@
+"""
+Client async untuk API supplier (XL, payment, auth).
+
+Semua request memakai satu aiohttp.ClientSession bersama (koneksi keep-alive di-pool),
+dengan timeout per endpoint. Fungsi di api/*.py yang memakai `requests` tetap ada
+sebagai shim sinkron untuk script CLI / backup; handler aiogram memakai client ini:
+
+    from api.client import supplier
+    result = await supplier.cek_pulsa_xl(msisdn)
+
+Nilai kembalian sama dengan versi sinkronnya (dict hasil JSON, atau
+{"success": False, "error": ...} jika gagal). Hasil cek pulsa/kuota/sidompul yang sukses
+di-cache sebentar per nomor (api.lookup_cache). Saat supplier gangguan, circuit breaker
+per endpoint (api.circuit_breaker) menolak request langsung dengan pesan
+"Supplier sedang gangguan ..." (result["circuit_open"] = True) alih-alih menunggu timeout.
+"""
+from __future__ import annotations
+import asyncio
+import copy
+import json
+import logging
+import time
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import aiohttp
+
+from api import circuit_breaker, lookup_cache
+from api.circuit_breaker import SupplierUnavailable
+from api.token_manager import TokenManager
+from helper import config
+
+logger = logging.getLogger(__name__)
+
+# Timeout total (detik) per endpoint; settlement sengaja lebih panjang karena supplier
+# menunggu respon XL/e-wallet sebelum membalas.
+ENDPOINT_TIMEOUTS: Dict[str, float] = {
+    "pulsa": 15,
+    "kuota": 15,
+    "otp": 20,
+    "ver_otp": 20,
+    "refresh_session": 20,
+    "sidompul": 20,
+    "kategori": 30,
+    "produk": 30,
+    "settlement": 60,
+    "deposit": 30,
+    "profile": 15,
+    "auth": 20,
+}
+DEFAULT_TIMEOUT = 30
+CONNECT_TIMEOUT = 10
+
+# limit how many characters of response body we show in info logs
+_MAX_LOG_BODY = 2000
+
+
+class SupplierClient:
+    def __init__(self, limit: int = 50, limit_per_host: int = 20, keepalive_timeout: float = 60):
+        self._limit = limit
+        self._limit_per_host = limit_per_host
+        self._keepalive_timeout = keepalive_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_lock: Optional[asyncio.Lock] = None
+        # single-flight: request identik yang sedang berjalan, lihat _single_flight
+        self._inflight: Dict[Tuple[str, str, str], "asyncio.Future[Dict[str, Any]]"] = {}
+        self._sf_stats = {"calls": 0, "coalesced": 0}
+        self.tokens = TokenManager(self)
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is not None and not self._session.closed:
+            return self._session
+        if self._session_lock is None:
+            self._session_lock = asyncio.Lock()
+        async with self._session_lock:
+            if self._session is None or self._session.closed:
+                connector = aiohttp.TCPConnector(
+                    limit=self._limit,
+                    limit_per_host=self._limit_per_host,
+                    keepalive_timeout=self._keepalive_timeout,
+                    ttl_dns_cache=300,
+                )
+                self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    @staticmethod
+    def _timeout(endpoint: str) -> aiohttp.ClientTimeout:
+        total = circuit_breaker.get(endpoint).timeout(ENDPOINT_TIMEOUTS.get(endpoint, DEFAULT_TIMEOUT))
+        return aiohttp.ClientTimeout(total=total, connect=min(CONNECT_TIMEOUT, total))
+
+    @staticmethod
+    def is_available(endpoint: str) -> bool:
+        """False jika circuit breaker endpoint sedang open (request akan langsung ditolak)."""
+        return not circuit_breaker.is_open(endpoint)
+
+    @staticmethod
+    async def wait_until_available(endpoint: str, poll_seconds: float = 5.0) -> None:
+        """Tunggu sampai circuit breaker endpoint mengizinkan request lagi."""
+        breaker = circuit_breaker.get(endpoint)
+        while True:
+            wait = breaker.retry_after()
+            if wait <= 0:
+                return
+            await asyncio.sleep(min(wait, poll_seconds))
+
+    async def _request_with_headers(
+        self,
+        method: str,
+        endpoint: str,
+        path: str,
+        payload: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        auth: bool = True,
+        extra_headers: Optional[Dict[str, str]] = None,
+    ) -> Tuple[int, Any, str, Mapping[str, str]]:
+        """
+        Kirim request, return (http_status, parsed_json_or_None, raw_text, response_headers).
+        Raise SupplierUnavailable tanpa mengirim request jika circuit breaker endpoint open.
+        Request ber-auth yang dibalas 401 diulang sekali setelah token diperbarui (self.tokens).
+        """
+        base_url = config.get_api_base_url()
+        if not base_url:
+            raise Exception("base_url not found in setup.json")
+        headers = {"Content-Type": "application/json"}
+        if extra_headers:
+            headers.update(extra_headers)
+        if not auth:
+            return await self._send(method, endpoint, f"{base_url}{path}", headers, payload, params)
+        access_token = await self.tokens.get_access_token()
+        headers["Authorization"] = f"Bearer {access_token}"
+        result = await self._send(method, endpoint, f"{base_url}{path}", headers, payload, params)
+        if result[0] != 401:
+            return result
+        new_token = await self.tokens.refresh(stale_token=access_token)
+        if not new_token or new_token == access_token:
+            return result
+        self.tokens.stats["retried_401"] += 1
+        headers["Authorization"] = f"Bearer {new_token}"
+        return await self._send(method, endpoint, f"{base_url}{path}", headers, payload, params)
+
+    async def _send(
+        self,
+        method: str,
+        endpoint: str,
+        url: str,
+        headers: Dict[str, str],
+        payload: Optional[Dict[str, Any]],
+        params: Optional[Dict[str, Any]],
+    ) -> Tuple[int, Any, str, Mapping[str, str]]:
+        breaker = circuit_breaker.get(endpoint)
+        breaker.before_request()
+        started = time.monotonic()
+        try:
+            session = await self._get_session()
+            async with session.request(
+                method,
+                url,
+                json=payload,
+                params=params,
+                headers=headers,
+                timeout=self._timeout(endpoint),
+            ) as resp:
+                text = await resp.text()
+                status, resp_headers = resp.status, resp.headers
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            breaker.record_failure(str(e) or e.__class__.__name__)
+            raise
+        except BaseException:
+            breaker.abort()
+            raise
+        if status >= 500:
+            breaker.record_failure(f"HTTP {status}")
+        else:
+            breaker.record_success(time.monotonic() - started)
+        try:
+            body = json.loads(text) if text else None
+        except ValueError:
+            body = None
+        return status, body, text, resp_headers
+
+    async def _request(
+        self,
+        method: str,
+        endpoint: str,
+        path: str,
+        payload: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        auth: bool = True,
+    ) -> Tuple[int, Any, str]:
+        """Kirim request, return (http_status, parsed_json_or_None, raw_text)."""
+        status, body, text, _ = await self._request_with_headers(method, endpoint, path, payload, params, auth)
+        return status, body, text
+
+    async def _post_json(self, endpoint: str, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Setara pola requests.post + raise_for_status + json() di api/*.py."""
+        try:
+            status, body, text = await self._request("POST", endpoint, path, payload)
+            if status >= 400:
+                return {"success": False, "error": f"{status} Error for url: {path}"}
+            if body is None:
+                return {"success": False, "error": f"Non-JSON response: {text[:200]}"}
+            return body
+        except SupplierUnavailable as e:
+            return {"success": False, "error": str(e), "circuit_open": True}
+        except Exception as e:
+            return {"success": False, "error": str(e) or e.__class__.__name__}
+
+    async def _get_json_or_raise(self, endpoint: str, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        status, body, text = await self._request("GET", endpoint, path, params=params)
+        if status >= 400:
+            raise Exception(f"{status} Error for url: {path}")
+        if body is None:
+            raise Exception(f"Non-JSON response: {text[:200]}")
+        return body
+
+    async def _single_flight(
+        self, endpoint: str, path: str, payload: Dict[str, Any], generation: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        _post_json, tapi pemanggilan bersamaan dengan (endpoint, path, payload) yang sama
+        (mis. tombol ditekan dua kali) berbagi satu request ke supplier dan hasilnya.
+        Setiap pemanggil menerima salinan dict hasil. Request tetap selesai walaupun
+        pemanggil yang memulainya dibatalkan, selama masih ada pemanggil lain.
+        generation (lookup_cache) ikut dalam key: pemanggil setelah invalidasi tidak
+        menumpang request yang dimulai sebelumnya.
+        """
+        key = (endpoint, path, json.dumps(payload, sort_keys=True, default=str), generation)
+        self._sf_stats["calls"] += 1
+        fut = self._inflight.get(key)
+        if fut is None:
+            fut = asyncio.ensure_future(self._post_json(endpoint, path, payload))
+            self._inflight[key] = fut
+
+            def _done(f: "asyncio.Future[Dict[str, Any]]", key=key) -> None:
+                if self._inflight.get(key) is f:
+                    del self._inflight[key]
+
+            fut.add_done_callback(_done)
+        else:
+            self._sf_stats["coalesced"] += 1
+        result = await asyncio.shield(fut)
+        return copy.deepcopy(result)
+
+    def get_single_flight_stats(self) -> Dict[str, int]:
+        """{"calls", "coalesced", "inflight"}: coalesced = pemanggilan yang menumpang request lain."""
+        return {**self._sf_stats, "inflight": len(self._inflight)}
+
+    async def _cached_lookup(self, endpoint: str, path: str, msisdn: str) -> Dict[str, Any]:
+        """_single_flight dengan cache per (endpoint, msisdn), lihat api.lookup_cache."""
+        cached = lookup_cache.get(endpoint, msisdn)
+        if cached is not None:
+            return cached
+        generation = lookup_cache.generation(msisdn)
+        result = await self._single_flight(endpoint, path, {"msisdn": msisdn}, generation)
+        lookup_cache.put(endpoint, msisdn, result, generation)
+        return result
+
+    # --- XL -------------------------------------------------------------------------
+
+    async def cek_pulsa_xl(self, msisdn: str) -> Dict[str, Any]:
+        return await self._cached_lookup("pulsa", "/api/xl/pulsa", msisdn)
+
+    async def cek_kuota_xl(self, msisdn: str) -> Dict[str, Any]:
+        return await self._cached_lookup("kuota", "/api/xl/kuota", msisdn)
+
+    async def kirim_otp_xl(self, msisdn: str) -> Dict[str, Any]:
+        return await self._post_json("otp", "/api/xl/otp", {"msisdn": msisdn})
+
+    async def login_xl_with_otp(self, msisdn: str, otp: str) -> Dict[str, Any]:
+        return await self._post_json("ver_otp", "/api/xl/ver-otp", {"msisdn": msisdn, "otp": otp})
+
+    async def refresh_xl_session(self, msisdn: str) -> Dict[str, Any]:
+        return await self._single_flight("refresh_session", "/api/xl/refresh", {"msisdn": msisdn})
+
+    async def cek_kuota_sidompul(self, msisdn: str) -> Dict[str, Any]:
+        return await self._cached_lookup("sidompul", "/api/xl/sidompul", msisdn)
+
+    async def ambil_kategori_xl(self) -> Any:
+        """Raise exception jika gagal (sama seperti api.ambil_produk.ambil_kategori_xl)."""
+        return await self._get_json_or_raise("kategori", "/api/xl/kategori")
+
+    async def ambil_produk_xl(self, kategori: str) -> Any:
+        """Raise exception jika gagal (sama seperti api.ambil_produk.ambil_produk_xl)."""
+        return await self._get_json_or_raise("produk", "/api/xl/produk-list", params={"kategori": kategori})
+
+    async def ambil_produk_xl_conditional(
+        self,
+        kategori: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Seperti ambil_produk_xl, tapi mengirim If-None-Match / If-Modified-Since jika ada.
+        Return {"not_modified": bool, "body": json|None, "etag": str|None, "last_modified": str|None}.
+        Raise exception jika gagal.
+        """
+        extra: Dict[str, str] = {}
+        if etag:
+            extra["If-None-Match"] = etag
+        if last_modified:
+            extra["If-Modified-Since"] = last_modified
+        path = "/api/xl/produk-list"
+        status, body, text, headers = await self._request_with_headers(
+            "GET", "produk", path, params={"kategori": kategori}, extra_headers=extra
+        )
+        if status == 304:
+            return {"not_modified": True, "body": None, "etag": etag, "last_modified": last_modified}
+        if status >= 400:
+            raise Exception(f"{status} Error for url: {path}")
+        if body is None:
+            raise Exception(f"Non-JSON response: {text[:200]}")
+        return {
+            "not_modified": False,
+            "body": body,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+        }
+
+    async def xl_payment_settlement(self, produk_id: str, msisdn: str, metode_pembayaran: str) -> Dict[str, Any]:
+        """
+        Kirim request pembayaran XL ke endpoint settlement.
+
+        Return: dict with at least 'success': bool and optionally other fields from API.
+        Also includes '_http_status' when HTTP response available.
+        """
+        payload = {
+            "produk_id": produk_id,
+            "msisdn": msisdn,
+            "metode_pembayaran": metode_pembayaran
+        }
+        logger.debug("xl_payment_settlement payload: %s", json.dumps(payload, ensure_ascii=False))
+        try:
+            status, body, text = await self._request("POST", "settlement", "/api/xl/payment-settlement", payload)
+        except SupplierUnavailable as e:
+            # request tidak dikirim ke supplier, jadi transaksi pasti tidak terjadi
+            logger.warning("xl_payment_settlement rejected for msisdn=%s: %s", msisdn, e)
+            return {"success": False, "error": str(e), "xl_message": str(e), "circuit_open": True}
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # jaringan / timeout / DNS error dll.
+            logger.exception("Request error in xl_payment_settlement: %s", e)
+            return {"success": False, "error": str(e) or e.__class__.__name__}
+        except Exception as e:
+            logger.exception("Unexpected error in xl_payment_settlement: %s", e)
+            return {"success": False, "error": str(e)}
+
+        preview = (text[:_MAX_LOG_BODY] + "...(truncated)") if len(text) > _MAX_LOG_BODY else text
+        logger.info("xl_payment_settlement HTTP %s for produk=%s msisdn=%s -> %s", status, produk_id, msisdn, preview)
+
+        if body is None:
+            logger.debug("xl_payment_settlement non-JSON full response: %s", text)
+            return {"success": False, "error": f"HTTP {status}: {text}", "_http_status": status}
+
+        if isinstance(body, dict):
+            # default success to False for HTTP >= 400 unless body explicitly sets success True
+            body.setdefault("success", False if status >= 400 else body.get("success", False))
+            body["_http_status"] = status
+            if body.get("success"):
+                # pulsa/kuota nomor ini berubah; jangan tampilkan hasil cek lama dari cache
+                lookup_cache.invalidate_msisdn(msisdn)
+            logger.debug("xl_payment_settlement JSON body: %s", json.dumps(body, ensure_ascii=False))
+            return body
+
+        logger.info("xl_payment_settlement unexpected JSON type: %s", type(body))
+        return {"success": False, "error": f"Unexpected JSON type: {type(body)}", "raw": body, "_http_status": status}
+
+    # --- payment / auth ---------------------------------------------------------------
+
+    async def create_deposit(self, amount: int) -> Dict[str, Any]:
+        """Sama seperti api.deposit_api.create_deposit, tapi async."""
+        try:
+            status, body, text = await self._request("POST", "deposit", "/api/payment/deposit", {"amount": int(amount)})
+        except Exception as e:
+            return {"success": False, "error": f"Request failed: {str(e)}"}
+        if body is None:
+            return {"success": False, "error": "Non-JSON response from API", "status_code": status, "body": text}
+        if status >= 400:
+            return {"success": False, "error": "API returned error", "status_code": status, "body": body}
+        return body
+
+    async def update_user_profile(self) -> Dict[str, Any]:
+        """
+        Ambil data profile user terbaru dari API dan update field "user" di core/token.json.
+        Raise exception jika gagal (sama seperti api.profile.update_user_profile).
+        """
+        try:
+            data = await self._get_json_or_raise("profile", "/api/auth/me")
+        except Exception as e:
+            raise Exception(f"Gagal mengambil data profile dari API: {e}")
+        if not data.get("success") or "user" not in data:
+            raise Exception(f"Response API tidak sesuai: {data}")
+        config.update_token(user=data["user"])
+        return data["user"]
+
+    async def ambil_token(self) -> bool:
+        """Login email/password ke API dan simpan hasilnya ke core/token.json."""
+        return await self.tokens.login()
+
+    async def refresh_access_token(self) -> bool:
+        """Perbarui access token sekarang (refresh_token, fallback login); lihat TokenManager.refresh."""
+        return await self.tokens.refresh(stale_token=self.tokens.access_token) is not None
+
+
+# Instance bersama untuk seluruh bot
+supplier = SupplierClient()
+
+
+async def close_supplier_client() -> None:
+    await supplier.close()
@@ -1,52 +1,16 @@
-import os
-import json
 from typing import Optional, Tuple, Any, Dict
 
 import requests
 
-
-def _setup_paths() -> Tuple[str, str]:
-    """
-    Return paths for core/setup.json and core/token.json relative to repo root
-    (assumes this file lives in api/).
-    """
-    repo_root = os.path.dirname(os.path.dirname(__file__))
-    setup_path = os.path.join(repo_root, "core", "setup.json")
-    token_path = os.path.join(repo_root, "core", "token.json")
-    return setup_path, token_path
+from helper import config
 
 
 def get_api_base_url_and_token() -> Tuple[Optional[str], Optional[str]]:
     """
-    Read core/setup.json to get API base_url and core/token.json to get access_token.
-
-    Returns (base_url, access_token) or (None, None) on missing values.
+    Return (base_url, access_token) dari config service (helper.config),
+    atau None untuk nilai yang tidak ada.
     """
-    setup_path, token_path = _setup_paths()
-
-    if not os.path.exists(setup_path):
-        return None, None
-
-    with open(setup_path, "r", encoding="utf-8") as f:
-        try:
-            data = json.load(f)
-        except Exception:
-            return None, None
-
-    api = data.get("api", {})
-    base_url = api.get("base_url")
-
-    if not os.path.exists(token_path):
-        return base_url, None
-
-    with open(token_path, "r", encoding="utf-8") as tf:
-        try:
-            token_data = json.load(tf)
-        except Exception:
-            return base_url, None
-        access_token = token_data.get("access_token")
-
-    return base_url, access_token
+    return config.get_api_base_url(), config.get_access_token()
 
 
 def create_deposit(amount: int, timeout: int = 30) -> Dict[str, Any]:
@@ -0,0 +1,141 @@
+"""
+Cache hasil cek pulsa / kuota / sidompul per (endpoint, msisdn), dipakai oleh api.client.
+
+API supplier berbayar per request dan di-rate-limit, sedangkan user sering membuka menu
+yang sama berulang kali dalam beberapa detik. Hasil sukses disimpan selama TTL pendek
+per endpoint (setup.json "lookup_cache_ttl", mis. {"pulsa": 30, "kuota": 60}; 0 = tanpa
+cache). Respon gagal tidak disimpan. Setelah pembelian sukses untuk suatu nomor,
+invalidate_msisdn() membuang semua entri nomor tersebut agar saldo/kuota baru terlihat.
+Lookup yang sedang berjalan saat invalidasi tidak boleh menyimpan hasil lamanya: pemanggil
+membaca generation(msisdn) sebelum request dan mengirimnya ke put(), yang melewati
+penyimpanan jika generasi nomor itu sudah berubah.
+
+Ukuran dibatasi (LRU); dict yang disimpan dan dikembalikan adalah salinan.
+"""
+from __future__ import annotations
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from helper import config
+
+DEFAULT_TTLS: Dict[str, float] = {
+    "pulsa": 30,
+    "kuota": 60,
+    "sidompul": 60,
+}
+DEFAULT_MAX_SIZE = 1024
+
+_lock = threading.Lock()
+_entries: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_max_size = DEFAULT_MAX_SIZE
+_stats = {"hits": 0, "misses": 0, "evictions": 0, "stale_skipped": 0}
+# generasi per nomor, dinaikkan oleh invalidate_msisdn(); nomor yang tidak tercatat
+# memakai _generation_floor (dinaikkan saat dict dipangkas, agar tidak pernah mundur)
+_generations: Dict[str, int] = {}
+_generation_counter = 0
+_generation_floor = 0
+
+
+def _normalize(msisdn: Any) -> str:
+    s = str(msisdn or "").strip()
+    if s.startswith("08"):
+        s = "62" + s[1:]
+    return s
+
+
+def get_ttl(endpoint: str) -> float:
+    """TTL (detik) untuk endpoint dari setup.json, atau DEFAULT_TTLS."""
+    ttls = config.read_setup().get("lookup_cache_ttl") or {}
+    try:
+        return max(0.0, float(ttls.get(endpoint, DEFAULT_TTLS.get(endpoint, 0))))
+    except (TypeError, ValueError, AttributeError):
+        return float(DEFAULT_TTLS.get(endpoint, 0))
+
+
+def get(endpoint: str, msisdn: Any) -> Optional[Dict[str, Any]]:
+    """Salinan hasil yang masih berlaku, atau None (miss / kedaluwarsa)."""
+    key = (endpoint, _normalize(msisdn))
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None or entry[0] <= now:
+            if entry is not None:
+                del _entries[key]
+            _stats["misses"] += 1
+            return None
+        _entries.move_to_end(key)
+        _stats["hits"] += 1
+        return copy.deepcopy(entry[1])
+
+
+def generation(msisdn: Any) -> int:
+    """Generasi cache nomor ini; baca sebelum request lalu teruskan ke put()."""
+    number = _normalize(msisdn)
+    with _lock:
+        return _generations.get(number, _generation_floor)
+
+
+def put(endpoint: str, msisdn: Any, result: Dict[str, Any], generation: Optional[int] = None) -> None:
+    """
+    Simpan result sukses selama get_ttl(endpoint) detik. Jika generation diberikan dan
+    nomor sudah diinvalidasi sejak itu, result (yang mungkin sudah basi) tidak disimpan.
+    """
+    if not isinstance(result, dict) or not result.get("success"):
+        return
+    ttl = get_ttl(endpoint)
+    if ttl <= 0:
+        return
+    number = _normalize(msisdn)
+    key = (endpoint, number)
+    with _lock:
+        if generation is not None and _generations.get(number, _generation_floor) != generation:
+            _stats["stale_skipped"] += 1
+            return
+        _entries[key] = (time.monotonic() + ttl, copy.deepcopy(result))
+        _entries.move_to_end(key)
+        while len(_entries) > _max_size:
+            _entries.popitem(last=False)
+            _stats["evictions"] += 1
+
+
+def invalidate_msisdn(msisdn: Any) -> None:
+    """Buang semua entri untuk nomor ini (dipanggil setelah pembelian sukses)."""
+    global _generation_counter, _generation_floor
+    number = _normalize(msisdn)
+    with _lock:
+        for key in [k for k in _entries if k[1] == number]:
+            del _entries[key]
+        _generation_counter += 1
+        if len(_generations) >= _max_size:
+            _generations.clear()
+            _generation_floor = _generation_counter
+        _generations[number] = _generation_counter
+
+
+def clear() -> None:
+    with _lock:
+        _entries.clear()
+
+
+def set_max_size(max_size: int) -> None:
+    global _max_size
+    with _lock:
+        _max_size = max(1, int(max_size))
+        while len(_entries) > _max_size:
+            _entries.popitem(last=False)
+            _stats["evictions"] += 1
+
+
+def stats() -> Dict[str, Any]:
+    """{"hits", "misses", "evictions", "stale_skipped", "size", "max_size", "hit_ratio"}."""
+    with _lock:
+        total = _stats["hits"] + _stats["misses"]
+        return {
+            **_stats,
+            "size": len(_entries),
+            "max_size": _max_size,
+            "hit_ratio": (_stats["hits"] / total) if total else 0.0,
+        }
@@ -1,31 +1,22 @@
 import requests
-import json
-import os
+
+from helper import config
 
 def get_base_url():
-    setup_path = os.path.join("core", "setup.json")
-    if not os.path.exists(setup_path):
-        raise Exception("setup.json not found")
-    with open(setup_path, "r") as f:
-        data = json.load(f)
-    api = data.get("api", {})
-    base_url = api.get("base_url")
+    base_url = config.get_api_base_url()
     if not base_url:
         raise Exception("base_url not found in setup.json")
-    return base_url.rstrip("/")
+    return base_url
 
 def update_user_profile():
     """
     Ambil data profile user terbaru dari API dan update field "user" di core/token.json.
     """
-    token_path = os.path.join("core", "token.json")
-    if not os.path.exists(token_path):
+    if not config.token_exists():
         raise Exception("Token file not found")
 
     # Ambil access token
-    with open(token_path, "r") as f:
-        token_data = json.load(f)
-    access_token = token_data.get("access_token")
+    access_token = config.get_access_token()
     if not access_token:
         raise Exception("Access token not found in token.json")
 
@@ -45,7 +36,5 @@ def update_user_profile():
         raise Exception(f"Response API tidak sesuai: {data}")
 
     # Update field "user" di token.json
-    token_data["user"] = data["user"]
-    with open(token_path, "w") as f:
-        json.dump(token_data, f, indent=2)
+    config.update_token(user=data["user"])
     return data["user"]
\ No newline at end of file
@@ -0,0 +1,196 @@
+"""
+Token akses API supplier yang disimpan di memori, dipakai oleh api.client.
+
+Access token dibaca dari core/token.json sekali lalu disimpan di memori. Token
+diperbarui sebelum kedaluwarsa berdasarkan klaim "exp" JWT-nya (lihat run()), atau
+saat API membalas 401. Pemanggilan refresh bersamaan (mis. banyak request mendapat 401
+sekaligus) dilayani oleh satu request refresh; pemanggil lain menunggu lalu memakai
+token barunya. Jika refresh_token ditolak, fallback ke login email/password
+(ambil-token). token.json hanya ditulis (atomik, lewat helper.config) jika token
+benar-benar berubah.
+"""
+from __future__ import annotations
+import asyncio
+import base64
+import json
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from helper import config
+
+if TYPE_CHECKING:
+    from api.client import SupplierClient
+
+logger = logging.getLogger(__name__)
+
+# perbarui token selama ini (detik) sebelum exp
+REFRESH_MARGIN_SECONDS = 120
+# jeda cek ulang jika token tidak punya klaim exp / tidak ada token
+UNKNOWN_EXPIRY_CHECK_SECONDS = 300
+RETRY_SECONDS = 30
+
+
+def _jwt_exp(token: Optional[str]) -> Optional[float]:
+    """Klaim exp (epoch detik) dari JWT tanpa verifikasi signature; None jika bukan JWT."""
+    if not token:
+        return None
+    parts = token.split(".")
+    if len(parts) != 3:
+        return None
+    try:
+        payload = parts[1] + "=" * (-len(parts[1]) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+        return float(exp) if exp is not None else None
+    except Exception:
+        return None
+
+
+class TokenManager:
+    def __init__(self, client: "SupplierClient"):
+        self._client = client
+        self._access_token: Optional[str] = None
+        self._refresh_token: Optional[str] = None
+        self._exp: Optional[float] = None
+        self._loaded = False
+        self._lock: Optional[asyncio.Lock] = None
+        self.stats = {"refreshed": 0, "logins": 0, "failures": 0, "coalesced": 0, "retried_401": 0}
+
+    @property
+    def access_token(self) -> Optional[str]:
+        """Access token di memori saat ini (tanpa refresh)."""
+        if not self._loaded:
+            self._load_from_file()
+        return self._access_token
+
+    def _get_lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def _load_from_file(self) -> None:
+        data = config.read_token()
+        self._access_token = data.get("access_token")
+        self._refresh_token = data.get("refresh_token")
+        self._exp = _jwt_exp(self._access_token)
+        self._loaded = True
+
+    def _needs_refresh(self) -> bool:
+        if not self._access_token:
+            return True
+        return self._exp is not None and self._exp - time.time() <= REFRESH_MARGIN_SECONDS
+
+    def seconds_until_refresh(self) -> Optional[float]:
+        """Detik sampai token perlu diperbarui; None jika exp tidak diketahui."""
+        if not self._loaded:
+            self._load_from_file()
+        if not self._access_token:
+            return 0.0
+        if self._exp is None:
+            return None
+        return max(0.0, self._exp - REFRESH_MARGIN_SECONDS - time.time())
+
+    async def get_access_token(self) -> Optional[str]:
+        """Access token dari memori; diperbarui dulu jika hampir/ sudah kedaluwarsa."""
+        if not self._loaded:
+            self._load_from_file()
+        if self._needs_refresh():
+            await self.refresh(stale_token=self._access_token)
+        return self._access_token
+
+    def _store(self, fields: Dict[str, Any], replace: bool = False) -> None:
+        """Simpan token ke memori, dan ke token.json hanya jika isinya berubah."""
+        current = config.read_token()
+        if replace:
+            if fields != current:
+                config.save_token_data(fields)
+        elif any(current.get(k) != v for k, v in fields.items()):
+            config.update_token(**fields)
+        self._access_token = fields.get("access_token")
+        self._refresh_token = fields.get("refresh_token", self._refresh_token)
+        self._exp = _jwt_exp(self._access_token)
+
+    async def refresh(self, stale_token: Optional[str] = None) -> Optional[str]:
+        """
+        Perbarui access token (refresh_token, fallback login) dan return token baru.
+
+        stale_token = token yang ditolak / kedaluwarsa menurut pemanggil. Jika token
+        sudah diganti oleh pemanggil lain (atau proses lain lewat token.json) selama
+        menunggu lock, token itu yang dipakai tanpa request refresh baru.
+        """
+        async with self._get_lock():
+            if self._access_token and self._access_token != stale_token and not self._needs_refresh():
+                self.stats["coalesced"] += 1
+                return self._access_token
+            self._load_from_file()
+            if self._access_token and self._access_token != stale_token and not self._needs_refresh():
+                return self._access_token
+
+            if self._refresh_token and await self._refresh_via_api():
+                self.stats["refreshed"] += 1
+                return self._access_token
+            if await self._login():
+                self.stats["logins"] += 1
+                return self._access_token
+            self.stats["failures"] += 1
+            return None
+
+    async def login(self) -> bool:
+        """Login email/password (ambil-token) sekarang, tanpa mencoba refresh_token dulu."""
+        async with self._get_lock():
+            ok = await self._login()
+            if ok:
+                self.stats["logins"] += 1
+            return ok
+
+    async def _refresh_via_api(self) -> bool:
+        try:
+            status, body, text = await self._client._request(
+                "POST", "auth", "/api/auth/refresh", {"refresh_token": self._refresh_token}, auth=False
+            )
+        except Exception as e:
+            logger.error("Error refresh: %s", e)
+            return False
+        if status == 200 and isinstance(body, dict) and body.get("access_token"):
+            self._store({
+                "access_token": body["access_token"],
+                "refresh_token": body.get("refresh_token") or self._refresh_token,
+            })
+            logger.info("Access token diperbarui (exp=%s)", self._exp)
+            return True
+        logger.error("Error refresh: %s - %s", status, text[:200])
+        return False
+
+    async def _login(self) -> bool:
+        api = config.get_api_config()
+        payload = {"email": api.get("email"), "password": api.get("password")}
+        try:
+            status, body, text = await self._client._request("POST", "auth", "/api/auth/ambil-token", payload, auth=False)
+        except Exception as e:
+            logger.error("Gagal ambil token: %s", e)
+            return False
+        if status == 200 and isinstance(body, dict):
+            self._store(body, replace=True)
+            logger.info("Token berhasil diambil dan disimpan di core/token.json")
+            return True
+        logger.error("Gagal ambil token: %s - %s", status, text[:200])
+        return False
+
+    async def run(self) -> None:
+        """Loop latar: perbarui token menjelang exp (pengganti refresh tiap 5 menit)."""
+        while True:
+            try:
+                wait = self.seconds_until_refresh()
+                if wait is None:
+                    await asyncio.sleep(UNKNOWN_EXPIRY_CHECK_SECONDS)
+                    continue
+                if wait > 0:
+                    await asyncio.sleep(min(wait, UNKNOWN_EXPIRY_CHECK_SECONDS))
+                    continue
+                if await self.refresh(stale_token=self._access_token) is None:
+                    await asyncio.sleep(RETRY_SECONDS)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Token refresh loop error")
+                await asyncio.sleep(RETRY_SECONDS)
@@ -1,34 +1,16 @@
 import requests
-import os
 import json
 import logging
 from typing import Any, Dict
 
+from helper.config import get_api_base_url_and_token
+
 logger = logging.getLogger(__name__)
 
 # limit how many characters of response body we show in info logs
 _MAX_LOG_BODY = 2000
 
 
-def get_api_base_url_and_token():
-    setup_path = os.path.join("core", "setup.json")
-    if not os.path.exists(setup_path):
-        raise Exception("setup.json not found.")
-    with open(setup_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-        api = data.get("api", {})
-        token_path = os.path.join("core", "token.json")
-        if not os.path.exists(token_path):
-            raise Exception("token.json not found.")
-        with open(token_path, "r", encoding="utf-8") as tf:
-            token_data = json.load(tf)
-            access_token = token_data.get("access_token")
-        base_url = api.get("base_url")
-        if not base_url or not access_token:
-            raise Exception("API base_url atau access_token tidak ditemukan.")
-        return base_url, access_token
-
-
 def _safe_log_body(prefix: str, body: Any, level: int = logging.INFO) -> None:
     """
     Log response body safely: a short summary at INFO, full body at DEBUG.
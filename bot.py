@@ -1,7 +1,5 @@
 from __future__ import annotations
 import asyncio
-import json
-import os
 import logging
 import random
 from typing import List, Optional
@@ -9,26 +7,26 @@ from typing import List, Optional
 from aiogram import Bot, Dispatcher
 from aiogram.fsm.storage.memory import MemoryStorage
 
+from data.connection import close_all_connections
+from data.async_database import flush_writes, shutdown as shutdown_db_executor, snapshot_saldo
 from data.database import add_user
-from models.users import init_db
+from data.migrations import run_migrations
+from helper import config
 
 # Ensure token.json exists (older code path)
-TOKEN_PATH = os.path.join("core", "token.json")
-if not os.path.exists(TOKEN_PATH):
+if not config.token_exists():
     from api.ambil_token import ambil_token  # type: ignore
     ambil_token()
 
 def load_token_admin():
-    with open("core/setup.json", "r", encoding="utf-8") as f:
-        data = json.load(f)
-    token = data["token"]
-    admin = data.get("admin")
+    token = config.read_setup()["token"]
+    admin = config.read_setup().get("admin")
     return token, admin
 
 BOT_TOKEN, ADMIN = load_token_admin()
 
-# Initialize DB and admin user
-init_db()
+# Initialize DB (versioned migrations) and admin user
+run_migrations()
 if ADMIN:
     try:
         add_user(ADMIN["userid"], ADMIN["username"], role="admin")
@@ -66,6 +64,7 @@ from handler.cara_pembelian_dan_deposit import router as cara_pembelian_dan_depo
 from handler.deposit_user import router as deposit_user_router
 from handler.transaksi_terjadwal import router as transaksi_terjadwal_router
 from handler.cek_pending_transaksi_terjadwal import router as cek_pending_transaksi_terjadwal_router
+from handler.riwayat_transaksi import router as riwayat_transaksi_router
 
 dp.include_router(admin_daftar_user_router)
 dp.include_router(admin_tambah_user_router)
@@ -92,11 +91,12 @@ dp.include_router(cara_pembelian_dan_deposit_router)
 dp.include_router(deposit_user_router)
 dp.include_router(transaksi_terjadwal_router)
 dp.include_router(cek_pending_transaksi_terjadwal_router)
+dp.include_router(riwayat_transaksi_router)
 # ---------------------------------
 
-from api.refresh_token import get_refresh_token, refresh_token_loop  # type: ignore
-from api.ambil_produk import ambil_kategori_xl, ambil_produk_xl, simpan_produk_ke_db  # type: ignore
-from models.produk_xl import init_db as init_produk_db  # type: ignore
+from api.refresh_token import refresh_token_loop  # type: ignore
+from api.client import close_supplier_client
+from helper.sync_produk import sinkron_produk_xl  # type: ignore
 
 # helper processor for scheduled transactions
 from helper.transaksi_terjadwal import start_transaksi_processor, stop_transaksi_processor  # type: ignore
@@ -114,25 +114,36 @@ logger.setLevel(logging.INFO)
 
 
 async def update_produk_xl_periodik():
-    init_produk_db()
-    from api.ambil_token import ambil_token  # type: ignore
     while True:
         try:
-            try:
-                get_refresh_token()
-            except Exception:
-                # attempt to re-fetch token if refresh fails
-                ambil_token()
-            kategori_list = ambil_kategori_xl()["data"]
-            for kategori in kategori_list:
-                produk_response = ambil_produk_xl(kategori)
-                simpan_produk_ke_db(produk_response["data"])
+            # token (termasuk login ulang jika refresh_token ditolak) diurus supplier.tokens
+            for hasil in await sinkron_produk_xl():
+                if hasil["status"] != "changed":
+                    # gagal setelah retry (data lama dipertahankan) atau tidak berubah sejak sync terakhir
+                    continue
+                diff = hasil["diff"]
+                logger.info(
+                    "Produk %s disinkronkan dalam %.2fs: total=%s baru=%s harga_naik=%s diperbarui=%s",
+                    hasil["kategori"], hasil["elapsed"], diff["total"], len(diff["inserted"]),
+                    len(diff["harga_naik"]), len(diff["updated"])
+                )
         except Exception:
             # logging removed
             logger.exception("Error in update_produk_xl_periodik (ignored)")
         await asyncio.sleep(60 * 60 * 12)  # 12 jam
 
 
+async def snapshot_saldo_periodik():
+    while True:
+        try:
+            written = await snapshot_saldo()
+            if written:
+                logger.info("Snapshot saldo ditulis untuk %s user", written)
+        except Exception:
+            logger.exception("Error in snapshot_saldo_periodik (ignored)")
+        await asyncio.sleep(60 * 60 * 24)  # 24 jam
+
+
 async def _on_shutdown():
     # logging removed
     # stop scheduled-transactions processor
@@ -175,6 +186,23 @@ async def _on_shutdown():
     except Exception:
         pass
 
+    # tutup session aiohttp bersama untuk API supplier
+    try:
+        await close_supplier_client()
+    except Exception:
+        pass
+
+    # selesaikan antrian group commit, hentikan thread DB lalu tutup koneksi SQLite bersama (checkpoint WAL)
+    try:
+        await asyncio.wait_for(flush_writes(), timeout=5.0)
+    except Exception:
+        logger.exception("Failed to flush pending DB writes")
+    try:
+        shutdown_db_executor()
+        close_all_connections()
+    except Exception:
+        pass
+
 
 async def main():
     # start the long-running background maintenance tasks and keep references
@@ -190,6 +218,12 @@ async def main():
     except Exception:
         logger.exception("Failed to start update_produk_xl_periodik (ignored)")
 
+    try:
+        t_snapshot = asyncio.create_task(snapshot_saldo_periodik(), name="snapshot_saldo_periodik")
+        _background_tasks.append(t_snapshot)
+    except Exception:
+        logger.exception("Failed to start snapshot_saldo_periodik (ignored)")
+
     # start scheduled-transactions processor here while event loop is running
     try:
         task_trans = start_transaksi_processor(bot)
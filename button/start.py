@@ -1,23 +1,9 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-import os
-import json
 import logging
 
-logger = logging.getLogger(__name__)
-
-def _setup_path() -> str:
-    return os.path.join(os.path.dirname(os.path.dirname(__file__)), "core", "setup.json")
+from helper.config import read_setup
 
-def read_setup() -> dict:
-    try:
-        p = _setup_path()
-        if not os.path.exists(p):
-            return {}
-        with open(p, "r", encoding="utf-8") as f:
-            return json.load(f) or {}
-    except Exception:
-        logger.exception("Failed to read setup.json")
-        return {}
+logger = logging.getLogger(__name__)
 
 def _notif_username_from_setup() -> str | None:
     """
@@ -0,0 +1,225 @@
+"""
+Versi awaitable dari data.database dan models/*.
+
+Semua query dijalankan di satu thread executor khusus database ("db"), sehingga
+handler aiogram tidak lagi mem-blok event loop saat menunggu SQLite. Karena hanya
+ada satu thread, semua akses memakai satu koneksi (lihat data.connection) dan
+penulisan otomatis berurutan tanpa rebutan lock.
+
+Contoh:
+    from data import async_database as adb
+    user = await adb.get_user(userid)
+
+Group commit: penulisan yang sering & kecil (insert_riwayat, update_status transaksi
+terjadwal, update_user_saldo) tidak langsung dijalankan, tetapi masuk antrian writer
+tunggal. Writer mengumpulkan item selama GROUP_COMMIT_MAX_DELAY detik atau sampai
+GROUP_COMMIT_MAX_ITEMS item, lalu menjalankan semuanya dalam SATU transaksi SQLite.
+Setiap item tetap berada di SAVEPOINT sendiri (lihat data.connection.transaction), jadi
+item yang error tidak menggagalkan item lain; pemanggil menunggu future per item yang
+selesai setelah batch-nya commit (return value / exception sama seperti fungsi aslinya).
+"""
+from __future__ import annotations
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from data import catalog_cache, user_cache
+from data import database as _db
+from data.connection import transaction
+import models.produk_xl as _produk
+import models.riwayat_transaksi as _riwayat
+import models.seting_bot as _seting
+import models.transaksi_terjadwal as _terjadwal
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db")
+
+GROUP_COMMIT_MAX_ITEMS = 64
+GROUP_COMMIT_MAX_DELAY = 0.005  # detik
+
+_write_queue: Optional["asyncio.Queue[Tuple[Callable[..., Any], tuple, dict, asyncio.Future]]"] = None
+_writer_task: Optional[asyncio.Task] = None
+_group_stats: Dict[str, int] = {"batches": 0, "items": 0, "errors": 0, "max_batch": 0}
+
+
+async def run_db(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Jalankan fungsi database sinkron di thread DB lalu tunggu hasilnya."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
+
+
+def _async(fn: Callable[..., T]) -> Callable[..., "asyncio.Future[T]"]:
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        return await run_db(fn, *args, **kwargs)
+    return wrapper
+
+
+def _run_batch(items: List[Tuple[Callable[..., Any], tuple, dict]]) -> List[Tuple[bool, Any]]:
+    """Jalankan semua item dalam satu transaksi (di thread DB). Return [(ok, hasil/exception)]."""
+    results: List[Tuple[bool, Any]] = []
+    try:
+        with transaction() as c:
+            c.execute("BEGIN IMMEDIATE")
+            for fn, args, kwargs in items:
+                try:
+                    results.append((True, fn(*args, **kwargs)))
+                except Exception as e:
+                    results.append((False, e))
+    except Exception as e:
+        # commit batch gagal: semua item dianggap gagal; cache write-through mungkin sudah
+        # diperbarui oleh item, jadi buang agar dibaca ulang dari DB
+        user_cache.clear()
+        catalog_cache.bump_version()
+        return [(False, e)] * len(items)
+    return results
+
+
+async def _group_writer() -> None:
+    loop = asyncio.get_running_loop()
+    queue = _write_queue
+    while True:
+        first = await queue.get()
+        batch = [first]
+        deadline = loop.time() + GROUP_COMMIT_MAX_DELAY
+        while len(batch) < GROUP_COMMIT_MAX_ITEMS:
+            try:
+                batch.append(queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        try:
+            results = await run_db(_run_batch, [(fn, args, kwargs) for fn, args, kwargs, _ in batch])
+        except Exception as e:
+            results = [(False, e)] * len(batch)
+        _group_stats["batches"] += 1
+        _group_stats["items"] += len(batch)
+        _group_stats["max_batch"] = max(_group_stats["max_batch"], len(batch))
+        for (_, _, _, fut), (ok, value) in zip(batch, results):
+            if fut.done():
+                continue
+            if ok:
+                fut.set_result(value)
+            else:
+                _group_stats["errors"] += 1
+                fut.set_exception(value)
+        for _ in batch:
+            queue.task_done()
+
+
+async def submit_write(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Masukkan penulisan ke antrian group commit lalu tunggu sampai batch-nya commit."""
+    global _write_queue, _writer_task
+    if _writer_task is None or _writer_task.done():
+        _write_queue = asyncio.Queue()
+        _writer_task = asyncio.create_task(_group_writer(), name="db_group_writer")
+    fut = asyncio.get_running_loop().create_future()
+    _write_queue.put_nowait((fn, args, kwargs, fut))
+    return await fut
+
+
+def _grouped(fn: Callable[..., T]) -> Callable[..., "asyncio.Future[T]"]:
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        return await submit_write(fn, *args, **kwargs)
+    return wrapper
+
+
+def get_group_commit_stats() -> Dict[str, Any]:
+    st = dict(_group_stats)
+    st["avg_batch"] = round(st["items"] / st["batches"], 2) if st["batches"] else 0
+    st["queue_depth"] = _write_queue.qsize() if _write_queue is not None else 0
+    return st
+
+
+async def flush_writes() -> None:
+    """Tunggu semua penulisan di antrian selesai lalu hentikan writer (dipanggil saat shutdown)."""
+    global _writer_task
+    if _write_queue is not None and _writer_task is not None and not _writer_task.done():
+        await _write_queue.join()
+        _writer_task.cancel()
+        try:
+            await _writer_task
+        except asyncio.CancelledError:
+            pass
+    _writer_task = None
+
+
+def shutdown() -> None:
+    """Hentikan thread DB (dipanggil saat bot shutdown)."""
+    _executor.shutdown(wait=True)
+
+
+# data.database
+add_user = _async(_db.add_user)
+delete_user = _async(_db.delete_user)
+user_exists = _async(_db.user_exists)
+get_user = _async(_db.get_user)
+update_user_username = _async(_db.update_user_username)
+update_user_role = _async(_db.update_user_role)
+update_user_status = _async(_db.update_user_status)
+get_active_user_ids = _async(_db.get_active_user_ids)
+get_users_page = _async(_db.get_users_page)
+get_users_keyset = _async(_db.get_users_keyset)
+get_user_transaction_stats = _async(_db.get_user_transaction_stats)
+get_users_transaction_stats = _async(_db.get_users_transaction_stats)
+get_all_kategori = _async(_db.get_all_kategori)
+get_produk_by_kategori = _async(_db.get_produk_by_kategori)
+get_produk_harga_by_kategori = _async(_db.get_produk_harga_by_kategori)
+get_kategori_by_produk_id = _async(_db.get_kategori_by_produk_id)
+get_produk_detail = _async(_db.get_produk_detail)
+update_produk_by_id = _async(_db.update_produk_by_id)
+delete_produk = _async(_db.delete_produk)
+update_user_saldo = _grouped(_db.update_user_saldo)
+debit_user_saldo = _async(_db.debit_user_saldo)
+adjust_user_saldo = _async(_db.adjust_user_saldo)
+get_mutasi_saldo = _async(_db.get_mutasi_saldo)
+snapshot_saldo = _async(_db.snapshot_saldo)
+audit_saldo = _async(_db.audit_saldo)
+
+# models.produk_xl
+insert_or_update_produk = _async(_produk.insert_or_update_produk)
+get_produk_xl_by_kategori = _async(_produk.get_produk_by_kategori)
+
+# models.riwayat_transaksi
+insert_riwayat = _grouped(_riwayat.insert_riwayat)
+get_riwayat_by_user = _async(_riwayat.get_riwayat_by_user)
+get_riwayat_page = _async(_riwayat.get_riwayat_page)
+get_riwayat_by_trx_id = _async(_riwayat.get_riwayat_by_trx_id)
+
+# models.transaksi_terjadwal
+create_transaksi = _async(_terjadwal.create_transaksi)
+get_transaksi_by_id = _async(_terjadwal.get_transaksi_by_id)
+get_transaksi_by_user = _async(_terjadwal.get_transaksi_by_user)
+list_pending = _async(_terjadwal.list_pending)
+list_pending_due = _async(_terjadwal.list_pending_due)
+list_pending_by_ids = _async(_terjadwal.list_pending_by_ids)
+claim_pending_by_ids = _async(_terjadwal.claim_pending_by_ids)
+reap_expired_leases = _async(_terjadwal.reap_expired_leases)
+release_claim = _async(_terjadwal.release_claim)
+mark_settlement_sent = _async(_terjadwal.mark_settlement_sent)
+renew_lease = _async(_terjadwal.renew_lease)
+update_status = _grouped(_terjadwal.update_status)
+finish_claim = _grouped(_terjadwal.finish_claim)
+delete_transaksi = _async(_terjadwal.delete_transaksi)
+
+# models.seting_bot
+set_bot_status = _async(_seting.set_bot_status)
+get_latest_bot_status = _async(_seting.get_latest_bot_status)
+get_latest_bot_status_full = _async(_seting.get_latest_bot_status_full)
+set_cara_pembelian = _async(_seting.set_cara_pembelian)
+get_latest_cara_pembelian = _async(_seting.get_latest_cara_pembelian)
+set_cara_deposit = _async(_seting.set_cara_deposit)
+get_latest_cara_deposit = _async(_seting.get_latest_cara_deposit)
@@ -0,0 +1,139 @@
+"""
+Cache katalog produk (tabel produk_xl) di memori untuk handler browsing.
+
+Seluruh katalog dimuat sekali dengan satu query menjadi snapshot immutable: daftar
+kategori, produk per kategori, dan detail per id. Setiap penulisan ke produk_xl
+(sync katalog, edit/hapus admin) memanggil bump_version(); snapshot yang versinya
+tertinggal dimuat ulang pada akses berikutnya. Selama versi tidak berubah, semua
+lookup murni dari memori tanpa menyentuh SQLite.
+
+Fungsi async di sini punya nama & bentuk return yang sama dengan versi di
+data.async_database, jadi handler cukup mengganti import.
+
+Catatan: snapshot dibagi ke semua pemanggil, jangan ubah list/dict yang dikembalikan
+(kecuali get_produk_detail yang mengembalikan salinan).
+"""
+from __future__ import annotations
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from data.connection import get_connection
+
+logger = logging.getLogger(__name__)
+
+_version_lock = threading.Lock()
+_version = 0
+
+_snapshot: Optional[Dict[str, Any]] = None
+_load_lock: Optional[asyncio.Lock] = None
+
+
+def bump_version() -> int:
+    """Tandai katalog berubah (aman dipanggil dari thread mana pun). Return versi baru."""
+    global _version
+    with _version_lock:
+        _version += 1
+        return _version
+
+
+def get_version() -> int:
+    return _version
+
+
+def invalidate() -> None:
+    """Paksa muat ulang pada akses berikutnya (mis. setelah DB diubah dari luar proses)."""
+    bump_version()
+
+
+def _load_snapshot(version: int) -> Dict[str, Any]:
+    """Baca seluruh produk_xl (dijalankan di thread DB)."""
+    c = get_connection().execute(
+        "SELECT id, nama_produk, kategori, produk_kode, harga, harga_jual, total_amount, deskripsi, status "
+        "FROM produk_xl"
+    )
+    detail: Dict[str, Dict[str, Any]] = {}
+    by_kategori: Dict[Any, List[Dict[str, Any]]] = {}
+    for row in c.fetchall():
+        produk = {
+            "id": row[0],
+            "nama_produk": row[1],
+            "kategori": row[2],
+            "produk_kode": row[3],
+            "harga": row[4],
+            "harga_jual": row[5],
+            "total_amount": row[6],
+            "deskripsi": row[7],
+            "status": row[8],
+        }
+        detail[str(row[0])] = produk
+        by_kategori.setdefault(row[2], []).append(produk)
+
+    def _key(v: Any) -> Tuple[int, Any]:
+        # NULL paling depan seperti ORDER BY di SQLite
+        return (0, "") if v is None else (1, v)
+
+    produk_by_kategori: Dict[Any, List[Tuple[Any, Any]]] = {}
+    harga_by_kategori: Dict[Any, List[Tuple[Any, Any, Any]]] = {}
+    for kategori, items in by_kategori.items():
+        produk_by_kategori[kategori] = [
+            (p["id"], p["nama_produk"]) for p in sorted(items, key=lambda p: _key(p["nama_produk"]))
+        ]
+        harga_by_kategori[kategori] = [
+            (p["id"], p["nama_produk"], p["harga_jual"]) for p in sorted(items, key=lambda p: _key(p["id"]))
+        ]
+    return {
+        "version": version,
+        "kategori": sorted(by_kategori.keys(), key=_key),
+        "produk_by_kategori": produk_by_kategori,
+        "harga_by_kategori": harga_by_kategori,
+        "detail": detail,
+    }
+
+
+async def get_catalog() -> Dict[str, Any]:
+    """Snapshot katalog terbaru; dimuat ulang (sekali, walau banyak pemanggil) jika versi berubah."""
+    global _snapshot, _load_lock
+    snap = _snapshot
+    if snap is not None and snap["version"] == _version:
+        return snap
+    if _load_lock is None:
+        _load_lock = asyncio.Lock()
+    async with _load_lock:
+        snap = _snapshot
+        version = _version
+        if snap is not None and snap["version"] == version:
+            return snap
+        # import di sini: data.database mengimpor modul ini untuk bump_version()
+        from data.async_database import run_db
+        snap = await run_db(_load_snapshot, version)
+        _snapshot = snap
+        logger.info("Katalog produk dimuat ke cache (versi %s, %s produk)", version, len(snap["detail"]))
+        return snap
+
+
+async def get_all_kategori() -> List[Any]:
+    return (await get_catalog())["kategori"]
+
+
+async def get_produk_by_kategori(kategori: Any) -> List[Tuple[Any, Any]]:
+    """List (id, nama_produk) urut nama_produk."""
+    return (await get_catalog())["produk_by_kategori"].get(kategori, [])
+
+
+async def get_produk_harga_by_kategori(kategori: Any) -> List[Tuple[Any, Any, Any]]:
+    """List (id, nama_produk, harga_jual) urut id."""
+    return (await get_catalog())["harga_by_kategori"].get(kategori, [])
+
+
+async def get_kategori_by_produk_id(produk_id: Any) -> Optional[Any]:
+    produk = (await get_catalog())["detail"].get(str(produk_id))
+    return produk["kategori"] if produk else None
+
+
+async def get_produk_detail(produk_id: Any) -> Optional[Dict[str, Any]]:
+    if not produk_id:
+        return None
+    produk = (await get_catalog())["detail"].get(str(produk_id))
+    return dict(produk) if produk else None
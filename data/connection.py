@@ -0,0 +1,112 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List
+
+DB_PATH = os.path.join(os.path.dirname(__file__), "database.db")
+
+# Tuning koneksi SQLite (berlaku untuk semua koneksi yang dibuat modul ini)
+BUSY_TIMEOUT_MS = 5000
+MMAP_SIZE = 64 * 1024 * 1024
+CACHED_STATEMENTS = 256
+
+_local = threading.local()
+_all_connections: List[sqlite3.Connection] = []
+_all_lock = threading.Lock()
+
+
+def _ensure_data_dir() -> None:
+    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+
+
+def _open_connection() -> sqlite3.Connection:
+    _ensure_data_dir()
+    conn = sqlite3.connect(
+        DB_PATH,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        cached_statements=CACHED_STATEMENTS,
+        # koneksi hanya dipakai oleh thread pembuatnya; flag ini agar close_all_connections()
+        # bisa menutupnya dari thread lain saat shutdown
+        check_same_thread=False,
+    )
+    c = conn.cursor()
+    # WAL: pembaca tidak diblok oleh penulis (mode ini persisten di file database)
+    c.execute("PRAGMA journal_mode=WAL")
+    c.execute("PRAGMA synchronous=NORMAL")
+    c.execute(f"PRAGMA busy_timeout={int(BUSY_TIMEOUT_MS)}")
+    c.execute(f"PRAGMA mmap_size={int(MMAP_SIZE)}")
+    c.close()
+    return conn
+
+
+def get_connection() -> sqlite3.Connection:
+    """
+    Ambil koneksi SQLite milik thread saat ini.
+
+    Koneksi dibuka sekali per thread lalu dipakai ulang (jangan di-close oleh pemanggil),
+    sehingga prepared statement cache dan mmap tetap hangat di antara query.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = _open_connection()
+        _local.conn = conn
+        with _all_lock:
+            _all_connections.append(conn)
+    return conn
+
+
+@contextmanager
+def transaction() -> Iterator[sqlite3.Cursor]:
+    """
+    Jalankan beberapa statement dalam satu transaksi: commit jika sukses, rollback jika error.
+
+        with transaction() as c:
+            c.execute("UPDATE ...")
+
+    Jika dipanggil di dalam transaction() lain di thread yang sama (mis. batch group
+    commit di data.async_database), blok ini menjadi SAVEPOINT: error hanya me-rollback
+    blok ini, dan commit dilakukan oleh transaksi terluar. Transaksi terluar sebaiknya
+    membuka transaksi eksplisit (BEGIN) sebelum memanggil blok bersarang.
+    """
+    conn = get_connection()
+    depth = getattr(_local, "tx_depth", 0)
+    c = conn.cursor()
+    if depth:
+        name = f"sp_{depth}"
+        c.execute(f"SAVEPOINT {name}")
+        _local.tx_depth = depth + 1
+        try:
+            yield c
+            c.execute(f"RELEASE {name}")
+        except BaseException:
+            c.execute(f"ROLLBACK TO {name}")
+            c.execute(f"RELEASE {name}")
+            raise
+        finally:
+            _local.tx_depth = depth
+            c.close()
+        return
+    _local.tx_depth = 1
+    try:
+        yield c
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        _local.tx_depth = 0
+        c.close()
+
+
+def close_all_connections() -> None:
+    """Tutup semua koneksi yang pernah dibuka (dipanggil saat shutdown)."""
+    with _all_lock:
+        conns = list(_all_connections)
+        _all_connections.clear()
+    for conn in conns:
+        try:
+            conn.close()
+        except Exception:
+            pass
+    _local.__dict__.pop("conn", None)
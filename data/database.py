@@ -1,45 +1,57 @@
-import sqlite3
 from datetime import datetime
-import os
 import pytz
 
-DB_PATH = os.path.join(os.path.dirname(__file__), "database.db")
-
-def add_user(userid, username, role="user"):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    # Cek apakah user sudah ada
-    c.execute("SELECT 1 FROM users WHERE userid = ?", (userid,))
-    if c.fetchone() is None:
-        # Ambil waktu Asia/Jakarta
-        tz = pytz.timezone("Asia/Jakarta")
-        tanggal_daftar = datetime.now(tz).strftime("%Y-%m-%d %H:%M:%S")
+from . import catalog_cache, user_cache
+from .connection import get_connection, transaction
+
+def add_user(userid, username, role="user", tanggal_daftar=None):
+    """Tambah user baru. Return True jika user baru dibuat, False jika sudah ada."""
+    with transaction() as c:
+        # Cek apakah user sudah ada
+        c.execute("SELECT 1 FROM users WHERE userid = ?", (userid,))
+        if c.fetchone() is not None:
+            return False
+        if tanggal_daftar is None:
+            # Ambil waktu Asia/Jakarta
+            tz = pytz.timezone("Asia/Jakarta")
+            tanggal_daftar = datetime.now(tz).strftime("%Y-%m-%d %H:%M:%S")
         c.execute(
             "INSERT INTO users (userid, username, role, tanggal_daftar) VALUES (?, ?, ?, ?)",
             (userid, username, role, tanggal_daftar)
         )
-        conn.commit()
-    conn.close()
+    user_cache.discard(userid)
+    return True
+
+def delete_user(userid):
+    with transaction() as c:
+        c.execute("DELETE FROM users WHERE userid = ? RETURNING saldo", (userid,))
+        row = c.fetchone()
+        changed = row is not None
+        # ledger append-only: saldo yang hilang bersama user ditutup dengan entri -saldo,
+        # sehingga snapshot + ledger tetap cocok jika userid yang sama mendaftar lagi
+        if row and row[0]:
+            _append_ledger(c, userid, -row[0], 0, "hapus_user")
+    user_cache.discard(userid)
+    return changed
 
 def user_exists(userid):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT 1 FROM users WHERE userid = ?", (userid,))
-    result = c.fetchone() is not None
-    conn.close()
-    return result
-
-# Tambahkan fungsi ini di data/database.py
+    if user_cache.get(userid) is not None:
+        return True
+    c = get_connection().execute("SELECT 1 FROM users WHERE userid = ?", (userid,))
+    return c.fetchone() is not None
+
 def get_user(userid):
-    import sqlite3
-    from .database import DB_PATH
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT userid, username, saldo, role, tanggal_daftar, status FROM users WHERE userid = ?", (userid,))
+    # data.user_cache: write-through dari fungsi penulis users di modul ini
+    user = user_cache.get(userid)
+    if user is not None:
+        return user
+    c = get_connection().execute(
+        "SELECT userid, username, saldo, role, tanggal_daftar, status FROM users WHERE userid = ?",
+        (userid,)
+    )
     row = c.fetchone()
-    conn.close()
     if row:
-        return {
+        user = {
             "userid": row[0],
             "username": row[1],
             "saldo": row[2],
@@ -47,35 +59,210 @@ def get_user(userid):
             "tanggal_daftar": row[4],
             "status": row[5]
         }
+        user_cache.put(user)
+        return user
     return None
 
+def update_user_username(userid, username):
+    with transaction() as c:
+        c.execute("UPDATE users SET username = ? WHERE userid = ?", (username, userid))
+        changed = c.rowcount > 0
+    if changed:
+        user_cache.update(userid, username=username)
+    return changed
+
+def update_user_role(userid, role):
+    with transaction() as c:
+        c.execute("UPDATE users SET role = ? WHERE userid = ?", (role, userid))
+        changed = c.rowcount > 0
+    if changed:
+        user_cache.update(userid, role=role)
+    return changed
+
+def update_user_status(userid, status):
+    with transaction() as c:
+        c.execute("UPDATE users SET status = ? WHERE userid = ?", (status, userid))
+        changed = c.rowcount > 0
+    if changed:
+        user_cache.update(userid, status=status)
+    return changed
+
+def get_active_user_ids():
+    c = get_connection().execute("SELECT userid FROM users WHERE status='active'")
+    return [row[0] for row in c.fetchall()]
+
+def get_users_page(page=1, per_page=5):
+    """
+    Return (users_list, total_count). Users ordered by tanggal_daftar DESC.
+    Each user dict: userid, username, saldo, role, tanggal_daftar, status
+    """
+    conn = get_connection()
+    row = conn.execute("SELECT COUNT(1) FROM users").fetchone()
+    total = int(row[0]) if row else 0
+    offset = (page - 1) * per_page
+    c = conn.execute(
+        "SELECT userid, username, saldo, role, tanggal_daftar, status "
+        "FROM users ORDER BY tanggal_daftar DESC LIMIT ? OFFSET ?",
+        (per_page, offset),
+    )
+    users = [
+        {
+            "userid": r[0],
+            "username": r[1],
+            "saldo": r[2],
+            "role": r[3],
+            "tanggal_daftar": r[4],
+            "status": r[5],
+        }
+        for r in c.fetchall()
+    ]
+    return users, total
+
+def get_users_keyset(per_page=5, cursor=None, direction="next"):
+    """
+    Pagination keyset daftar user (urut tanggal_daftar DESC, userid DESC) tanpa OFFSET/COUNT.
+    cursor: tuple (tanggal_daftar, userid) baris batas dari halaman sebelumnya, dengan
+    tanggal_daftar NULL sebagai ''; direction "next" = halaman sesudah cursor, "prev" =
+    halaman sebelum cursor. Tanpa cursor = halaman pertama.
+    Return (users, prev_cursor, next_cursor); cursor None berarti tidak ada halaman itu.
+    """
+    # COALESCE: baris dengan tanggal_daftar NULL tetap ikut urutan dan perbandingan cursor
+    # (sama persis dengan ekspresi index idx_users_tanggal_key_userid)
+    key = "COALESCE(tanggal_daftar, '')"
+    cols = f"SELECT userid, username, saldo, role, tanggal_daftar, status, {key} FROM users"
+    conn = get_connection()
+    if cursor is None:
+        rows = conn.execute(
+            f"{cols} ORDER BY {key} DESC, userid DESC LIMIT ?", (per_page + 1,)
+        ).fetchall()
+        has_prev, has_next = False, len(rows) > per_page
+        rows = rows[:per_page]
+    elif direction == "prev":
+        rows = conn.execute(
+            f"{cols} WHERE ({key}, userid) > (?, ?) ORDER BY {key} ASC, userid ASC LIMIT ?",
+            (cursor[0], cursor[1], per_page + 1),
+        ).fetchall()
+        has_prev, has_next = len(rows) > per_page, True
+        rows = list(reversed(rows[:per_page]))
+    else:
+        rows = conn.execute(
+            f"{cols} WHERE ({key}, userid) < (?, ?) ORDER BY {key} DESC, userid DESC LIMIT ?",
+            (cursor[0], cursor[1], per_page + 1),
+        ).fetchall()
+        has_prev, has_next = True, len(rows) > per_page
+        rows = rows[:per_page]
+    users = [
+        {
+            "userid": r[0],
+            "username": r[1],
+            "saldo": r[2],
+            "role": r[3],
+            "tanggal_daftar": r[4],
+            "status": r[5],
+        }
+        for r in rows
+    ]
+    if not rows:
+        return users, None, None
+    return (
+        users,
+        (rows[0][6], rows[0][0]) if has_prev else None,
+        (rows[-1][6], rows[-1][0]) if has_next else None,
+    )
+
+def get_users_transaction_stats(userids):
+    """
+    Statistik transaksi untuk banyak user sekaligus (mis. satu halaman daftar user),
+    dengan satu query GROUP BY per tabel:
+      - total, sukses, gagal, total_amount (dari riwayat_transaksi)
+      - pending (dari transaksi_terjadwal dengan status='pending')
+    Return {userid: {"total", "sukses", "gagal", "pending", "total_amount"}}; user tanpa
+    transaksi tetap ada dengan nilai 0.
+    """
+    userids = list(dict.fromkeys(userids))
+    stats = {uid: {"total": 0, "sukses": 0, "gagal": 0, "pending": 0, "total_amount": 0} for uid in userids}
+    if not userids:
+        return stats
+    # riwayat_transaksi.user_id disimpan sebagai TEXT
+    by_text = {str(uid): uid for uid in userids}
+    placeholders = ",".join("?" for _ in userids)
+    conn = get_connection()
+    rows = conn.execute(
+        f"""
+        SELECT user_id,
+               COUNT(1),
+               SUM(CASE WHEN lower(status) IN ('sukses','success') THEN 1 ELSE 0 END),
+               SUM(CASE WHEN lower(status) IN ('gagal','failed','failure','fail') THEN 1 ELSE 0 END),
+               COALESCE(SUM(amount_charged), 0)
+        FROM riwayat_transaksi
+        WHERE user_id IN ({placeholders})
+        GROUP BY user_id
+        """,
+        list(by_text.keys()),
+    ).fetchall()
+    for user_id, total, sukses, gagal, total_amount in rows:
+        st = stats[by_text[user_id]]
+        st["total"] = int(total or 0)
+        st["sukses"] = int(sukses or 0)
+        st["gagal"] = int(gagal or 0)
+        st["total_amount"] = int(total_amount or 0)
+    rows = conn.execute(
+        f"""
+        SELECT userid, COUNT(1) FROM transaksi_terjadwal
+        WHERE status = 'pending' AND userid IN ({placeholders})
+        GROUP BY userid
+        """,
+        userids,
+    ).fetchall()
+    by_int = {}
+    for uid in userids:
+        try:
+            by_int[int(uid)] = uid
+        except (TypeError, ValueError):
+            pass
+    for userid, pending in rows:
+        uid = by_int.get(userid)
+        if uid is not None:
+            stats[uid]["pending"] = int(pending or 0)
+    return stats
+
+def get_user_transaction_stats(userid):
+    """
+    Statistik transaksi per user:
+      - total, sukses, gagal, total_amount (dari riwayat_transaksi)
+      - pending (dari transaksi_terjadwal dengan status='pending')
+    """
+    return get_users_transaction_stats([userid])[userid]
+
 def get_all_kategori():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT DISTINCT kategori FROM produk_xl ORDER BY kategori")
-    result = [row[0] for row in c.fetchall()]
-    conn.close()
-    return result
+    c = get_connection().execute("SELECT DISTINCT kategori FROM produk_xl ORDER BY kategori")
+    return [row[0] for row in c.fetchall()]
 
 def get_produk_by_kategori(kategori):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT id, nama_produk FROM produk_xl WHERE kategori = ? ORDER BY nama_produk", (kategori,))
-    result = c.fetchall()
-    conn.close()
-    return result
+    c = get_connection().execute(
+        "SELECT id, nama_produk FROM produk_xl WHERE kategori = ? ORDER BY nama_produk", (kategori,)
+    )
+    return c.fetchall()
+
+def get_produk_harga_by_kategori(kategori):
+    c = get_connection().execute(
+        "SELECT id, nama_produk, harga_jual FROM produk_xl WHERE kategori = ? ORDER BY id", (kategori,)
+    )
+    return c.fetchall()
+
+def get_kategori_by_produk_id(produk_id):
+    c = get_connection().execute("SELECT kategori FROM produk_xl WHERE id = ?", (produk_id,))
+    row = c.fetchone()
+    return row[0] if row else None
 
 def get_produk_detail(produk_id):
     if not produk_id:
         return None
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
+    c = get_connection().execute("""
         SELECT id, nama_produk, kategori, produk_kode, harga, harga_jual, total_amount, deskripsi, status
         FROM produk_xl WHERE id = ?
     """, (produk_id,))
     row = c.fetchone()
-    conn.close()
     if row:
         return {
             "id": row[0],
@@ -90,11 +277,169 @@ def get_produk_detail(produk_id):
         }
     return None
 
-def update_user_saldo(userid, nominal):
-    import sqlite3
-    from .database import DB_PATH
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("UPDATE users SET saldo = saldo + ? WHERE userid = ?", (nominal, userid))
-    conn.commit()
-    conn.close()
\ No newline at end of file
+def update_produk_by_id(produk_id, nama_produk, kategori, harga_jual, deskripsi, status):
+    with transaction() as c:
+        c.execute(
+            """
+            UPDATE produk_xl SET
+                nama_produk = ?,
+                kategori = ?,
+                harga_jual = ?,
+                deskripsi = ?,
+                status = ?
+            WHERE id = ?
+            """,
+            (nama_produk, kategori, harga_jual, deskripsi, status, produk_id),
+        )
+        changed = c.rowcount > 0
+    if changed:
+        catalog_cache.bump_version()
+    return changed
+
+def delete_produk(produk_id):
+    with transaction() as c:
+        c.execute("DELETE FROM produk_xl WHERE id = ?", (produk_id,))
+        changed = c.rowcount > 0
+    if changed:
+        catalog_cache.bump_version()
+    return changed
+
+def _append_ledger(c, userid, delta, saldo_after, reason=None, ref_trx_id=None):
+    """Catat perubahan saldo ke saldo_ledger (di transaksi yang sama dengan UPDATE users)."""
+    c.execute(
+        "INSERT INTO saldo_ledger (userid, delta, saldo_after, reason, ref_trx_id) VALUES (?, ?, ?, ?, ?)",
+        (userid, delta, saldo_after, reason, None if ref_trx_id is None else str(ref_trx_id)),
+    )
+
+def update_user_saldo(userid, nominal, reason=None, ref_trx_id=None):
+    """Tambah saldo sebesar nominal (boleh negatif) dan catat di saldo_ledger."""
+    with transaction() as c:
+        c.execute("UPDATE users SET saldo = saldo + ? WHERE userid = ? RETURNING saldo", (nominal, userid))
+        row = c.fetchone()
+        if row:
+            _append_ledger(c, userid, nominal, row[0], reason, ref_trx_id)
+    if row:
+        user_cache.update(userid, saldo=row[0])
+    else:
+        user_cache.discard(userid)
+
+def debit_user_saldo(userid, amount, reason=None, ref_trx_id=None):
+    """
+    Potong saldo secara atomik hanya jika saldo >= amount (satu statement, tidak bisa
+    minus walau ada pembelian bersamaan).
+    Return (True, saldo_baru) jika berhasil, (False, saldo_sekarang) jika saldo tidak
+    cukup, atau (False, None) jika user tidak ada.
+    """
+    amount = int(amount)
+    with transaction() as c:
+        c.execute(
+            "UPDATE users SET saldo = saldo - ? WHERE userid = ? AND saldo >= ? RETURNING saldo",
+            (amount, userid, amount),
+        )
+        row = c.fetchone()
+        if row is None:
+            c.execute("SELECT saldo FROM users WHERE userid = ?", (userid,))
+            cur = c.fetchone()
+        elif amount:
+            _append_ledger(c, userid, -amount, row[0], reason, ref_trx_id)
+    if row is not None:
+        user_cache.update(userid, saldo=row[0])
+        return True, row[0]
+    if cur is None:
+        user_cache.discard(userid)
+        return False, None
+    user_cache.update(userid, saldo=cur[0])
+    return False, cur[0]
+
+def adjust_user_saldo(userid, delta, reason="admin", ref_trx_id=None):
+    """
+    Tambah/kurangi saldo user (saldo tidak boleh di bawah 0) dalam satu transaksi.
+    Return dict {username, old_saldo, new_saldo} atau None jika user tidak ada.
+    """
+    with transaction() as c:
+        # baca saldo lewat UPDATE (bukan SELECT) agar lock tulis langsung dipegang transaksi
+        # ini: debit bersamaan dari proses/thread lain tidak bisa menyelip di antara baca & tulis
+        c.execute("UPDATE users SET saldo = saldo WHERE userid = ? RETURNING saldo, username", (userid,))
+        row = c.fetchone()
+        if not row:
+            return None
+        old_saldo = row[0] or 0
+        new_saldo = max(0, old_saldo + delta)
+        c.execute("UPDATE users SET saldo = ? WHERE userid = ?", (new_saldo, userid))
+        if new_saldo != old_saldo:
+            _append_ledger(c, userid, new_saldo - old_saldo, new_saldo, reason, ref_trx_id)
+    user_cache.update(userid, saldo=new_saldo)
+    return {"username": row[1], "old_saldo": old_saldo, "new_saldo": new_saldo}
+
+def get_mutasi_saldo(userid, limit=20, before_id=None):
+    """
+    Mutasi saldo user terbaru dulu (range read di index saldo_ledger(userid, id)).
+    before_id: ambil entri dengan id < before_id (halaman berikutnya).
+    Return list dict {id, delta, saldo_after, reason, ref_trx_id, created_at}.
+    """
+    q = "SELECT id, delta, saldo_after, reason, ref_trx_id, created_at FROM saldo_ledger WHERE userid = ?"
+    params = [userid]
+    if before_id is not None:
+        q += " AND id < ?"
+        params.append(before_id)
+    q += " ORDER BY id DESC LIMIT ?"
+    params.append(limit)
+    c = get_connection().execute(q, params)
+    return [
+        {
+            "id": r[0],
+            "delta": r[1],
+            "saldo_after": r[2],
+            "reason": r[3],
+            "ref_trx_id": r[4],
+            "created_at": r[5],
+        }
+        for r in c.fetchall()
+    ]
+
+def snapshot_saldo():
+    """
+    Tulis snapshot saldo (saldo_after entri ledger terakhir) untuk setiap user yang punya
+    mutasi sejak snapshot terakhirnya. Return jumlah snapshot yang ditulis.
+    """
+    with transaction() as c:
+        c.execute("""
+            INSERT INTO saldo_snapshot (userid, saldo, ledger_id)
+            SELECT l.userid, l.saldo_after, l.id
+            FROM saldo_ledger l
+            WHERE l.id IN (SELECT MAX(id) FROM saldo_ledger GROUP BY userid)
+              AND l.id > COALESCE((SELECT MAX(s.ledger_id) FROM saldo_snapshot s WHERE s.userid = l.userid), 0)
+        """)
+        written = c.rowcount
+    return written
+
+def audit_saldo(userid):
+    """
+    Bandingkan users.saldo dengan snapshot terakhir + jumlah delta ledger sesudahnya.
+    Return {userid, saldo, expected, snapshot_saldo, snapshot_ledger_id, entries, ok}
+    atau None jika user tidak ada.
+    """
+    conn = get_connection()
+    user = conn.execute("SELECT saldo FROM users WHERE userid = ?", (userid,)).fetchone()
+    if not user:
+        return None
+    snap = conn.execute(
+        "SELECT saldo, ledger_id FROM saldo_snapshot WHERE userid = ? ORDER BY ledger_id DESC, id DESC LIMIT 1",
+        (userid,),
+    ).fetchone()
+    snap_saldo, snap_ledger_id = (snap[0], snap[1]) if snap else (0, 0)
+    r = conn.execute(
+        "SELECT COUNT(1), COALESCE(SUM(delta), 0) FROM saldo_ledger WHERE userid = ? AND id > ?",
+        (userid, snap_ledger_id),
+    ).fetchone()
+    expected = snap_saldo + int(r[1])
+    saldo = user[0] or 0
+    return {
+        "userid": userid,
+        "saldo": saldo,
+        "expected": expected,
+        "snapshot_saldo": snap_saldo,
+        "snapshot_ledger_id": snap_ledger_id,
+        "entries": int(r[0]),
+        "ok": saldo == expected,
+    }
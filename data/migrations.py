@@ -0,0 +1,264 @@
+"""
+Migrasi skema SQLite berversi.
+
+Versi skema disimpan di PRAGMA user_version. run_migrations() dipanggil sekali saat
+startup (bot.py); setiap migrasi yang versinya > user_version dijalankan berurutan,
+masing-masing dalam satu transaksi BEGIN IMMEDIATE bersama update user_version, sehingga
+aman jika beberapa proses start bersamaan.
+
+Menambah perubahan skema: tambahkan fungsi _mNNNN_* baru dan daftarkan di MIGRATIONS
+dengan nomor versi berikutnya. Jangan ubah migrasi yang sudah dirilis.
+"""
+from __future__ import annotations
+import logging
+import sqlite3
+import threading
+from typing import Callable, List, Tuple
+
+from data.connection import get_connection, transaction
+
+logger = logging.getLogger(__name__)
+
+
+def _columns(c: sqlite3.Cursor, table: str) -> List[str]:
+    c.execute(f"PRAGMA table_info({table})")
+    return [r[1] for r in c.fetchall()]
+
+
+def _add_column_if_missing(c: sqlite3.Cursor, table: str, column: str, decl: str) -> bool:
+    if column in _columns(c, table):
+        return False
+    c.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+    return True
+
+
+def _m0001_base_tables(c: sqlite3.Cursor) -> None:
+    # Tabel yang sebelumnya dibuat oleh init_db() masing-masing model
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            userid INTEGER PRIMARY KEY,
+            username TEXT,
+            saldo INTEGER DEFAULT 0,
+            role TEXT DEFAULT 'user',
+            tanggal_daftar TEXT,
+            status TEXT DEFAULT 'active'
+        )
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS riwayat_transaksi (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT,
+            msisdn TEXT,
+            produk_id TEXT,
+            produk_nama TEXT,
+            kategori TEXT,
+            harga_jual INTEGER,
+            metode_pembayaran TEXT,
+            amount_charged INTEGER,
+            saldo_tersisa REAL,
+            trx_id TEXT,
+            status TEXT,
+            waktu TEXT DEFAULT CURRENT_TIMESTAMP,
+            keterangan TEXT
+        )
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS produk_xl (
+            id TEXT PRIMARY KEY,
+            nama_produk TEXT,
+            kategori TEXT,
+            produk_kode TEXT,
+            harga INTEGER,
+            harga_jual INTEGER,
+            total_amount INTEGER,
+            deskripsi TEXT,
+            status TEXT
+        )
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS bot_status (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            status TEXT NOT NULL CHECK(status IN ('open', 'close', 'maintenance')),
+            private_public TEXT NOT NULL DEFAULT 'public' CHECK(private_public IN ('private', 'public')),
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS cara_pembelian (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            content TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS cara_deposit (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            content TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS transaksi_terjadwal (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            userid INTEGER NOT NULL,
+            produk_id TEXT,
+            produk_nama TEXT,
+            kategori TEXT,
+            harga_jual INTEGER,
+            metode_pembayaran TEXT,
+            msisdn TEXT,
+            waktu_pembelian TEXT,
+            status TEXT DEFAULT 'pending',
+            created_at TEXT DEFAULT (datetime('now'))
+        )
+    """)
+    # DB lama mungkin belum punya kolom msisdn
+    _add_column_if_missing(c, "transaksi_terjadwal", "msisdn", "TEXT")
+
+
+def _m0002_transaksi_terjadwal_lease(c: sqlite3.Cursor) -> None:
+    # claimed_by: id worker yang sedang mengeksekusi (status 'processing')
+    # lease_expires_at: epoch detik; lewat dari ini lease dianggap mati dan di-reap
+    _add_column_if_missing(c, "transaksi_terjadwal", "claimed_by", "TEXT")
+    _add_column_if_missing(c, "transaksi_terjadwal", "lease_expires_at", "REAL")
+
+
+def _m0003_transaksi_terjadwal_due_epoch(c: sqlite3.Cursor) -> None:
+    # waktu_pembelian (Asia/Jakarta, UTC+7) sebagai epoch detik untuk range-seek jatuh tempo
+    _add_column_if_missing(c, "transaksi_terjadwal", "due_at_epoch", "INTEGER")
+    c.execute(
+        "UPDATE transaksi_terjadwal SET due_at_epoch = CAST(strftime('%s', waktu_pembelian, '-7 hours') AS INTEGER) "
+        "WHERE due_at_epoch IS NULL AND waktu_pembelian IS NOT NULL"
+    )
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_transaksi_terjadwal_status_due "
+        "ON transaksi_terjadwal(status, due_at_epoch)"
+    )
+
+
+def _m0004_index_pack(c: sqlite3.Cursor) -> None:
+    c.execute("CREATE INDEX IF NOT EXISTS idx_riwayat_user_waktu ON riwayat_transaksi(user_id, waktu)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_riwayat_trx_id ON riwayat_transaksi(trx_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_transaksi_terjadwal_user_status ON transaksi_terjadwal(userid, status)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_produk_xl_kategori ON produk_xl(kategori)")
+
+
+def _m0005_produk_sync_state(c: sqlite3.Cursor) -> None:
+    # hash isi list produk per kategori (+ ETag/Last-Modified jika supplier mengirimnya),
+    # agar sync berikutnya bisa melewati kategori yang tidak berubah
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS produk_sync_state (
+            kategori TEXT PRIMARY KEY,
+            content_hash TEXT,
+            etag TEXT,
+            last_modified TEXT,
+            produk_count INTEGER DEFAULT 0,
+            updated_at TEXT
+        )
+    """)
+
+
+def _m0006_saldo_ledger(c: sqlite3.Cursor) -> None:
+    # setiap perubahan users.saldo dicatat append-only; users.saldo tetap jadi saldo materialized
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS saldo_ledger (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            userid INTEGER NOT NULL,
+            delta INTEGER NOT NULL,
+            saldo_after INTEGER,
+            reason TEXT,
+            ref_trx_id TEXT,
+            created_at TEXT DEFAULT (datetime('now'))
+        )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_saldo_ledger_user_id ON saldo_ledger(userid, id)")
+    # snapshot saldo per user: saldo setelah ledger id <= ledger_id
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS saldo_snapshot (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            userid INTEGER NOT NULL,
+            saldo INTEGER NOT NULL,
+            ledger_id INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT DEFAULT (datetime('now'))
+        )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_saldo_snapshot_user_ledger ON saldo_snapshot(userid, ledger_id)")
+    # saldo awal user yang sudah ada (sebelum ledger) jadi snapshot pembuka
+    c.execute(
+        "INSERT INTO saldo_snapshot (userid, saldo, ledger_id) "
+        "SELECT userid, COALESCE(saldo, 0), 0 FROM users"
+    )
+
+
+def _m0007_keyset_indexes(c: sqlite3.Cursor) -> None:
+    # index untuk pagination keyset (cursor) daftar user dan riwayat per user
+    c.execute("CREATE INDEX IF NOT EXISTS idx_users_tanggal_userid ON users(tanggal_daftar, userid)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_riwayat_user_id ON riwayat_transaksi(user_id, id)")
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_transaksi_terjadwal_user_due_id "
+        "ON transaksi_terjadwal(userid, due_at_epoch, id)"
+    )
+
+
+def _m0008_users_keyset_coalesce(c: sqlite3.Cursor) -> None:
+    # m0007 membuat index (tanggal_daftar, userid);
+    # keyset daftar user kini mengurutkan COALESCE(tanggal_daftar, '')
+    c.execute("DROP INDEX IF EXISTS idx_users_tanggal_userid")
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_users_tanggal_key_userid ON users(COALESCE(tanggal_daftar, ''), userid)"
+    )
+
+
+def _m0009_transaksi_terjadwal_settlement_sent(c: sqlite3.Cursor) -> None:
+    # ditulis (commit) tepat sebelum request settlement dikirim; baris 'processing' dengan
+    # penanda ini tidak boleh dikembalikan ke 'pending' oleh reaper (bisa tereksekusi ganda)
+    _add_column_if_missing(c, "transaksi_terjadwal", "settlement_sent_at", "REAL")
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Cursor], None]]] = [
+    (1, "base tables", _m0001_base_tables),
+    (2, "transaksi_terjadwal lease columns", _m0002_transaksi_terjadwal_lease),
+    (3, "transaksi_terjadwal due_at_epoch", _m0003_transaksi_terjadwal_due_epoch),
+    (4, "index pack", _m0004_index_pack),
+    (5, "produk_sync_state", _m0005_produk_sync_state),
+    (6, "saldo ledger + snapshot", _m0006_saldo_ledger),
+    (7, "keyset pagination indexes", _m0007_keyset_indexes),
+    (8, "users keyset index on COALESCE(tanggal_daftar)", _m0008_users_keyset_coalesce),
+    (9, "transaksi_terjadwal settlement_sent_at", _m0009_transaksi_terjadwal_settlement_sent),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+_lock = threading.Lock()
+_done = False
+
+
+def get_schema_version() -> int:
+    return get_connection().execute("PRAGMA user_version").fetchone()[0]
+
+
+def run_migrations() -> int:
+    """
+    Jalankan migrasi yang belum diterapkan. Hanya bekerja sekali per proses; pemanggilan
+    berikutnya langsung return. Return versi skema setelah migrasi.
+    """
+    global _done
+    if _done:
+        return SCHEMA_VERSION
+    with _lock:
+        if _done:
+            return SCHEMA_VERSION
+        for version, name, fn in MIGRATIONS:
+            if get_schema_version() >= version:
+                continue
+            with transaction() as c:
+                # kunci tulis dulu, lalu cek ulang: proses lain mungkin sudah menjalankannya
+                c.execute("BEGIN IMMEDIATE")
+                c.execute("PRAGMA user_version")
+                if c.fetchone()[0] >= version:
+                    continue
+                fn(c)
+                c.execute(f"PRAGMA user_version = {int(version)}")
+            logger.info("Applied DB migration %s (%s)", version, name)
+        _done = True
+    return SCHEMA_VERSION
@@ -0,0 +1,114 @@
+"""
+Cache record user (tabel users) per userid, dipakai oleh data.database.get_user.
+
+Write-through: semua fungsi penulis di data.database (add/delete user, update
+username/role/status, update/adjust saldo) memperbarui atau membuang entri di sini
+setelah transaksinya commit, sehingga get_user tidak perlu SELECT ulang selama
+penulisan lewat modul tersebut. Ukuran dibatasi (LRU); hit/miss bisa dilihat di stats().
+
+Write-through hanya berlaku di dalam satu proses. Karena beberapa proses bot/scheduler bisa
+berbagi DB yang sama, setiap entri juga kedaluwarsa setelah DEFAULT_TTL_SECONDS, sehingga
+perubahan saldo/role/status dari proses lain paling lama terlambat terlihat selama itu.
+
+Dict yang disimpan adalah salinan; get() juga mengembalikan salinan.
+"""
+from __future__ import annotations
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_MAX_SIZE = 2048
+DEFAULT_TTL_SECONDS = 5.0
+
+_lock = threading.Lock()
+# userid -> (expires_at monotonic, record user)
+_entries: "OrderedDict[int, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_max_size = DEFAULT_MAX_SIZE
+_ttl = DEFAULT_TTL_SECONDS
+_stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+
+def _key(userid: Any) -> Optional[int]:
+    try:
+        return int(userid)
+    except (TypeError, ValueError):
+        return None
+
+
+def get(userid: Any) -> Optional[Dict[str, Any]]:
+    """Salinan record user dari cache, atau None (miss) jika belum ada."""
+    key = _key(userid)
+    with _lock:
+        entry = _entries.get(key) if key is not None else None
+        if entry is not None and entry[0] <= time.monotonic():
+            del _entries[key]
+            _stats["expired"] += 1
+            entry = None
+        if entry is None:
+            _stats["misses"] += 1
+            return None
+        _entries.move_to_end(key)
+        _stats["hits"] += 1
+        return dict(entry[1])
+
+
+def put(user: Dict[str, Any]) -> None:
+    key = _key(user.get("userid"))
+    if key is None:
+        return
+    with _lock:
+        _entries[key] = (time.monotonic() + _ttl, dict(user))
+        _entries.move_to_end(key)
+        while len(_entries) > _max_size:
+            _entries.popitem(last=False)
+            _stats["evictions"] += 1
+
+
+def update(userid: Any, **fields: Any) -> None:
+    """Ubah field entri yang sudah ada (tidak membuat entri baru, TTL tidak diperpanjang)."""
+    key = _key(userid)
+    with _lock:
+        entry = _entries.get(key) if key is not None else None
+        if entry is not None:
+            entry[1].update(fields)
+
+
+def discard(userid: Any) -> None:
+    key = _key(userid)
+    with _lock:
+        _entries.pop(key, None)
+
+
+def clear() -> None:
+    with _lock:
+        _entries.clear()
+
+
+def set_max_size(max_size: int) -> None:
+    global _max_size
+    with _lock:
+        _max_size = max(1, int(max_size))
+        while len(_entries) > _max_size:
+            _entries.popitem(last=False)
+            _stats["evictions"] += 1
+
+
+def set_ttl(seconds: float) -> None:
+    """Ubah TTL untuk entri yang disimpan berikutnya (0 = praktis tanpa cache)."""
+    global _ttl
+    with _lock:
+        _ttl = max(0.0, float(seconds))
+
+
+def stats() -> Dict[str, Any]:
+    """{"hits", "misses", "evictions", "expired", "size", "max_size", "ttl", "hit_ratio"}."""
+    with _lock:
+        total = _stats["hits"] + _stats["misses"]
+        return {
+            **_stats,
+            "size": len(_entries),
+            "max_size": _max_size,
+            "ttl": _ttl,
+            "hit_ratio": (_stats["hits"] / total) if total else 0.0,
+        }
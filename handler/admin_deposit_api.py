@@ -1,8 +1,5 @@
-import os
-import json
 import logging
 import io
-import asyncio
 import re
 from html import escape
 from typing import Optional
@@ -17,7 +14,7 @@ from aiogram.types import (
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
 
-from api.deposit_api import create_deposit
+from api.client import supplier
 
 logger = logging.getLogger(__name__)
 router = Router()
@@ -26,22 +23,6 @@ router = Router()
 from button.start import get_admin_keyboard
 
 
-def _setup_path() -> str:
-    return os.path.join(os.path.dirname(os.path.dirname(__file__)), "core", "setup.json")
-
-
-def read_setup() -> dict:
-    try:
-        p = _setup_path()
-        if not os.path.exists(p):
-            return {}
-        with open(p, "r", encoding="utf-8") as f:
-            return json.load(f) or {}
-    except Exception:
-        logger.exception("Failed to read setup.json")
-        return {}
-
-
 class AdminDepositStates(StatesGroup):
     waiting_amount = State()
 
@@ -116,7 +97,7 @@ async def handle_deposit_amount(callback: CallbackQuery, state: FSMContext):
     await callback.message.edit_text(f"<b>Membuat deposit Rp{amount:,} ...</b>", parse_mode="HTML")
 
     try:
-        resp = await asyncio.to_thread(create_deposit, amount)
+        resp = await supplier.create_deposit(amount)
     except Exception as e:
         logger.exception("create_deposit raised exception")
         try:
@@ -252,7 +233,7 @@ async def process_custom_amount(message: Message, state: FSMContext):
     await state.clear()
 
     try:
-        resp = await asyncio.to_thread(create_deposit, amount)
+        resp = await supplier.create_deposit(amount)
     except Exception as e:
         logger.exception("create_deposit raised exception (custom amount)")
         try:
@@ -1,48 +1,20 @@
 from html import escape
-import os
-import json
 import logging
 
 from aiogram import Router, F
 from aiogram.types import CallbackQuery
 from aiogram.fsm.context import FSMContext
 
-from models.seting_bot import get_latest_cara_pembelian, get_latest_cara_deposit
+from data.async_database import get_latest_cara_pembelian, get_latest_cara_deposit
 from button.start import get_admin_keyboard, get_user_keyboard
+from helper.config import is_admin
 
 logger = logging.getLogger(__name__)
 router = Router()
 
 
-def _setup_path() -> str:
-    return os.path.join(os.path.dirname(os.path.dirname(__file__)), "core", "setup.json")
-
-
-def read_setup() -> dict:
-    try:
-        p = _setup_path()
-        if not os.path.exists(p):
-            return {}
-        with open(p, "r", encoding="utf-8") as f:
-            return json.load(f) or {}
-    except Exception:
-        logger.exception("Failed to read setup.json")
-        return {}
-
-
 def _is_admin(user_id: int) -> bool:
-    try:
-        s = read_setup()
-        admin = s.get("admin") or {}
-        admin_userid = admin.get("userid")
-        if admin_userid is None:
-            return False
-        try:
-            return int(admin_userid) == int(user_id)
-        except Exception:
-            return False
-    except Exception:
-        return False
+    return is_admin(user_id)
 
 
 def _get_back_keyboard_for_user(user_id: int):
@@ -51,7 +23,7 @@ def _get_back_keyboard_for_user(user_id: int):
 
 @router.callback_query(F.data == "cara_pembelian")
 async def show_cara_pembelian(callback: CallbackQuery, state: FSMContext):
-    content = get_latest_cara_pembelian() or "Belum ada panduan cara pembelian yang diset. Silakan hubungi admin untuk menambahkan konten."
+    content = await get_latest_cara_pembelian() or "Belum ada panduan cara pembelian yang diset. Silakan hubungi admin untuk menambahkan konten."
     body = f"<b>Cara Pembelian</b>\n\n{escape(content)}"
     back_kb = _get_back_keyboard_for_user(callback.from_user.id)
     try:
@@ -65,7 +37,7 @@ async def show_cara_pembelian(callback: CallbackQuery, state: FSMContext):
 
 @router.callback_query(F.data == "cara_deposit")
 async def show_cara_deposit(callback: CallbackQuery, state: FSMContext):
-    content = get_latest_cara_deposit() or "Belum ada panduan cara deposit yang diset. Silakan hubungi admin untuk menambahkan konten."
+    content = await get_latest_cara_deposit() or "Belum ada panduan cara deposit yang diset. Silakan hubungi admin untuk menambahkan konten."
     body = f"<b>Cara Deposit</b>\n\n{escape(content)}"
     back_kb = _get_back_keyboard_for_user(callback.from_user.id)
     try:
@@ -1,8 +1,5 @@
 from __future__ import annotations
-import os
-import json
 import io
-import sqlite3
 from typing import List, Optional, Dict, Any
 
 from aiogram import Router, F
@@ -13,27 +10,12 @@ from aiogram.types import (
     InputFile,
 )
 
-from data.database import get_user as get_user_db
-import models.transaksi_terjadwal as mtx  # type: ignore
+from data.async_database import get_user as get_user_db, list_pending
+from helper.config import get_admin_userid
 
 router = Router()
 
 
-def _setup_path() -> str:
-    return os.path.join(os.path.dirname(os.path.dirname(__file__)), "core", "setup.json")
-
-
-def read_setup() -> dict:
-    try:
-        p = _setup_path()
-        if not os.path.exists(p):
-            return {}
-        with open(p, "r", encoding="utf-8") as f:
-            return json.load(f) or {}
-    except Exception:
-        return {}
-
-
 def _get_back_keyboard(role: str = "user") -> InlineKeyboardMarkup:
     """
     Return a single-button keyboard matching the style in the Sidompul example.
@@ -59,44 +41,10 @@ def _fmt_rp(amount: Any) -> str:
             return "-"
 
 
-def _rows_to_dicts(rows: List[tuple]) -> List[Dict[str, Any]]:
-    out = []
-    for r in rows:
-        out.append({
-            "id": r[0],
-            "userid": r[1],
-            "produk_id": r[2],
-            "produk_nama": r[3],
-            "kategori": r[4],
-            "harga_jual": r[5],
-            "metode_pembayaran": r[6],
-            "msisdn": r[7],
-            "waktu_pembelian": r[8],
-            "status": r[9],
-            "created_at": r[10],
-        })
-    return out
-
-
-async def _fetch_all_pending_from_db(limit: Optional[int] = None) -> List[Dict[str, Any]]:
-    """Fetch all pending transaksi_terjadwal rows directly from the DB used by models.transaksi_terjadwal."""
+async def _fetch_all_pending_from_db(limit: Optional[int] = None, userid: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Fetch pending transaksi_terjadwal rows, optionally only for one userid (via models.transaksi_terjadwal)."""
     try:
-        db_path = getattr(mtx, "DB_PATH", None)
-        if not db_path:
-            return []
-        conn = sqlite3.connect(db_path)
-        c = conn.cursor()
-        q = ("SELECT id, userid, produk_id, produk_nama, kategori, harga_jual, metode_pembayaran, "
-             "msisdn, waktu_pembelian, status, created_at FROM transaksi_terjadwal "
-             "WHERE status = 'pending' ORDER BY waktu_pembelian DESC")
-        if limit:
-            q = q + " LIMIT ?"
-            c.execute(q, (limit,))
-        else:
-            c.execute(q)
-        rows = c.fetchall()
-        conn.close()
-        return _rows_to_dicts(rows)
+        return await list_pending(limit, userid)
     except Exception:
         return []
 
@@ -113,19 +61,12 @@ async def handle_pending_transaksi(callback: CallbackQuery) -> None:
     await callback.answer()  # stop Telegram spinner
 
     tg_user_id = int(callback.from_user.id)
-    setup = read_setup()
-    admin_cfg = setup.get("admin") or {}
-    setup_admin_userid: Optional[int] = None
-    try:
-        if admin_cfg.get("userid"):
-            setup_admin_userid = int(admin_cfg.get("userid"))
-    except Exception:
-        setup_admin_userid = None
+    setup_admin_userid: Optional[int] = get_admin_userid()
 
     # Determine role from DB (preferred) or setup admin id
     role = "user"
     try:
-        user_info = get_user_db(tg_user_id) or {}
+        user_info = await get_user_db(tg_user_id) or {}
         role = user_info.get("role", "user") or "user"
         # normalize
         role = str(role).lower()
@@ -139,16 +80,8 @@ async def handle_pending_transaksi(callback: CallbackQuery) -> None:
     if is_admin:
         items = await _fetch_all_pending_from_db()
     else:
-        # use model helper to get user's transactions then filter pending
-        try:
-            items = mtx.get_transaksi_by_user(tg_user_id, limit=500)
-        except Exception:
-            all_pending = await _fetch_all_pending_from_db()
-            uid_str = str(tg_user_id)
-            items = [it for it in all_pending if str(it.get("userid")) == uid_str]
-
-        # ensure only pending
-        items = [it for it in items if str(it.get("status", "")).lower() == "pending"]
+        # pending milik user ini saja (index status + due_at_epoch, tanpa scan riwayat jadwal)
+        items = await _fetch_all_pending_from_db(limit=500, userid=tg_user_id)
 
     back_kb = _get_back_keyboard("admin" if is_admin else "user")
 
@@ -188,9 +121,9 @@ async def handle_pending_transaksi(callback: CallbackQuery) -> None:
         try:
             # get_user_db expects an int userid in most implementations
             try:
-                user_record = get_user_db(int(uid)) if uid is not None else {}
+                user_record = await get_user_db(int(uid)) if uid is not None else {}
             except Exception:
-                user_record = get_user_db(uid) if uid is not None else {}
+                user_record = await get_user_db(uid) if uid is not None else {}
             if user_record:
                 uname = user_record.get("username") or user_record.get("user_name") or user_record.get("tg_username") or None
                 if uname:
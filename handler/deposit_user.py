@@ -27,7 +27,8 @@ from PIL import Image  # ensure Pillow installed
 
 import aiohttp
 
-from data.database import get_user
+from data.async_database import get_user
+from helper import config
 
 logger = logging.getLogger(__name__)
 router = Router()
@@ -71,21 +72,13 @@ def get_back_keyboard(role: str = "user") -> InlineKeyboardMarkup:
 
 # --- setup.json helpers ---------------------------------------------------
 def _load_setup() -> dict:
-    try:
-        if not os.path.exists(SETUP_PATH):
-            return {}
-        with open(SETUP_PATH, "r", encoding="utf-8") as f:
-            return json.load(f) or {}
-    except Exception:
-        logger.exception("Failed to read setup.json")
-        return {}
+    # salinan dangkal dari cache helper.config (aman dimodifikasi sebelum _save_setup)
+    return dict(config.read_setup())
 
 
 def _save_setup(data: dict) -> None:
     try:
-        os.makedirs(os.path.dirname(SETUP_PATH), exist_ok=True)
-        with open(SETUP_PATH, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        config.save_setup(data)
     except Exception:
         logger.exception("Failed to write setup.json")
 
@@ -361,7 +354,7 @@ async def notify_admin_with_proof(setup: dict, admin_target: str, user_id: int,
 @router.callback_query(F.data == "deposit")
 async def deposit_start(callback: CallbackQuery, state: FSMContext):
     await state.clear()
-    user = get_user(callback.from_user.id)
+    user = await get_user(callback.from_user.id)
     role = user["role"] if user else "user"
 
     text = (
@@ -469,7 +462,7 @@ async def deposit_amount(message: Message, state: FSMContext):
     trx_id = f"deposit_{message.from_user.id}_{random.randint(1000,9999)}"
     PENDING_DEPOSITS[message.from_user.id] = {"amount": final_amount, "trx_id": trx_id, "timestamp": datetime.now().isoformat()}
 
-    role = (get_user(message.from_user.id) or {}).get("role", "user")
+    role = (await get_user(message.from_user.id) or {}).get("role", "user")
     back_button = InlineKeyboardButton(
         text=("⬅️ Kembali ke Menu Admin" if role=="admin" else "⬅️ Kembali ke Menu Utama"),
         callback_data=("back_to_admin_menu" if role=="admin" else "back_to_user_menu")
@@ -536,7 +529,7 @@ async def deposit_amount(message: Message, state: FSMContext):
 
     # notify admin about new deposit request (non-blocking) and store admin notif ids
     try:
-        user_info = get_user(message.from_user.id) or {"username": message.from_user.username or "-", "saldo": 0}
+        user_info = await get_user(message.from_user.id) or {"username": message.from_user.username or "-", "saldo": 0}
         notif_result = await notify_admin_with_qr(
             setup=_load_setup(),
             user_id=message.from_user.id,
@@ -577,7 +570,7 @@ async def auto_receive_proof_photo(message: Message, state: FSMContext):
 
     trx_id = pending.get("trx_id")
     amount = pending.get("amount")
-    user_db = get_user(user_id) or {}
+    user_db = await get_user(user_id) or {}
     username = user_db.get("username") or (message.from_user.username or "-")
 
     # Determine admin_target & notif token setup
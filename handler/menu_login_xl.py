@@ -1,11 +1,13 @@
 from aiogram import Router, F
 from aiogram.types import CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.fsm.context import FSMContext
-from api.cek_pulsa import cek_pulsa_xl
-from api.cek_kuota import cek_kuota_xl
-from data.database import get_all_kategori, get_produk_by_kategori, get_produk_detail, get_user
+from api.client import supplier
+from data.async_database import get_user
+from data.catalog_cache import get_all_kategori, get_produk_by_kategori, get_produk_detail
+from helper.keyboard_cache import get_keyboard
 from html import escape
 from sessions import sessions
+import asyncio
 import typing
 
 router = Router()
@@ -58,6 +60,16 @@ def get_products_keyboard(products, kategori):
     keyboard.append([InlineKeyboardButton(text="⬅️ Kembali", callback_data=f"show_categories")])
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
+async def cached_category_keyboard():
+    async def build():
+        return get_category_keyboard(await get_all_kategori() or [])
+    return await get_keyboard("login_xl_kategori", None, build)
+
+async def cached_products_keyboard(kategori):
+    async def build():
+        return get_products_keyboard(await get_produk_by_kategori(kategori) or [], kategori)
+    return await get_keyboard("login_xl_produk", kategori, build)
+
 def get_product_detail_keyboard(produk_id):
     return InlineKeyboardMarkup(
         inline_keyboard=[
@@ -167,26 +179,42 @@ def _render_kuota_from_api_data(data: dict) -> str:
 
     return kuota_msg
 
-async def show_menu_login_xl(message_or_callback, state: FSMContext, msisdn, role="user"):
-    # Cek pulsa dan kuota
-    pulsa_result = cek_pulsa_xl(msisdn)
+def _parse_pulsa_result(pulsa_result: dict):
+    """Return (saldo, expired) dari response cek_pulsa_xl ("-" jika gagal)."""
     if pulsa_result.get("success"):
         pulsa_info = pulsa_result.get("data") or {}
         # defensive access
         saldo = pulsa_info.get("remaining_balance") or pulsa_result.get("remaining_balance") or "-"
         expired = pulsa_info.get("expired_at") or pulsa_result.get("expired_at") or "-"
-    else:
-        saldo = "-"
-        expired = "-"
+        return saldo, expired
+    return "-", "-"
 
-    kuota_result = cek_kuota_xl(msisdn)
+def _render_kuota_result(kuota_result: dict) -> str:
     if kuota_result.get("success"):
         # API may return multiple shapes, use helper to render safely
         data = kuota_result.get("result", {}) or {}
         data_payload = data.get("data") or data  # sometimes result is the data itself
-        kuota_msg = _render_kuota_from_api_data(data_payload)
-    else:
-        kuota_msg = f"❗️ Gagal cek kuota: <code>{escape(str(kuota_result.get('error','-')))}</code>\n"
+        return _render_kuota_from_api_data(data_payload)
+    return f"❗️ Gagal cek kuota: <code>{escape(str(kuota_result.get('error','-')))}</code>\n"
+
+def _as_result(value) -> dict:
+    # hasil asyncio.gather(return_exceptions=True) -> dict response seperti supplier
+    if isinstance(value, BaseException):
+        return {"success": False, "error": str(value) or value.__class__.__name__}
+    return value or {}
+
+async def _cek_pulsa_dan_kuota(msisdn):
+    """Cek pulsa dan kuota secara bersamaan (waktu tunggu = yang paling lama, bukan jumlah keduanya)."""
+    pulsa_result, kuota_result = await asyncio.gather(
+        supplier.cek_pulsa_xl(msisdn), supplier.cek_kuota_xl(msisdn), return_exceptions=True
+    )
+    return _as_result(pulsa_result), _as_result(kuota_result)
+
+async def show_menu_login_xl(message_or_callback, state: FSMContext, msisdn, role="user"):
+    # Cek pulsa dan kuota (paralel)
+    pulsa_result, kuota_result = await _cek_pulsa_dan_kuota(msisdn)
+    saldo, expired = _parse_pulsa_result(pulsa_result)
+    kuota_msg = _render_kuota_result(kuota_result)
 
     # Simpan KE SESSIONS!
     # message_or_callback can be Message or CallbackQuery; unify
@@ -228,45 +256,41 @@ async def show_categories(callback: CallbackQuery, state: FSMContext):
         )
         return
 
-    # Hanya cek pulsa (TANPA cek kuota)
-    pulsa_result = cek_pulsa_xl(msisdn)
-    if pulsa_result.get("success"):
-        pulsa_info = pulsa_result.get("data") or {}
-        saldo = pulsa_info.get("remaining_balance") or pulsa_result.get("remaining_balance") or "-"
-        expired = pulsa_info.get("expired_at") or pulsa_result.get("expired_at") or "-"
-    else:
-        saldo = "-"
-        expired = "-"
+    # Hanya cek pulsa (TANPA cek kuota); keyboard kategori disiapkan bersamaan
+    pulsa_result, category_kb = await asyncio.gather(
+        supplier.cek_pulsa_xl(msisdn), cached_category_keyboard(), return_exceptions=True
+    )
+    if isinstance(category_kb, BaseException):
+        raise category_kb
+    saldo, expired = _parse_pulsa_result(_as_result(pulsa_result))
 
     # Update sessions
     sessions.update(user_id, {"msisdn": msisdn, "saldo": saldo, "expired": expired, "role": role})
 
     pulsa_msg = make_pulsa_msg(sessions.get(user_id))
-    categories = get_all_kategori() or []
     await callback.message.edit_text(
         pulsa_msg + "\n\n📦 <b>Pilih Kategori Produk</b>:",
         parse_mode="HTML",
-        reply_markup=get_category_keyboard(categories)
+        reply_markup=category_kb
     )
 
 @router.callback_query(F.data.regexp(r"^category_(.+)$"))
 async def show_products_by_category(callback: CallbackQuery, state: FSMContext):
     user_id = callback.from_user.id
     kategori = callback.data.split("_", 1)[1]
-    products = get_produk_by_kategori(kategori) or []
     session_data = sessions.get(user_id)
     pulsa_msg = make_pulsa_msg(session_data)
     await callback.message.edit_text(
         pulsa_msg + f"\n\n🛍️ <b>Daftar Produk {escape(kategori)}</b>:",
         parse_mode="HTML",
-        reply_markup=get_products_keyboard(products, kategori)
+        reply_markup=await cached_products_keyboard(kategori)
     )
 
 @router.callback_query(F.data.regexp(r"^product_(.+)$"))
 async def show_product_detail(callback: CallbackQuery, state: FSMContext):
     user_id = callback.from_user.id
     produk_id = callback.data.split("_", 1)[1]
-    product = get_produk_detail(produk_id)
+    product = await get_produk_detail(produk_id)
     if not product:
         await callback.message.edit_text(
             "❗️ Produk tidak ditemukan atau sudah tidak aktif.",
@@ -296,7 +320,7 @@ async def show_product_detail(callback: CallbackQuery, state: FSMContext):
 @router.callback_query(F.data == "go_to_login")
 async def menu_login_xl_callback(callback: CallbackQuery, state: FSMContext):
     user_id = callback.from_user.id
-    user = get_user(user_id)
+    user = await get_user(user_id)
     role = user["role"] if user else "user"
     session_data = sessions.get(user_id)
     msisdn = session_data.get("msisdn")
@@ -309,23 +333,10 @@ async def menu_login_xl_callback(callback: CallbackQuery, state: FSMContext):
         sessions.clear(user_id)
         return
 
-    # Di sini tampilkan pulsa + kuota (cek ulang)
-    pulsa_result = cek_pulsa_xl(msisdn)
-    if pulsa_result.get("success"):
-        pulsa_info = pulsa_result.get("data") or {}
-        saldo = pulsa_info.get("remaining_balance") or pulsa_result.get("remaining_balance") or "-"
-        expired = pulsa_info.get("expired_at") or pulsa_result.get("expired_at") or "-"
-    else:
-        saldo = "-"
-        expired = "-"
-
-    kuota_result = cek_kuota_xl(msisdn)
-    if kuota_result.get("success"):
-        data = kuota_result.get("result", {}) or {}
-        data_payload = data.get("data") or data
-        kuota_msg = _render_kuota_from_api_data(data_payload)
-    else:
-        kuota_msg = f"❗️ Gagal cek kuota: <code>{escape(str(kuota_result.get('error','-')))}</code>\n"
+    # Di sini tampilkan pulsa + kuota (cek ulang, paralel)
+    pulsa_result, kuota_result = await _cek_pulsa_dan_kuota(msisdn)
+    saldo, expired = _parse_pulsa_result(pulsa_result)
+    kuota_msg = _render_kuota_result(kuota_result)
 
     # Update sesi
     sessions.update(user_id, {"msisdn": msisdn, "saldo": saldo, "expired": expired, "role": role})
@@ -1,7 +1,7 @@
 from aiogram import Router, F, Bot as AiogramBot
 from aiogram.types import CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton, InputFile
 from aiogram.fsm.context import FSMContext
-from data.database import get_produk_detail, get_user, update_user_saldo
+from data.async_database import get_produk_detail, get_user, update_user_saldo, debit_user_saldo, insert_riwayat
 from sessions import sessions
 from html import escape
 import re
@@ -13,14 +13,12 @@ import tempfile
 import aiohttp
 
 # API payment settlement
-from api.xl_payment import xl_payment_settlement
+from api.client import supplier
+from helper.config import read_setup
 
 # Tambah qrcode
 import qrcode
 
-# Import riwayat transaksi
-from models.riwayat_transaksi import insert_riwayat
-
 logger = logging.getLogger(__name__)
 router = Router()
 
@@ -66,20 +64,6 @@ def get_confirm_payment_keyboard(method_code, product_id):
         ]
     )
 
-def read_setup():
-    """
-    Read core/setup.json and return dict with keys possibly: token, notifikasi, admin (dict)
-    """
-    try:
-        setup_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "core", "setup.json")
-        if not os.path.exists(setup_path):
-            return {}
-        with open(setup_path, "r", encoding="utf-8") as f:
-            return json.load(f) or {}
-    except Exception as e:
-        logger.exception("Failed to read setup.json: %s", e)
-        return {}
-
 def insufficient_funds_keyboard(product_id):
     setup = read_setup()
     admin = (setup.get("admin") or {}) if isinstance(setup, dict) else {}
@@ -380,7 +364,7 @@ async def show_product_detail(callback: CallbackQuery, state: FSMContext):
         await callback.message.edit_text("❗️ Produk tidak valid.", parse_mode="HTML")
         return
     produk_id = match.group(1)
-    product = get_produk_detail(produk_id)
+    product = await get_produk_detail(produk_id)
     if not product:
         await callback.message.edit_text(
             "❗️ Produk tidak ditemukan atau sudah tidak aktif.",
@@ -416,7 +400,7 @@ async def choose_payment_method(callback: CallbackQuery, state: FSMContext):
         return
     product_id = match.group(1)
     session_data = sessions.get(user_id)
-    product = get_produk_detail(product_id)
+    product = await get_produk_detail(product_id)
     if not product:
         await callback.message.edit_text("❗️ Produk tidak ditemukan atau sudah tidak aktif.", parse_mode="HTML")
         return
@@ -444,7 +428,7 @@ async def confirm_payment_screen(callback: CallbackQuery, state: FSMContext):
     product_id = match.group(2)
 
     session_data = sessions.get(user_id)
-    product = get_produk_detail(product_id)
+    product = await get_produk_detail(product_id)
     if not product:
         await callback.message.edit_text("❗️ Produk tidak ditemukan atau sudah tidak aktif.", parse_mode="HTML")
         return
@@ -482,7 +466,7 @@ async def confirm_payment_action(callback: CallbackQuery, state: FSMContext):
         await callback.message.edit_text("❗️ Nomor XL tidak ditemukan di sesi.", parse_mode="HTML")
         return
 
-    produk = get_produk_detail(product_id)
+    produk = await get_produk_detail(product_id)
     if not produk:
         await callback.message.edit_text("❗️ Produk tidak ditemukan.", parse_mode="HTML")
         return
@@ -491,12 +475,23 @@ async def confirm_payment_action(callback: CallbackQuery, state: FSMContext):
     harga_jual = produk.get("harga_jual", 0)
     amount = harga_jual
 
-    # Ambil saldo user TERBARU dari database
-    user_db = get_user(user_id)
-    saldo_tersisa = user_db["saldo"] if user_db and "saldo" in user_db else 0
+    if not supplier.is_available("settlement"):
+        # supplier sedang gangguan (circuit breaker open): tolak sebelum saldo dipotong
+        await callback.message.edit_text(
+            "⚠️ Supplier sedang gangguan, pembayaran belum bisa diproses.\n"
+            "Saldo Anda tidak dipotong. Silakan coba lagi beberapa saat lagi.",
+            parse_mode="HTML",
+            reply_markup=failure_with_xl_info_keyboard(product_id)
+        )
+        return
 
-    # Cek saldo user
-    if saldo_tersisa < harga_jual:
+    # Potong saldo dulu secara atomik (cek + potong dalam satu statement) agar pembelian
+    # bersamaan tidak bisa membuat saldo minus; dikembalikan jika transaksi gagal.
+    debit_ok, saldo_tersisa = await debit_user_saldo(user_id, harga_jual, reason="pembelian")
+    if saldo_tersisa is None:
+        saldo_tersisa = 0
+
+    if not debit_ok:
         await callback.message.edit_text(
             f"❗️ Saldo Anda tidak cukup untuk melakukan transaksi ini.\n"
             f"Saldo: <b>Rp{escape(str(saldo_tersisa))}</b> | Harga: <b>Rp{escape(str(harga_jual))}</b>",
@@ -505,8 +500,19 @@ async def confirm_payment_action(callback: CallbackQuery, state: FSMContext):
         )
         return
 
-    await callback.message.edit_text("<b>Memproses pembayaran ...</b>", parse_mode="HTML")
-    result = xl_payment_settlement(
+    # data user untuk notifikasi sukses (saldo sudah dipotong: jangan gagal di sini)
+    try:
+        user_db = await get_user(user_id) or {}
+    except Exception:
+        logger.exception("Failed to load user %s after debit", user_id)
+        user_db = {}
+
+    try:
+        await callback.message.edit_text("<b>Memproses pembayaran ...</b>", parse_mode="HTML")
+    except Exception:
+        # saldo sudah dipotong: jangan berhenti di sini sebelum settlement / refund
+        logger.exception("Failed to show processing message for user %s", user_id)
+    result = await supplier.xl_payment_settlement(
         produk_id=product_id,
         msisdn=msisdn,
         metode_pembayaran=method_code
@@ -528,21 +534,21 @@ async def confirm_payment_action(callback: CallbackQuery, state: FSMContext):
     status_trx = "success" if api_success_flag else "failed"
     keterangan = result.get("message") or result.get("error") or None
 
-    # Jika transaksi berhasil menurut API (mempertimbangkan xl_status jika ada), potong saldo user
+    # Saldo sudah dipotong sebelum settlement; jika transaksi gagal menurut API
+    # (mempertimbangkan xl_status jika ada), kembalikan saldo user
     saldo_akhir = saldo_tersisa
-    if api_success_flag:
+    if not api_success_flag:
         try:
-            update_user_saldo(user_id, -harga_jual)  # potong saldo
+            await update_user_saldo(user_id, harga_jual, reason="refund", ref_trx_id=trx_id)  # refund
+            user_db_after = await get_user(user_id)
+            saldo_akhir = user_db_after["saldo"] if user_db_after and "saldo" in user_db_after else saldo_tersisa + harga_jual
         except Exception:
-            # jangan crash jika update gagal, tetap lanjutkan dan catat keterangan
-            keterangan = (keterangan or "") + " | failed to update user saldo"
-            logger.exception("Failed to update user saldo for user %s", user_id)
-        # Ambil saldo terbaru user
-        user_db_after = get_user(user_id)
-        saldo_akhir = user_db_after["saldo"] if user_db_after and "saldo" in user_db_after else saldo_tersisa
+            # jangan crash jika refund gagal, tetap lanjutkan dan catat keterangan
+            keterangan = (keterangan or "") + " | failed to refund user saldo"
+            logger.exception("Failed to refund user saldo for user %s", user_id)
 
     # Simpan riwayat transaksi (selalu simpan, sukses atau gagal)
-    insert_riwayat(
+    await insert_riwayat(
         user_id=str(user_id),
         msisdn=msisdn,
         produk_id=product_id,
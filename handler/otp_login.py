@@ -12,10 +12,8 @@ from aiogram.types import (
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
 
-from api.cek_sesi_nomor import refresh_xl_session
-from api.kirim_otp import kirim_otp_xl
-from api.login_otp import login_xl_with_otp
-from data.database import get_user
+from api.client import supplier
+from data.async_database import get_user
 
 # Import the function from menu_login_xl for direct call
 from handler.menu_login_xl import show_menu_login_xl
@@ -73,7 +71,7 @@ async def ask_phone(callback: CallbackQuery, state: FSMContext):
     Entry point: show WebApp button to input number (as requested),
     plus a fallback option to type number in chat.
     """
-    user = get_user(callback.from_user.id)
+    user = await get_user(callback.from_user.id)
     role = user["role"] if user else "user"
     await callback.message.edit_text(
         "🔒 <b>OTP Login XL</b>\n\n"
@@ -92,7 +90,7 @@ async def enable_type_msisdn(callback: CallbackQuery, state: FSMContext):
     """
     If user chooses fallback to typing, prompt them to type the number.
     """
-    user = get_user(callback.from_user.id)
+    user = await get_user(callback.from_user.id)
     role = user["role"] if user else "user"
     await callback.message.edit_text(
         "Silakan ketik nomor XL Anda di chat (format 08xxx atau 628xxx).",
@@ -118,11 +116,11 @@ async def process_msisdn(message: Message, state: FSMContext):
     await state.update_data(msisdn=msisdn)
     await message.answer("⏳ Mengecek sesi nomor...")
 
-    cek = refresh_xl_session(msisdn)
+    cek = await supplier.refresh_xl_session(msisdn)
     if cek.get("success"):
         await state.update_data(msisdn=msisdn)
         await message.answer("✅ <b>Nomor sudah terdaftar & sesi aktif.</b>\nMengambil info pulsa dan kuota...", parse_mode="HTML")
-        user = get_user(message.from_user.id)
+        user = await get_user(message.from_user.id)
         role = user["role"] if user else "user"
         await show_menu_login_xl(message, state, msisdn, role)
         await state.clear()
@@ -151,7 +149,7 @@ async def send_otp(callback: CallbackQuery, state: FSMContext):
         await state.clear()
         return
     await callback.message.edit_text("🔄 Mengirim OTP ke nomor Anda, mohon tunggu...")
-    result = kirim_otp_xl(msisdn)
+    result = await supplier.kirim_otp_xl(msisdn)
     if result.get("success"):
         await callback.message.answer(
             "✅ OTP berhasil dikirim!\n\nSilakan masukkan kode OTP yang Anda terima:",
@@ -176,14 +174,14 @@ async def process_otp(message: Message, state: FSMContext):
     data = await state.get_data()
     msisdn = data.get("msisdn")
     otp = message.text.strip()
-    user = get_user(message.from_user.id)
+    user = await get_user(message.from_user.id)
     role = user["role"] if user else "user"
     if not otp.isdigit() or len(otp) < 4:
         await message.answer("Kode OTP tidak valid. Masukkan kode OTP angka yang Anda terima.")
         return
     await message.answer("⏳ Memverifikasi kode OTP...")
 
-    result = login_xl_with_otp(msisdn, otp)
+    result = await supplier.login_xl_with_otp(msisdn, otp)
     if result.get("success"):
         await state.update_data(msisdn=msisdn)
         await message.answer("✅ Login OTP berhasil! Mengambil info pulsa dan kuota...", parse_mode="HTML")
@@ -205,7 +203,7 @@ async def process_otp(message: Message, state: FSMContext):
 
 @router.callback_query(F.data == "otp_login_cancel")
 async def cancel_otp_login(callback: CallbackQuery, state: FSMContext):
-    user = get_user(callback.from_user.id)
+    user = await get_user(callback.from_user.id)
     role = user["role"] if user else "user"
     await callback.message.edit_text("❌ Login OTP dibatalkan.", parse_mode="HTML", reply_markup=get_back_keyboard(role))
     await state.clear()
@@ -241,7 +239,7 @@ async def handle_webapp_data(message: Message, state: FSMContext):
 
     action = payload.get("action")
     msisdn = payload.get("msisdn")
-    user = get_user(message.from_user.id)
+    user = await get_user(message.from_user.id)
     role = user["role"] if user else "user"
 
     if action == "msisdn_entered":
@@ -259,7 +257,7 @@ async def handle_webapp_data(message: Message, state: FSMContext):
         # Store and check session exactly like typed flow
         await state.update_data(msisdn=msisdn)
         await message.reply("⏳ Mengecek sesi nomor...")
-        cek = refresh_xl_session(msisdn)
+        cek = await supplier.refresh_xl_session(msisdn)
         if cek.get("success"):
             await state.update_data(msisdn=msisdn)
             await message.reply("✅ Nomor sudah terdaftar & sesi aktif. Mengambil info...")
@@ -0,0 +1,105 @@
+from __future__ import annotations
+import logging
+import re
+from html import escape as _escape
+from typing import Any, List, Optional, Tuple
+
+from aiogram import Router, F
+from aiogram.types import CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
+
+from data.async_database import get_user as get_user_db, get_riwayat_page
+from helper.config import get_admin_userid
+
+router = Router()
+logger = logging.getLogger(__name__)
+
+PER_PAGE = 10
+
+# riwayat_transaksi  (halaman pertama)
+# riwayat_transaksi:<p|n>:<nomor halaman tujuan>:<id batas>  (keyset, lihat get_riwayat_page)
+_CALLBACK_RE = r"^riwayat_transaksi(?::([pn]):(\d+):(\d+))?$"
+
+
+def _fmt_rp(amount: Any) -> str:
+    try:
+        a = int(amount)
+        return f"Rp{format(a, ',').replace(',', '.')}"
+    except Exception:
+        return f"Rp{amount}" if amount is not None else "-"
+
+
+def _build_kb(page: int, prev_cursor: Optional[int], next_cursor: Optional[int], role: str) -> InlineKeyboardMarkup:
+    rows = []
+    nav_row = []
+    if prev_cursor is not None and page > 1:
+        nav_row.append(InlineKeyboardButton(text="⏮️ Lebih baru", callback_data=f"riwayat_transaksi:p:{page-1}:{prev_cursor}"))
+    if next_cursor is not None:
+        nav_row.append(InlineKeyboardButton(text="Lebih lama ⏭️", callback_data=f"riwayat_transaksi:n:{page+1}:{next_cursor}"))
+    if nav_row:
+        rows.append(nav_row)
+    if role == "admin":
+        rows.append([InlineKeyboardButton(text="⬅️ Kembali ke Menu Admin", callback_data="back_to_admin_menu")])
+    else:
+        rows.append([InlineKeyboardButton(text="⬅️ Kembali ke Menu Utama", callback_data="back_to_user_menu")])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+
+def _format_row(r: Tuple[Any, ...]) -> str:
+    # kolom: id, waktu, produk_nama, metode_pembayaran, amount_charged, saldo_tersisa, trx_id, status, keterangan
+    _, waktu, produk_nama, metode, amount, saldo_tersisa, trx_id, status, _ = r
+    return (
+        f"🕒 <code>{_escape(str(waktu or '-'))}</code>\n"
+        f"• Produk: <b>{_escape(str(produk_nama or '-'))}</b>\n"
+        f"• Metode: {_escape(str(metode or '-'))} | Harga: <b>{_escape(_fmt_rp(amount))}</b>\n"
+        f"• Status: <b>{_escape(str(status or '-'))}</b> | Saldo: {_escape(_fmt_rp(saldo_tersisa))}\n"
+        f"• ID: <code>{_escape(str(trx_id or '-'))}</code>"
+    )
+
+
+@router.callback_query(F.data.regexp(_CALLBACK_RE))
+async def handle_riwayat_transaksi(callback: CallbackQuery) -> None:
+    """
+    Riwayat transaksi milik user sendiri, PER_PAGE per halaman (terbaru dulu).
+    Pagination keyset: tombol membawa id batas, jadi halaman jauh sama murahnya dengan halaman 1
+    dan seluruh riwayat bisa ditelusuri.
+    """
+    await callback.answer()
+    tg_user_id = int(callback.from_user.id)
+
+    role = "user"
+    try:
+        user_info = await get_user_db(tg_user_id) or {}
+        role = str(user_info.get("role", "user") or "user").lower()
+    except Exception:
+        pass
+    if get_admin_userid() == tg_user_id:
+        role = "admin"
+
+    match = re.match(_CALLBACK_RE, callback.data)
+    page = 1
+    cursor: Optional[int] = None
+    direction = "next"
+    if match and match.group(1):
+        direction = "prev" if match.group(1) == "p" else "next"
+        page = max(1, int(match.group(2)))
+        cursor = int(match.group(3))
+
+    rows: List[Tuple[Any, ...]] = []
+    prev_cursor = next_cursor = None
+    try:
+        rows, prev_cursor, next_cursor = await get_riwayat_page(str(tg_user_id), PER_PAGE, cursor, direction)
+    except Exception:
+        logger.exception("Failed to fetch riwayat for user %s", tg_user_id)
+
+    kb = _build_kb(page, prev_cursor, next_cursor, role)
+    if not rows:
+        text = "Belum ada riwayat transaksi."
+    else:
+        text = f"<b>📊 Riwayat Transaksi</b> (halaman {page})\n\n" + "\n\n".join(_format_row(r) for r in rows)
+    try:
+        await callback.message.edit_text(text, reply_markup=kb, parse_mode="HTML")
+    except Exception:
+        try:
+            await callback.message.answer(text, reply_markup=kb, parse_mode="HTML")
+        except Exception:
+            logger.exception("Failed to send riwayat transaksi")
@@ -2,8 +2,8 @@ from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
-from api.sidompul import cek_kuota_sidompul
-from data.database import get_user
+from api.client import supplier
+from data.async_database import get_user
 
 router = Router()
 
@@ -26,7 +26,7 @@ def get_back_keyboard(role="user"):
 
 @router.callback_query(F.data == "sidompul_cek_kuota")
 async def ask_msisdn_handler(callback: CallbackQuery, state: FSMContext):
-    user = get_user(callback.from_user.id)
+    user = await get_user(callback.from_user.id)
     role = user["role"] if user else "user"
     await callback.message.edit_text(
         "📱 <b>SIDOMPUL - CEK KUOTA XL</b>\n\n"
@@ -39,7 +39,7 @@ async def ask_msisdn_handler(callback: CallbackQuery, state: FSMContext):
 
 @router.message(SidompulStates.waiting_for_msisdn)
 async def process_msisdn(message: Message, state: FSMContext):
-    user = get_user(message.from_user.id)
+    user = await get_user(message.from_user.id)
     role = user["role"] if user else "user"
     msisdn = message.text.strip()
     if msisdn.startswith("08"):
@@ -50,7 +50,7 @@ async def process_msisdn(message: Message, state: FSMContext):
 
     await message.answer("⏳ <b>Sedang memproses cek kuota...</b>", parse_mode="HTML")
 
-    result = cek_kuota_sidompul(msisdn)
+    result = await supplier.cek_kuota_sidompul(msisdn)
     if not result.get("success"):
         await message.answer(
             f"❌ Gagal cek kuota:\n<code>{result.get('error','Tidak diketahui')}</code>",
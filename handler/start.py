@@ -1,12 +1,10 @@
 from aiogram import types, Router, Bot
 from aiogram.filters import Command
 from sessions import sessions
-from data.database import add_user, user_exists, get_user
+from data.async_database import add_user, user_exists, get_user, get_latest_bot_status_full
 from button.start import get_admin_keyboard, get_user_keyboard
-from api.profile import update_user_profile
-from models.seting_bot import get_latest_bot_status_full
-import json
-import os
+from api.client import supplier
+from helper import config
 import html
 import logging
 
@@ -23,36 +21,15 @@ def format_rupiah(amount):
 
 
 def get_admin_saldo_api():
-    token_path = os.path.join("core", "token.json")
-    if os.path.exists(token_path):
-        with open(token_path, "r") as f:
-            data = json.load(f)
-            return data.get("user", {}).get("saldo")
-    return None
+    return (config.read_token().get("user") or {}).get("saldo")
 
 
 def get_admin_username():
-    setup_path = os.path.join("core", "setup.json")
-    if os.path.exists(setup_path):
-        with open(setup_path, "r") as f:
-            data = json.load(f)
-            admin = data.get("admin", {})
-            uname = admin.get("username")
-            if isinstance(uname, str):
-                return uname
-    return None
+    return config.get_admin_username()
 
 
 def get_notif_bot_token_and_adminid():
-    setup_path = os.path.join("core", "setup.json")
-    if os.path.exists(setup_path):
-        with open(setup_path, "r") as f:
-            data = json.load(f)
-            notif_token = data.get("notifikasi")
-            admin = data.get("admin", {})
-            admin_id = admin.get("userid")
-            return notif_token, admin_id
-    return None, None
+    return config.get_notif_bot_token(), config.get_admin().get("userid")
 
 
 async def _safe_send(bot: Bot, chat_id, text, parse_mode="HTML", reply_markup=None):
@@ -133,7 +110,7 @@ async def start_handler(message: types.Message):
         logger.exception("Failed to clear session for user %s", user_id)
 
     # Ambil status bot dan mode private/public
-    bot_status_data = get_latest_bot_status_full() or {"status": "open", "private_public": "public"}
+    bot_status_data = await get_latest_bot_status_full() or {"status": "open", "private_public": "public"}
     bot_status = bot_status_data.get("status", "open")
     bot_mode = bot_status_data.get("private_public", "public")
 
@@ -148,7 +125,7 @@ async def start_handler(message: types.Message):
     }.get(bot_mode, bot_mode)
 
     # Jika mode private, hanya user yang sudah terdaftar boleh akses
-    if bot_mode == "private" and not user_exists(user_id):
+    if bot_mode == "private" and not await user_exists(user_id):
         admin_username = get_admin_username()
         buttons = []
         if admin_username:
@@ -170,8 +147,8 @@ async def start_handler(message: types.Message):
 
     # Jika mode public, data user baru akan disimpan saat start
     is_new_user = False
-    if not user_exists(user_id):
-        add_user(user_id, username)
+    if not await user_exists(user_id):
+        await add_user(user_id, username)
         is_new_user = True
 
     # Setelah reset, isi session baru
@@ -192,7 +169,7 @@ async def start_handler(message: types.Message):
     except Exception:
         logger.exception("Failed to set session for user %s", user_id)
 
-    user = get_user(user_id)
+    user = await get_user(user_id)
 
     # Jika user baru, kirim notifikasi ke admin melalui bot notifikasi
     if is_new_user:
@@ -221,7 +198,7 @@ async def start_handler(message: types.Message):
     # Update profile admin dari API
     if user and user.get("role") == "admin":
         try:
-            update_user_profile()
+            await supplier.update_user_profile()
         except Exception as e:
             text = f"⚠️ Gagal update data profile admin dari API:\n<code>{html.escape(str(e))}</code>"
             await _safe_send(message.bot, message.chat.id, text, parse_mode="HTML")
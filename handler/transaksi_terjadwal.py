@@ -1,5 +1,4 @@
 from __future__ import annotations
-import os
 import re
 import logging
 from html import escape
@@ -12,9 +11,14 @@ from aiogram.types import CallbackQuery, Message, InlineKeyboardMarkup, InlineKe
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
 
-from data.database import get_produk_detail, get_user, update_user_saldo
-from models.transaksi_terjadwal import create_transaksi
-from models.riwayat_transaksi import insert_riwayat
+from data.catalog_cache import get_all_kategori, get_produk_detail, get_produk_harga_by_kategori
+from data.async_database import (
+    debit_user_saldo,
+    create_transaksi,
+    insert_riwayat,
+)
+from helper.keyboard_cache import get_keyboard
+from helper.transaksi_terjadwal import schedule_transaksi
 from sessions import sessions  # keep using sessions only to store msisdn if needed
 
 router = Router()
@@ -52,18 +56,12 @@ def _final_save_keyboard(product_id: str) -> InlineKeyboardMarkup:
     ])
 
 
-def categories_keyboard() -> InlineKeyboardMarkup:
+async def _build_categories_keyboard() -> InlineKeyboardMarkup:
     kb = []
     try:
-        db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "database.db")
-        import sqlite3
-        conn = sqlite3.connect(db_path)
-        c = conn.cursor()
-        c.execute("SELECT DISTINCT kategori FROM produk_xl WHERE kategori IS NOT NULL ORDER BY kategori")
-        rows = c.fetchall()
-        conn.close()
-        for r in rows:
-            k = r[0] or "-"
+        for k in await get_all_kategori():
+            if k is None:
+                continue
             kb.append([InlineKeyboardButton(text=str(k), callback_data=f"jadwal_category_{k}")])
     except Exception:
         kb = [[InlineKeyboardButton(text="PULSA", callback_data="jadwal_category_PULSA")]]
@@ -71,6 +69,21 @@ def categories_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=kb)
 
 
+async def categories_keyboard() -> InlineKeyboardMarkup:
+    return await get_keyboard("jadwal_kategori", None, _build_categories_keyboard)
+
+
+async def products_keyboard(kategori: str) -> InlineKeyboardMarkup:
+    async def build() -> InlineKeyboardMarkup:
+        kb = []
+        for r in await get_produk_harga_by_kategori(kategori):
+            pid, nama, harga = r[0], r[1], r[2] or 0
+            kb.append([InlineKeyboardButton(text=f"{nama} — Rp{harga}", callback_data=f"jadwal_product_{pid}")])
+        kb.append([InlineKeyboardButton(text="⬅️ Kembali ke Kategori", callback_data="jadwal_transaksi")])
+        return InlineKeyboardMarkup(inline_keyboard=kb)
+    return await get_keyboard("jadwal_produk", kategori, build)
+
+
 # --- safe session helpers (avoid AttributeError if sessions is not a plain dict) ---
 def _set_session_value(user_id: int, key: str, value: Any) -> None:
     try:
@@ -121,7 +134,7 @@ def _get_session_dict(user_id: int) -> dict:
 # ---------------- Handlers ----------------
 @router.callback_query(F.data == "jadwal_transaksi")
 async def entry_jadwal_transaksi(callback: CallbackQuery, state: FSMContext):
-    await callback.message.edit_text("📂 Pilih Kategori untuk dijadwalkan:", reply_markup=categories_keyboard())
+    await callback.message.edit_text("📂 Pilih Kategori untuk dijadwalkan:", reply_markup=await categories_keyboard())
     await state.clear()
     await callback.answer()
 
@@ -133,24 +146,15 @@ async def list_products(callback: CallbackQuery, state: FSMContext):
         await callback.answer("Kategori tidak valid.", show_alert=True)
         return
     kategori = match.group(1)
-    import sqlite3
-    db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "database.db")
-    conn = sqlite3.connect(db_path)
-    c = conn.cursor()
-    c.execute("SELECT id, nama_produk, harga_jual FROM produk_xl WHERE kategori = ? ORDER BY id", (kategori,))
-    rows = c.fetchall()
-    conn.close()
+    rows = await get_produk_harga_by_kategori(kategori)
     if not rows:
         await callback.message.edit_text(f"Tidak ada produk di kategori {escape(kategori)}.", reply_markup=_build_back())
         return
     text_lines = [f"📦 Produk di kategori: <b>{escape(kategori)}</b>\n"]
-    kb = []
     for r in rows:
-        pid, nama, harga = r[0], r[1], r[2] or 0
+        nama, harga = r[1], r[2] or 0
         text_lines.append(f"• {escape(nama)} — Rp{escape(str(harga))}")
-        kb.append([InlineKeyboardButton(text=f"{nama} — Rp{harga}", callback_data=f"jadwal_product_{pid}")])
-    kb.append([InlineKeyboardButton(text="⬅️ Kembali ke Kategori", callback_data="jadwal_transaksi")])
-    await callback.message.edit_text("\n".join(text_lines), parse_mode="HTML", reply_markup=InlineKeyboardMarkup(inline_keyboard=kb))
+    await callback.message.edit_text("\n".join(text_lines), parse_mode="HTML", reply_markup=await products_keyboard(kategori))
 
 
 @router.callback_query(F.data.regexp(r"^jadwal_product_(.+)$"))
@@ -160,7 +164,7 @@ async def show_product(callback: CallbackQuery, state: FSMContext):
         await callback.answer("Produk tidak valid.", show_alert=True)
         return
     produk_id = match.group(1)
-    product = get_produk_detail(produk_id)
+    product = await get_produk_detail(produk_id)
     if not product:
         await callback.message.edit_text("❗ Produk tidak ditemukan atau tidak aktif.", reply_markup=_build_back())
         return
@@ -253,7 +257,7 @@ async def callback_sched_choose_method(callback: CallbackQuery, state: FSMContex
         return
     method = match.group(1)
     produk_id = match.group(2)
-    product = get_produk_detail(produk_id)
+    product = await get_produk_detail(produk_id)
     if not product:
         await callback.answer("Produk tidak ditemukan.", show_alert=True)
         return
@@ -334,7 +338,7 @@ async def message_receive_time(message: Message, state: FSMContext):
     # try to read msisdn from sessions if present
     sess = _get_session_dict(user_id)
     msisdn = (sess or {}).get("msisdn", "-")
-    product = get_produk_detail(produk_id)
+    product = await get_produk_detail(produk_id)
     if not product:
         await message.reply("Produk tidak ditemukan. Proses dibatalkan.")
         await state.clear()
@@ -382,65 +386,20 @@ async def callback_sched_save(callback: CallbackQuery, state: FSMContext):
     # try to read msisdn from sessions if present
     sess = _get_session_dict(user_id)
     msisdn = (sess or {}).get("msisdn", "-")
-    product = get_produk_detail(produk_id) or {}
+    product = await get_produk_detail(produk_id) or {}
 
-    # --- Ensure saldo is actually deducted BEFORE saving the scheduled transaksi ---
-    # Get current saldo
-    try:
-        user_before = get_user(user_id) or {}
-        prev_saldo = int(user_before.get("saldo", 0))
-    except Exception:
-        prev_saldo = None
-
-    deduction_succeeded = False
-    new_saldo = None
-
-    if total > 0:
-        # Try to deduct once (primary attempt)
-        try:
-            update_user_saldo(user_id, -total)
-            user_after = get_user(user_id) or {}
-            new_saldo = int(user_after.get("saldo", 0))
-            if prev_saldo is None:
-                # if we couldn't read prev, consider deduction succeeded if balance reduced or exists
-                deduction_succeeded = True
-            else:
-                deduction_succeeded = (new_saldo == prev_saldo - total)
-        except Exception:
-            logger.exception("Exception while attempting initial saldo deduction for user %s amount=%s", user_id, total)
-            deduction_succeeded = False
-
-        # If deduction didn't appear to take effect, retry once and log
-        if not deduction_succeeded:
-            logger.warning("Initial saldo deduction did not change balance for user %s (prev=%s new=%s). Retrying once.", user_id, prev_saldo, new_saldo)
-            try:
-                update_user_saldo(user_id, -total)
-                user_after = get_user(user_id) or {}
-                new_saldo = int(user_after.get("saldo", 0))
-                if prev_saldo is None:
-                    deduction_succeeded = True
-                else:
-                    deduction_succeeded = (new_saldo == prev_saldo - total)
-            except Exception:
-                logger.exception("Retry saldo deduction failed for user %s amount=%s", user_id, total)
-                deduction_succeeded = False
-
-    else:
-        # total == 0 -> nothing to deduct but still treat as succeeded
-        try:
-            user_after = get_user(user_id) or {}
-            new_saldo = int(user_after.get("saldo", 0))
-        except Exception:
-            new_saldo = 0
-        deduction_succeeded = True
+    # --- Potong saldo BEFORE saving the scheduled transaksi (atomik: cek + potong satu statement) ---
+    deduction_succeeded, new_saldo = await debit_user_saldo(user_id, total, reason="jadwal")
+    if new_saldo is None:
+        new_saldo = 0
 
     if not deduction_succeeded:
         # Deduction failed: do NOT create scheduled transaksi (avoid inconsistent state)
-        logger.error("Failed to deduct saldo for user %s amount=%s; aborting scheduled transaksi save.", user_id, total)
+        logger.warning("Failed to deduct saldo for user %s amount=%s (saldo=%s); aborting scheduled transaksi save.", user_id, total, new_saldo)
         # Inform user (no automatic notifications to admin per request)
         await callback.message.edit_text(
-            f"❗ Gagal menyimpan jadwal: saldo Anda tidak dapat dipotong sebesar Rp{total}. "
-            "Silakan cek saldo atau hubungi admin.",
+            f"❗ Gagal menyimpan jadwal: saldo Anda tidak dapat dipotong sebesar Rp{total} "
+            f"(saldo: Rp{new_saldo}). Silakan cek saldo atau hubungi admin.",
             reply_markup=_build_back()
         )
         await state.clear()
@@ -448,7 +407,7 @@ async def callback_sched_save(callback: CallbackQuery, state: FSMContext):
         return
 
     # --- At this point saldo deduction succeeded; create scheduled transaksi and riwayat ---
-    tx_id = create_transaksi(
+    tx_id = await create_transaksi(
         userid=user_id,
         produk_id=produk_id,
         produk_nama=product.get("nama_produk", produk_id),
@@ -459,11 +418,13 @@ async def callback_sched_save(callback: CallbackQuery, state: FSMContext):
         msisdn=msisdn,
         status="pending"
     )
+    # daftarkan langsung ke scheduler agar dieksekusi tepat waktu (tanpa menunggu resync)
+    schedule_transaksi(tx_id, waktu)
 
     # create riwayat record reflecting the deduction
     trx_local_id = f"local_{tx_id}_{int(datetime.utcnow().timestamp())}"
     try:
-        insert_riwayat(
+        await insert_riwayat(
             user_id=str(user_id),
             msisdn=msisdn,
             produk_id=produk_id,
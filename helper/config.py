@@ -0,0 +1,195 @@
+"""
+Config & credential service untuk core/setup.json dan core/token.json.
+
+File JSON dibaca sekali lalu disimpan di memori; pemanggilan berikutnya hanya
+melakukan os.stat() dan membaca ulang file jika mtime/ukurannya berubah (mis. admin
+mengedit setup.json) atau setelah invalidate() / save_token_data() dipanggil saat
+token dirotasi. Dict yang dikembalikan read_setup() / read_token() adalah cache
+bersama, jangan dimodifikasi; gunakan update_token() untuk menulis token.
+"""
+from __future__ import annotations
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SETUP_PATH = os.path.join(_ROOT, "core", "setup.json")
+TOKEN_PATH = os.path.join(_ROOT, "core", "token.json")
+
+
+class _JsonFileCache:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._data: Optional[Dict[str, Any]] = None
+
+    def get(self) -> Optional[Dict[str, Any]]:
+        """Return isi file (dict) atau None jika file tidak ada / tidak valid."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            with self._lock:
+                self._stamp, self._data = None, None
+            return None
+        stamp = (st.st_mtime_ns, st.st_size)
+        if stamp == self._stamp:
+            return self._data
+        with self._lock:
+            if stamp != self._stamp:
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        self._data = json.load(f) or {}
+                except Exception:
+                    logger.exception("Failed to read %s", self.path)
+                    self._data = None
+                self._stamp = stamp
+            return self._data
+
+    def write(self, data: Dict[str, Any]) -> None:
+        """Tulis atomik (file sementara + os.replace) lalu perbarui cache."""
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                os.replace(tmp, self.path)
+            except Exception:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+                raise
+            st = os.stat(self.path)
+            self._stamp = (st.st_mtime_ns, st.st_size)
+            self._data = data
+
+    def update(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            data = dict(self.get() or {})
+            data.update(fields)
+            self.write(data)
+            return data
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._stamp, self._data = None, None
+
+
+_setup = _JsonFileCache(SETUP_PATH)
+_token = _JsonFileCache(TOKEN_PATH)
+
+
+# --- setup.json ---------------------------------------------------------------------
+
+def read_setup() -> Dict[str, Any]:
+    """Isi core/setup.json ({} jika tidak ada / tidak valid)."""
+    return _setup.get() or {}
+
+
+def save_setup(data: Dict[str, Any]) -> None:
+    """Tulis ulang core/setup.json (atomik) dan perbarui cache."""
+    _setup.write(dict(data))
+
+
+def get_bot_token() -> Optional[str]:
+    return read_setup().get("token")
+
+
+def get_admin() -> Dict[str, Any]:
+    return read_setup().get("admin") or {}
+
+
+def get_admin_userid() -> Optional[int]:
+    try:
+        userid = get_admin().get("userid")
+        return int(userid) if userid is not None else None
+    except Exception:
+        return None
+
+
+def get_admin_username() -> Optional[str]:
+    uname = get_admin().get("username")
+    return uname if isinstance(uname, str) else None
+
+
+def is_admin(user_id: Any) -> bool:
+    """True jika user_id sama dengan admin.userid di setup.json."""
+    admin_userid = get_admin_userid()
+    if admin_userid is None:
+        return False
+    try:
+        return admin_userid == int(user_id)
+    except Exception:
+        return False
+
+
+def get_notif_bot_token() -> Optional[str]:
+    return read_setup().get("notifikasi")
+
+
+def get_api_config() -> Dict[str, Any]:
+    """Section "api" di setup.json (base_url, email, password)."""
+    return read_setup().get("api") or {}
+
+
+def get_api_base_url() -> Optional[str]:
+    base_url = get_api_config().get("base_url")
+    return base_url.rstrip("/") if base_url else None
+
+
+# --- token.json ---------------------------------------------------------------------
+
+def read_token() -> Dict[str, Any]:
+    """Isi core/token.json ({} jika tidak ada / tidak valid)."""
+    return _token.get() or {}
+
+
+def token_exists() -> bool:
+    return os.path.exists(TOKEN_PATH)
+
+
+def get_access_token() -> Optional[str]:
+    return read_token().get("access_token")
+
+
+def get_refresh_token() -> Optional[str]:
+    return read_token().get("refresh_token")
+
+
+def get_api_base_url_and_token() -> Tuple[str, Optional[str]]:
+    """
+    Return (base_url, access_token) untuk request ke API supplier.
+    Raise exception jika setup.json / base_url / token.json tidak ada
+    (sama seperti get_api_base_url_and_token lama di api/*.py).
+    """
+    if not os.path.exists(SETUP_PATH):
+        raise Exception("setup.json not found.")
+    base_url = get_api_base_url()
+    if not base_url:
+        raise Exception("base_url not found in setup.json")
+    if not token_exists():
+        raise Exception("token.json not found.")
+    return base_url, get_access_token()
+
+
+def save_token_data(token_data: Dict[str, Any]) -> None:
+    """Ganti seluruh isi core/token.json (mis. hasil ambil-token)."""
+    _token.write(dict(token_data))
+
+
+def update_token(**fields: Any) -> Dict[str, Any]:
+    """Gabungkan fields ke core/token.json (mis. access_token/refresh_token/user) dan simpan."""
+    return _token.update(fields)
+
+
+def invalidate() -> None:
+    """Paksa baca ulang kedua file pada akses berikutnya."""
+    _setup.invalidate()
+    _token.invalidate()
@@ -0,0 +1,56 @@
+"""
+Cache InlineKeyboardMarkup untuk menu kategori/produk.
+
+Keyboard dibangun sekali per (menu, kategori) lalu dipakai ulang oleh semua
+callback berikutnya. kategori berasal dari callback_data (input user), jadi hanya
+kategori yang ada di katalog yang disimpan; ukuran cache terbatas oleh jumlah menu x
+kategori katalog. Seluruh cache dibuang otomatis saat versi katalog
+(data.catalog_cache) berubah, yaitu setelah sync produk, edit, atau hapus produk.
+
+Objek keyboard yang dikembalikan dibagi ke semua pemanggil: jangan diubah, buat
+InlineKeyboardMarkup baru jika perlu menambah tombol.
+"""
+from __future__ import annotations
+import logging
+from typing import Awaitable, Callable, Dict, Hashable, Tuple
+
+from aiogram.types import InlineKeyboardMarkup
+
+from data import catalog_cache
+
+logger = logging.getLogger(__name__)
+
+_cache: Dict[Tuple[str, Hashable], InlineKeyboardMarkup] = {}
+_cache_version = -1
+
+
+async def get_keyboard(
+    menu: str,
+    kategori: Hashable,
+    builder: Callable[[], Awaitable[InlineKeyboardMarkup]],
+) -> InlineKeyboardMarkup:
+    """
+    Keyboard untuk (menu, kategori) dari cache; jika belum ada, panggil builder()
+    (coroutine yang membangun keyboard dari data.catalog_cache) lalu simpan.
+    kategori=None untuk menu tanpa kategori (daftar kategori).
+    """
+    global _cache_version
+    version = catalog_cache.get_version()
+    if version != _cache_version:
+        _cache.clear()
+        _cache_version = version
+    key = (menu, kategori)
+    markup = _cache.get(key)
+    if markup is not None:
+        return markup
+    markup = await builder()
+    if kategori is not None and kategori not in await catalog_cache.get_all_kategori():
+        return markup
+    # katalog bisa berubah selama builder berjalan; jangan simpan keyboard versi lama
+    if catalog_cache.get_version() == version == _cache_version:
+        _cache[key] = markup
+    return markup
+
+
+def invalidate() -> None:
+    _cache.clear()
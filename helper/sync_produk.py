@@ -0,0 +1,163 @@
+"""
+Ambil katalog produk XL dari API supplier secara paralel.
+
+Dipakai oleh update_produk_xl_periodik (bot.py) dan tombol admin "perbarui produk"
+(setup/admin_perbarui_produk.py). Semua kategori diambil bersamaan dengan batas
+konkurensi (setup.json "produk_sync_concurrency"); kategori yang gagal dicoba ulang
+sendiri-sendiri dengan backoff, tanpa mengulang kategori lain.
+
+Sinkronisasi inkremental (sinkron_produk_xl): per kategori disimpan hash isi list produk
+(dan ETag/Last-Modified jika supplier mengirimnya) di tabel produk_sync_state. Kategori
+yang hash-nya sama (atau dijawab 304) dilewati seluruhnya; kategori yang berubah hanya
+menulis baris produk yang berubah.
+"""
+from __future__ import annotations
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from api.client import supplier
+from data.async_database import run_db
+from helper.config import read_setup
+from models.produk_xl import get_sync_state, sinkron_kategori_produk
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 5
+DEFAULT_RETRIES = 2
+RETRY_BACKOFF_SECONDS = 1.0
+
+
+def _concurrency_from_setup() -> int:
+    try:
+        return max(1, int(read_setup().get("produk_sync_concurrency") or DEFAULT_CONCURRENCY))
+    except Exception:
+        return DEFAULT_CONCURRENCY
+
+
+def hash_produk(data: List[Dict[str, Any]]) -> str:
+    """sha256 dari list produk (JSON kanonik: key urut), stabil antar request."""
+    raw = json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+async def _ambil_kategori(
+    sem: asyncio.Semaphore,
+    kategori: str,
+    retries: int,
+    state: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Return {"kategori", "data" (list|None), "error" (str|None), "elapsed" (detik), "attempts",
+            "not_modified", "etag", "last_modified"}.
+    elapsed = total waktu termasuk retry. Jika state berisi etag/last_modified dari sync
+    sebelumnya, request dikirim kondisional; jawaban 304 -> not_modified=True, data=None.
+    """
+    state = state or {}
+    started = time.monotonic()
+    attempt = 0
+    error: Optional[str] = None
+    while True:
+        attempt += 1
+        try:
+            async with sem:
+                resp = await supplier.ambil_produk_xl_conditional(
+                    kategori, etag=state.get("etag"), last_modified=state.get("last_modified")
+                )
+            if resp["not_modified"]:
+                data = None
+            else:
+                body = resp["body"]
+                data = body.get("data") if isinstance(body, dict) else None
+                if not isinstance(data, list):
+                    raise Exception(f"Response produk tidak valid: {str(body)[:200]}")
+            return {
+                "kategori": kategori,
+                "data": data,
+                "error": None,
+                "elapsed": time.monotonic() - started,
+                "attempts": attempt,
+                "not_modified": resp["not_modified"],
+                "etag": resp["etag"],
+                "last_modified": resp["last_modified"],
+            }
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+            if attempt > retries:
+                break
+            logger.warning("Ambil produk kategori %s gagal (percobaan %s): %s; retry", kategori, attempt, error)
+            await asyncio.sleep(RETRY_BACKOFF_SECONDS * (2 ** (attempt - 1)))
+    logger.error("Ambil produk kategori %s gagal setelah %s percobaan: %s", kategori, attempt, error)
+    return {
+        "kategori": kategori,
+        "data": None,
+        "error": error,
+        "elapsed": time.monotonic() - started,
+        "attempts": attempt,
+        "not_modified": False,
+        "etag": None,
+        "last_modified": None,
+    }
+
+
+async def ambil_semua_produk_xl(
+    concurrency: Optional[int] = None,
+    retries: int = DEFAULT_RETRIES,
+    sync_state: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Ambil daftar kategori lalu produk semua kategori secara paralel.
+    Return list hasil per kategori (urutan sama dengan daftar kategori dari API).
+    sync_state (hasil get_sync_state) dipakai untuk request kondisional ETag/Last-Modified.
+    Raise exception jika daftar kategori sendiri gagal diambil.
+    """
+    kategori_list = (await supplier.ambil_kategori_xl()).get("data", []) or []
+    sem = asyncio.Semaphore(concurrency or _concurrency_from_setup())
+    sync_state = sync_state or {}
+    return list(await asyncio.gather(
+        *(_ambil_kategori(sem, k, retries, sync_state.get(k)) for k in kategori_list)
+    ))
+
+
+async def sinkron_produk_xl(
+    force: bool = False,
+    concurrency: Optional[int] = None,
+    retries: int = DEFAULT_RETRIES,
+) -> List[Dict[str, Any]]:
+    """
+    Sinkronisasi inkremental semua kategori. Return list hasil ambil_semua_produk_xl yang
+    ditambah:
+      "status": "error" | "unchanged" | "changed"
+      "diff":   ringkasan sinkron_kategori_produk (hanya untuk "changed", selain itu None)
+      "produk_count": jumlah produk kategori (dari sync terakhir jika "unchanged")
+    force=True mengabaikan hash/ETag tersimpan dan memproses ulang semua kategori.
+    """
+    state = {} if force else await run_db(get_sync_state)
+    hasil_list = await ambil_semua_produk_xl(concurrency, retries, sync_state=state)
+    for hasil in hasil_list:
+        kategori = hasil["kategori"]
+        prev = state.get(kategori) or {}
+        hasil["diff"] = None
+        if hasil["error"] is not None:
+            hasil["status"] = "error"
+            hasil["produk_count"] = prev.get("produk_count")
+            continue
+        if hasil["not_modified"]:
+            hasil["status"] = "unchanged"
+            hasil["produk_count"] = prev.get("produk_count")
+            continue
+        content_hash = hash_produk(hasil["data"])
+        if prev.get("content_hash") == content_hash:
+            hasil["status"] = "unchanged"
+            hasil["produk_count"] = len(hasil["data"])
+            continue
+        hasil["diff"] = await run_db(
+            sinkron_kategori_produk, kategori, hasil["data"], content_hash,
+            hasil["etag"], hasil["last_modified"],
+        )
+        hasil["status"] = "changed"
+        hasil["produk_count"] = len(hasil["data"])
+    return hasil_list
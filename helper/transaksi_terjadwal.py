@@ -2,40 +2,44 @@ from __future__ import annotations
 import os
 import json
 import asyncio
+import heapq
 import logging
+import time
 import io
 import tempfile
 import qrcode
 import aiohttp
 import urllib.parse
 import re
+import socket
+import uuid
 from html import escape
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, Any as _Any
+from typing import Optional, Dict, List, Set, Tuple, Any, Any as _Any
 
 from aiogram import Bot as AiogramBot
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
-from models.transaksi_terjadwal import list_pending_due, update_status
-from models.riwayat_transaksi import insert_riwayat
-from data.database import get_user, update_user_saldo
-from api.xl_payment import xl_payment_settlement
+from data.async_database import (
+    list_pending,
+    list_pending_by_ids,
+    claim_pending_by_ids,
+    reap_expired_leases,
+    finish_claim,
+    insert_riwayat,
+    get_user,
+    release_claim,
+    renew_lease,
+    mark_settlement_sent,
+)
+from data import user_cache
+from api import lookup_cache
+from api.client import supplier
+from helper.config import read_setup
 
 logger = logging.getLogger(__name__)
 
 
-def _read_setup() -> Dict[str, Any]:
-    try:
-        path = os.path.join("core", "setup.json")
-        if not os.path.exists(path):
-            return {}
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f) or {}
-    except Exception:
-        logger.exception("Failed to read setup.json")
-        return {}
-
-
 def _fmt_rp(amount: Any) -> str:
     try:
         a = int(amount)
@@ -189,8 +193,8 @@ def _short_json(obj: Any, max_len: int = 2000) -> str:
     return s
 
 
-async def _call_settlement_in_thread(produk_id: str, msisdn: str, metode: str) -> dict:
-    return await asyncio.to_thread(xl_payment_settlement, produk_id, msisdn, metode)
+async def _call_settlement(produk_id: str, msisdn: str, metode: str) -> dict:
+    return await supplier.xl_payment_settlement(produk_id, msisdn, metode)
 
 
 async def _send_text_notifications(notif_token: str, admin_target: Optional[str], admin_msg: str, user_id: int, user_msg: str, reply_kb: Optional[InlineKeyboardMarkup] = None):
@@ -495,6 +499,22 @@ async def notify_admin_and_user_on_failure(setup: dict, user_id: int, user_info:
         logger.exception("Failed to upload QR and notify on failure for trx=%s", trx_id)
 
 
+async def _finish_tx(tx_id: Any, status: str, user_id: Any = None, refund_amount: int = 0,
+                     reason: Optional[str] = None, ref_trx_id: Optional[str] = None) -> bool:
+    """
+    Tulis status akhir (+ refund saldo) hanya jika baris masih diklaim worker ini, dalam
+    satu transaksi (lihat finish_claim). Return False jika klaim sudah hilang / gagal:
+    pemanggil tidak boleh mencatat riwayat refund atau mengirim notifikasi.
+    """
+    try:
+        if await finish_claim(tx_id, WORKER_ID, status, user_id, refund_amount, reason, ref_trx_id):
+            return True
+        logger.error("Scheduled tx %s: claim lost before final status %s was written by %s", tx_id, status, WORKER_ID)
+    except Exception:
+        logger.exception("Failed to update scheduled tx status to %s for %s", status, tx_id)
+    return False
+
+
 async def _process_tx(bot: AiogramBot, tx: dict, admin_target: Optional[str]):
     tx_id = tx.get("id")
     user_id = int(tx.get("userid") or 0)
@@ -510,8 +530,8 @@ async def _process_tx(bot: AiogramBot, tx: dict, admin_target: Optional[str]):
         tx_id, user_id, produk_id, metode, msisdn, scheduled_raw
     )
 
-    setup = _read_setup()
-    user_info = get_user(user_id) or {}
+    setup = read_setup()
+    user_info = await get_user(user_id) or {}
 
     if scheduled_raw:
         scheduled_dt = _parse_datetime_jakarta(str(scheduled_raw))
@@ -531,27 +551,25 @@ async def _process_tx(bot: AiogramBot, tx: dict, admin_target: Optional[str]):
 
             if expired:
                 try:
-                    user_before = get_user(user_id) or {}
+                    user_before = await get_user(user_id) or {}
                     prev_saldo = int(user_before.get("saldo", 0))
                 except Exception:
                     prev_saldo = None
 
-                refunded_amount = 0
-                if harga and harga > 0:
-                    try:
-                        update_user_saldo(user_id, harga)
-                        refunded_amount = harga
-                    except Exception:
-                        logger.exception("Failed to refund saldo for user %s for expired scheduled tx %s", user_id, tx_id)
+                refund_trx_id = f"refund_{tx_id}_{int(datetime.utcnow().timestamp())}"
+                refunded_amount = harga if harga and harga > 0 else 0
+                # status + refund atomik dan fenced pada klaim: tidak ada refund ganda
+                if not await _finish_tx(tx_id, "failed", user_id, refunded_amount,
+                                        "refund_jadwal_expired", refund_trx_id):
+                    return
                 try:
-                    user_after = get_user(user_id) or {}
+                    user_after = await get_user(user_id) or {}
                     saldo_after = int(user_after.get("saldo", 0))
                 except Exception:
                     saldo_after = 0
 
                 try:
-                    refund_trx_id = f"refund_{tx_id}_{int(datetime.utcnow().timestamp())}"
-                    insert_riwayat(
+                    await insert_riwayat(
                         user_id=str(user_id),
                         msisdn=msisdn,
                         produk_id=produk_id,
@@ -568,11 +586,6 @@ async def _process_tx(bot: AiogramBot, tx: dict, admin_target: Optional[str]):
                 except Exception:
                     logger.exception("Failed to insert riwayat refund for expired scheduled tx %s", tx_id)
 
-                try:
-                    update_status(tx_id, "failed")
-                except Exception:
-                    logger.exception("Failed to update scheduled tx status to failed for %s", tx_id)
-
                 reason = "Waktu eksekusi terlewat; saldo dikembalikan."
                 try:
                     await notify_admin_and_user_on_failure(
@@ -587,13 +600,25 @@ async def _process_tx(bot: AiogramBot, tx: dict, admin_target: Optional[str]):
                             tx_id, int(delta_seconds), threshold_seconds, user_id, refunded_amount)
                 return
 
+    # penanda di-commit SEBELUM request: jika worker mati setelah ini, reaper menandai
+    # baris 'unknown' (cek manual) alih-alih mengulang settlement atau me-refund
+    if not await mark_settlement_sent(tx_id, WORKER_ID):
+        logger.error("Scheduled tx %s: claim lost before settlement; not sending (%s)", tx_id, WORKER_ID)
+        return
     logger.info("Calling settlement API for tx=%s produk=%s msisdn=%s metode=%s", tx_id, produk_id, msisdn, metode)
     try:
-        result = await _call_settlement_in_thread(produk_id, msisdn, metode)
+        result = await _call_settlement(produk_id, msisdn, metode)
     except Exception:
         logger.exception("Settlement call failed for scheduled tx %s", tx_id)
         result = {"success": False, "error": "internal_call_failed"}
 
+    if result.get("circuit_open"):
+        # request tidak pernah dikirim (circuit breaker open): kembalikan ke pending dan
+        # coba lagi setelah supplier pulih, jangan ditandai gagal + refund
+        await release_claim(tx_id, WORKER_ID)
+        logger.warning("Scheduled tx %s deferred: settlement circuit open (%s)", tx_id, result.get("error"))
+        return True
+
     try:
         data = result.get("data") or {}
     except Exception:
@@ -646,19 +671,16 @@ async def _process_tx(bot: AiogramBot, tx: dict, admin_target: Optional[str]):
         logger.info("API returned success=True but xl_status=%s; treating as failed unless xl_status == 'SUCCESS'. tx=%s", xl_status, tx_id)
 
     try:
-        user_db = get_user(user_id) or {}
+        user_db = await get_user(user_id) or {}
         saldo_before = int(user_db.get("saldo", 0))
     except Exception:
         saldo_before = None
 
     if api_success:
-        try:
-            update_status(tx_id, "sukses")
-        except Exception:
-            logger.exception("Failed to update scheduled tx status for %s", tx_id)
+        await _finish_tx(tx_id, "sukses")
 
         try:
-            saldo_after = int((get_user(user_id) or {}).get("saldo", 0))
+            saldo_after = int((await get_user(user_id) or {}).get("saldo", 0))
         except Exception:
             saldo_after = 0
 
@@ -680,22 +702,19 @@ async def _process_tx(bot: AiogramBot, tx: dict, admin_target: Optional[str]):
         return
 
     # API failure -> refund etc.
-    refunded_amount = 0
-    if harga and harga > 0:
-        try:
-            update_user_saldo(user_id, harga)
-            refunded_amount = harga
-        except Exception:
-            logger.exception("Failed to refund saldo for user %s after API failure for scheduled tx %s", user_id, tx_id)
+    refund_trx_id = f"refund_{tx_id}_{int(datetime.utcnow().timestamp())}"
+    refunded_amount = harga if harga and harga > 0 else 0
+    # status + refund atomik dan fenced pada klaim: tidak ada refund ganda
+    if not await _finish_tx(tx_id, "failed", user_id, refunded_amount, "refund_jadwal", refund_trx_id):
+        return
 
     try:
-        saldo_after = int((get_user(user_id) or {}).get("saldo", 0))
+        saldo_after = int((await get_user(user_id) or {}).get("saldo", 0))
     except Exception:
         saldo_after = 0
 
     try:
-        refund_trx_id = f"refund_{tx_id}_{int(datetime.utcnow().timestamp())}"
-        insert_riwayat(
+        await insert_riwayat(
             user_id=str(user_id),
             msisdn=msisdn,
             produk_id=produk_id,
@@ -712,11 +731,6 @@ async def _process_tx(bot: AiogramBot, tx: dict, admin_target: Optional[str]):
     except Exception:
         logger.exception("Failed to insert riwayat refund for API-failed scheduled tx %s", tx_id)
 
-    try:
-        update_status(tx_id, "failed")
-    except Exception:
-        logger.exception("Failed to update scheduled tx status to failed for %s", tx_id)
-
     logger.info(
         "Scheduled tx %s: API failure -> marked failed and refunded user %s amount=%s trx=%s xl_status=%s xl_message=%s http_status=%s",
         tx_id, user_id, refunded_amount, trx_id_final, xl_status, xl_message, http_status
@@ -735,55 +749,339 @@ async def _process_tx(bot: AiogramBot, tx: dict, admin_target: Optional[str]):
 
 _worker_task: Optional[asyncio.Task] = None
 
+# --- scheduler (min-heap berdasarkan waktu jatuh tempo) -------------------------------
+# _heap berisi (due_epoch, tx_id). _scheduled menyimpan due_epoch terbaru per tx_id; entri
+# heap yang tidak cocok lagi dengan _scheduled (dijadwal ulang) dilewati saat di-pop
+# (lazy deletion), jadi menjadwal ulang cukup O(log n).
+_heap: List[Tuple[float, int]] = []
+_scheduled: Dict[int, float] = {}
+_wakeup: Optional[asyncio.Event] = None
+
+# Sinkron ulang penuh dari DB secara berkala, untuk baris yang dibuat/dihapus di luar
+# proses ini (mis. edit manual DB).
+RESYNC_SECONDS = 600
+
+# --- worker pool ------------------------------------------------------------------------
+# Transaksi yang jatuh tempo dimasukkan ke antrian dan dieksekusi oleh N worker paralel
+# (setup.json "jadwal_concurrency"). Transaksi dengan msisdn sama tetap berurutan lewat
+# lock per msisdn (asyncio.Lock melayani waiter secara FIFO).
+DEFAULT_CONCURRENCY = 10
+STATS_LOG_SECONDS = 60
+
+# --- claim / lease --------------------------------------------------------------------
+# Sebelum dieksekusi, baris diklaim atomik (pending -> processing, claimed_by=WORKER_ID)
+# sehingga beberapa proses bot bisa berbagi DB tanpa eksekusi/charge ganda. Lease yang
+# habis (proses crash di tengah eksekusi) dikembalikan ke pending oleh reaper, kecuali
+# settlement sudah dikirim (mark_settlement_sent): baris itu menjadi 'unknown' untuk dicek manual.
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+LEASE_SECONDS = 300
+# lease diperpanjang berkala selama eksekusi (settlement + retry + notifikasi bisa > LEASE_SECONDS)
+LEASE_RENEW_SECONDS = 60
+REAP_SECONDS = 60
+
+_queue: Optional[asyncio.Queue] = None
+_inflight: Set[int] = set()
+_msisdn_locks: Dict[str, asyncio.Lock] = {}
+_msisdn_waiters: Dict[str, int] = {}
+_stats: Dict[str, Any] = {
+    "concurrency": 0,
+    "enqueued": 0,
+    "processed": 0,
+    "errors": 0,
+    "skipped_claimed": 0,
+    "reaped": 0,
+    "unknown": 0,
+    "deferred": 0,
+    "paused": False,
+    "active": 0,
+    "started_at": None,
+}
+
+
+def _due_epoch(waktu_pembelian: Any) -> Optional[float]:
+    """Konversi waktu_pembelian (Asia/Jakarta) ke epoch detik; None jika tidak bisa diparse."""
+    dt = _parse_datetime_jakarta(str(waktu_pembelian or ""))
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        # fallback tanpa tzdata: anggap UTC+7
+        return (dt - timedelta(hours=7) - datetime(1970, 1, 1)).total_seconds()
+    return dt.timestamp()
 
-async def _process_due_loop(bot: AiogramBot, interval_seconds: int = 30):
-    setup = _read_setup()
-    admin_cfg = setup.get("admin") or {}
-    admin_target = None
+
+def _wake() -> None:
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+def schedule_transaksi(tx_id: int, waktu_pembelian: Any) -> bool:
+    """
+    Daftarkan transaksi terjadwal ke scheduler (panggil setelah create_transaksi).
+    Aman dipanggil ulang untuk id yang sama (mis. waktu diubah).
+    """
+    due = _due_epoch(waktu_pembelian)
+    if due is None:
+        logger.warning("Scheduled tx %s has unparseable waktu_pembelian=%r; not scheduled", tx_id, waktu_pembelian)
+        return False
+    tx_id = int(tx_id)
+    if _scheduled.get(tx_id) == due:
+        return True
+    _scheduled[tx_id] = due
+    heapq.heappush(_heap, (due, tx_id))
+    # bangunkan loop hanya jika deadline ini lebih awal dari yang sedang ditunggu
+    if _heap[0][1] == tx_id:
+        _wake()
+    return True
+
+
+def _pop_due(now: float) -> List[int]:
+    ids: List[int] = []
+    while _heap and _heap[0][0] <= now:
+        due, tx_id = heapq.heappop(_heap)
+        if _scheduled.get(tx_id) == due:
+            del _scheduled[tx_id]
+            ids.append(tx_id)
+    return ids
+
+
+def _next_deadline() -> Optional[float]:
+    while _heap:
+        due, tx_id = _heap[0]
+        if _scheduled.get(tx_id) == due:
+            return due
+        heapq.heappop(_heap)
+    return None
+
+
+async def _resync_from_db() -> None:
+    """Samakan heap dengan semua baris pending di DB."""
+    known_before = set(_scheduled)
+    rows = await list_pending()
+    pending_ids = {int(tx["id"]) for tx in rows}
+    for tx in rows:
+        if int(tx["id"]) in _inflight:
+            continue
+        schedule_transaksi(tx["id"], tx.get("waktu_pembelian"))
+    # buang yang sudah tidak pending; id yang dijadwalkan selama query berjalan dibiarkan
+    for tx_id in known_before - pending_ids:
+        _scheduled.pop(tx_id, None)
+    _heap[:] = [(due, tx_id) for tx_id, due in _scheduled.items()]
+    heapq.heapify(_heap)
+    logger.info("Scheduler synced from DB: %s pending scheduled transactions", len(_scheduled))
+
+
+def _admin_target_from_setup() -> Optional[str]:
+    admin_cfg = read_setup().get("admin") or {}
     if admin_cfg.get("userid"):
-        admin_target = str(admin_cfg.get("userid"))
-    elif admin_cfg.get("username"):
-        admin_target = f"@{admin_cfg.get('username').lstrip('@')}"
+        return str(admin_cfg.get("userid"))
+    if admin_cfg.get("username"):
+        return f"@{admin_cfg.get('username').lstrip('@')}"
+    return None
+
+
+def _concurrency_from_setup() -> int:
+    try:
+        return max(1, int(read_setup().get("jadwal_concurrency") or DEFAULT_CONCURRENCY))
+    except Exception:
+        return DEFAULT_CONCURRENCY
 
-    logger.info("Scheduled transactions processor started (interval_seconds=%s) using timezone Asia/Jakarta", interval_seconds)
 
+def get_processor_stats() -> Dict[str, Any]:
+    """Snapshot statistik worker pool (antrian, aktif, jumlah diproses, throughput)."""
+    out = dict(_stats)
+    out["queue_depth"] = _queue.qsize() if _queue is not None else 0
+    out["inflight"] = len(_inflight)
+    out["scheduled"] = len(_scheduled)
+    started = out.get("started_at")
+    if started:
+        elapsed = max(1.0, time.time() - started)
+        out["throughput_per_min"] = round(out["processed"] * 60.0 / elapsed, 2)
+    return out
+
+
+async def _renew_lease_loop(tx_id: int) -> None:
+    """Perpanjang lease selama tx dieksekusi agar reaper tidak mengembalikannya ke pending."""
     while True:
+        await asyncio.sleep(LEASE_RENEW_SECONDS)
         try:
+            if not await renew_lease(tx_id, WORKER_ID, LEASE_SECONDS):
+                logger.error("Scheduled tx %s: lease no longer held by %s", tx_id, WORKER_ID)
+                return
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Failed to renew lease for scheduled tx %s", tx_id)
+
+
+async def _run_tx_ordered(bot: AiogramBot, tx: dict, admin_target: Optional[str]) -> Optional[bool]:
+    """Klaim lalu eksekusi tx; return True jika ditunda (lihat _process_tx)."""
+    key = str(tx.get("msisdn") or f"tx-{tx.get('id')}")
+    lock = _msisdn_locks.get(key)
+    if lock is None:
+        lock = _msisdn_locks[key] = asyncio.Lock()
+    _msisdn_waiters[key] = _msisdn_waiters.get(key, 0) + 1
+    try:
+        async with lock:
+            claimed = await claim_pending_by_ids([int(tx["id"])], WORKER_ID, LEASE_SECONDS)
+            if not claimed:
+                # sudah diklaim worker/proses lain, atau tidak pending lagi
+                _stats["skipped_claimed"] += 1
+                logger.info("Scheduled tx %s already claimed or no longer pending; skipped by %s", tx.get("id"), WORKER_ID)
+                return
+            heartbeat = asyncio.create_task(_renew_lease_loop(int(tx["id"])))
             try:
-                from zoneinfo import ZoneInfo  # Python 3.9+
-                now = datetime.now(ZoneInfo("Asia/Jakarta"))
-                now_iso = now.strftime("%Y-%m-%d %H:%M:%S")
-            except Exception:
-                try:
-                    import pytz  # type: ignore
-                    tz = pytz.timezone("Asia/Jakarta")
-                    now = datetime.now(tz)
-                    now_iso = now.strftime("%Y-%m-%d %H:%M:%S")
-                except Exception:
-                    now_iso = (datetime.utcnow() + timedelta(hours=7)).strftime("%Y-%m-%d %H:%M:%S")
+                return await _process_tx(bot, claimed[0], admin_target)
+            finally:
+                heartbeat.cancel()
+    finally:
+        _msisdn_waiters[key] -= 1
+        if _msisdn_waiters[key] <= 0:
+            _msisdn_waiters.pop(key, None)
+            _msisdn_locks.pop(key, None)
 
-            due = list_pending_due(now_iso)
-            if due:
-                logger.info("Found %s scheduled transactions due at %s (Asia/Jakarta)", len(due), now_iso)
-                for tx in due:
-                    try:
-                        await _process_tx(bot, tx, admin_target)
-                    except Exception:
-                        logger.exception("Error processing scheduled tx %s", tx.get("id"))
+
+async def _wait_supplier_available() -> None:
+    """Jeda worker selama circuit breaker settlement open (supplier gangguan)."""
+    if supplier.is_available("settlement"):
+        return
+    if not _stats["paused"]:
+        _stats["paused"] = True
+        logger.warning("Scheduled processor paused: supplier settlement circuit is open")
+    await supplier.wait_until_available("settlement")
+    if _stats["paused"]:
+        _stats["paused"] = False
+        logger.info("Scheduled processor resumed: settlement circuit allows requests again")
+
+
+async def _worker(bot: AiogramBot, admin_target: Optional[str]) -> None:
+    while True:
+        tx = await _queue.get()
+        tx_id = int(tx.get("id"))
+        deferred = False
+        try:
+            await _wait_supplier_available()
+            _stats["active"] += 1
+            try:
+                deferred = bool(await _run_tx_ordered(bot, tx, admin_target))
+            finally:
+                _stats["active"] -= 1
+            if deferred:
+                _stats["deferred"] += 1
+            else:
+                _stats["processed"] += 1
+        except asyncio.CancelledError:
+            raise
         except Exception:
-            logger.exception("Scheduled worker loop exception")
-        await asyncio.sleep(interval_seconds)
+            _stats["errors"] += 1
+            logger.exception("Error processing scheduled tx %s", tx_id)
+        finally:
+            _inflight.discard(tx_id)
+            _queue.task_done()
+            if deferred:
+                schedule_transaksi(tx_id, tx.get("waktu_pembelian"))
 
 
-def start_transaksi_processor(bot: AiogramBot, interval_seconds: int = 30):
-    global _worker_task
+async def _stats_logger() -> None:
+    last_processed = 0
+    while True:
+        await asyncio.sleep(STATS_LOG_SECONDS)
+        st = get_processor_stats()
+        if st["processed"] != last_processed or st["queue_depth"] or st["active"]:
+            uc = user_cache.stats()
+            lc = lookup_cache.stats()
+            sf = supplier.get_single_flight_stats()
+            logger.info(
+                "Scheduled processor stats: processed=%s (+%s in %ss) errors=%s active=%s/%s queue_depth=%s scheduled=%s throughput_per_min=%s user_cache=%s/%s hit_ratio=%.2f lookup_cache=%s/%s hit_ratio=%.2f api_coalesced=%s/%s",
+                st["processed"], st["processed"] - last_processed, STATS_LOG_SECONDS, st["errors"], st["active"],
+                st["concurrency"], st["queue_depth"], st["scheduled"], st.get("throughput_per_min"),
+                uc["hits"], uc["misses"], uc["hit_ratio"], lc["hits"], lc["misses"], lc["hit_ratio"],
+                sf["coalesced"], sf["calls"],
+            )
+        last_processed = st["processed"]
+
+
+async def _process_due_loop(bot: AiogramBot, resync_seconds: int = RESYNC_SECONDS, concurrency: Optional[int] = None):
+    global _queue
+    admin_target = _admin_target_from_setup()
+    concurrency = concurrency or _concurrency_from_setup()
+    _queue = asyncio.Queue()
+    _stats.update(concurrency=concurrency, started_at=time.time())
+    helpers = [asyncio.create_task(_worker(bot, admin_target), name=f"transaksi_worker_{i}") for i in range(concurrency)]
+    helpers.append(asyncio.create_task(_stats_logger(), name="transaksi_stats"))
+    logger.info(
+        "Scheduled transactions processor started (event-driven, worker_id=%s, concurrency=%s, resync_seconds=%s) using timezone Asia/Jakarta",
+        WORKER_ID, concurrency, resync_seconds
+    )
+
+    next_resync = 0.0
+    next_reap = 0.0
+    try:
+        while True:
+            try:
+                now = time.time()
+                if now >= next_reap:
+                    reaped, unknown_ids = await reap_expired_leases(now)
+                    if unknown_ids:
+                        _stats["unknown"] += len(unknown_ids)
+                        logger.error(
+                            "Scheduled transactions %s lost their worker after settlement was sent; "
+                            "marked 'unknown' for manual review (not retried, not refunded)", unknown_ids
+                        )
+                    if reaped:
+                        _stats["reaped"] += reaped
+                        logger.warning("Reaped %s scheduled transactions with expired leases back to pending", reaped)
+                        next_resync = now  # jadwalkan ulang baris yang baru dikembalikan
+                    next_reap = now + REAP_SECONDS
+                if now >= next_resync:
+                    await _resync_from_db()
+                    next_resync = now + resync_seconds
+
+                due_ids = _pop_due(time.time())
+                if due_ids:
+                    # baca ulang dari DB: hanya yang masih pending yang dieksekusi
+                    due = await list_pending_by_ids(due_ids)
+                    for tx in due:
+                        tx_id = int(tx["id"])
+                        if tx_id in _inflight:
+                            continue
+                        _inflight.add(tx_id)
+                        _stats["enqueued"] += 1
+                        _queue.put_nowait(tx)
+                    logger.info("Queued %s due scheduled transactions (queue_depth=%s, active=%s)",
+                                len(due), _queue.qsize(), _stats["active"])
+                    continue
+
+                deadline = _next_deadline()
+                timeout = min(next_resync, next_reap) - time.time()
+                if deadline is not None:
+                    timeout = min(timeout, deadline - time.time())
+                if timeout > 0:
+                    _wakeup.clear()
+                    try:
+                        await asyncio.wait_for(_wakeup.wait(), timeout=timeout)
+                    except asyncio.TimeoutError:
+                        pass
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Scheduled worker loop exception")
+                await asyncio.sleep(1)
+    finally:
+        for t in helpers:
+            t.cancel()
+        await asyncio.gather(*helpers, return_exceptions=True)
+
+
+def start_transaksi_processor(bot: AiogramBot, resync_seconds: int = RESYNC_SECONDS, concurrency: Optional[int] = None):
+    global _worker_task, _wakeup
     try:
         loop = asyncio.get_running_loop()
     except RuntimeError:
         loop = asyncio.get_event_loop()
 
     if _worker_task is None or _worker_task.done():
-        _worker_task = loop.create_task(_process_due_loop(bot, interval_seconds))
+        _wakeup = asyncio.Event()
+        _worker_task = loop.create_task(_process_due_loop(bot, resync_seconds, concurrency))
         logger.info("Scheduled transactions processor task created: %s", _worker_task)
     else:
         logger.info("Scheduled transactions processor already running: %s", _worker_task)
@@ -795,4 +1093,4 @@ def stop_transaksi_processor():
     if _worker_task and not _worker_task.done():
         _worker_task.cancel()
         _worker_task = None
-        logger.info("Scheduled transactions processor stopped")
\ No newline at end of file
+        logger.info("Scheduled transactions processor stopped")
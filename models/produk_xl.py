@@ -1,27 +1,12 @@
-import sqlite3
-import os
 import math
 
-DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "database.db")
+from data import catalog_cache
+from data.connection import get_connection, transaction
+from data.migrations import run_migrations
 
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS produk_xl (
-            id TEXT PRIMARY KEY,
-            nama_produk TEXT,
-            kategori TEXT,
-            produk_kode TEXT,
-            harga INTEGER,
-            harga_jual INTEGER,
-            total_amount INTEGER,
-            deskripsi TEXT,
-            status TEXT
-        )
-    """)
-    conn.commit()
-    conn.close()
+    # skema dikelola data.migrations (tabel produk_xl dibuat di migrasi 1)
+    run_migrations()
 
 def insert_or_update_produk(produk: dict):
     """
@@ -30,100 +15,253 @@ def insert_or_update_produk(produk: dict):
     - Jika harga_jual saat ini < harga_jual_baru (dari API), maka update harga dan harga_jual saja.
     - Field lain seperti produk_kode, total_amount, status tetap diupdate.
     """
-    import sqlite3
-    import math
-
-    DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "database.db")
     harga_baru = int(produk["harga"])
     harga_jual_baru = math.ceil(harga_baru * 1.3)
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    # Cek apakah produk sudah ada
-    c.execute("SELECT harga, harga_jual FROM produk_xl WHERE id = ?", (produk["id"],))
-    row = c.fetchone()
-    if row:
-        harga_lama, harga_jual_lama = row
-        # Jika harga_jual_lama < harga_jual_baru, update harga dan harga_jual SAJA
-        if harga_jual_lama < harga_jual_baru:
-            c.execute("""
-                UPDATE produk_xl SET
-                    harga = ?,
-                    harga_jual = ?,
-                    produk_kode = ?,
-                    total_amount = ?,
-                    status = ?
-                WHERE id = ?
-            """, (
-                harga_baru,
-                harga_jual_baru,
-                produk["produk_kode"],
-                int(produk["total_amount"]),
-                produk.get("status", "active"),
-                produk["id"]
-            ))
+    with transaction() as c:
+        # Cek apakah produk sudah ada
+        c.execute("SELECT harga, harga_jual FROM produk_xl WHERE id = ?", (produk["id"],))
+        row = c.fetchone()
+        if row:
+            harga_lama, harga_jual_lama = row
+            # Jika harga_jual_lama < harga_jual_baru, update harga dan harga_jual SAJA
+            if harga_jual_lama < harga_jual_baru:
+                c.execute("""
+                    UPDATE produk_xl SET
+                        harga = ?,
+                        harga_jual = ?,
+                        produk_kode = ?,
+                        total_amount = ?,
+                        status = ?
+                    WHERE id = ?
+                """, (
+                    harga_baru,
+                    harga_jual_baru,
+                    produk["produk_kode"],
+                    int(produk["total_amount"]),
+                    produk.get("status", "active"),
+                    produk["id"]
+                ))
+            else:
+                # Update field lain, TIDAK mengubah harga, harga_jual, nama_produk, kategori, deskripsi
+                c.execute("""
+                    UPDATE produk_xl SET
+                        produk_kode = ?,
+                        total_amount = ?,
+                        status = ?
+                    WHERE id = ?
+                """, (
+                    produk["produk_kode"],
+                    int(produk["total_amount"]),
+                    produk.get("status", "active"),
+                    produk["id"]
+                ))
         else:
-            # Update field lain, TIDAK mengubah harga, harga_jual, nama_produk, kategori, deskripsi
+            # Insert baru, harga_jual = harga + 30%
             c.execute("""
-                UPDATE produk_xl SET
-                    produk_kode = ?,
-                    total_amount = ?,
-                    status = ?
-                WHERE id = ?
+                INSERT INTO produk_xl (id, nama_produk, kategori, produk_kode, harga, harga_jual, total_amount, deskripsi, status)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
+                produk["id"],
+                produk["nama_produk"],
+                produk["kategori"],
                 produk["produk_kode"],
+                harga_baru,
+                harga_jual_baru,
                 int(produk["total_amount"]),
-                produk.get("status", "active"),
-                produk["id"]
+                produk.get("deskripsi", ""),
+                produk.get("status", "active")
             ))
-    else:
-        # Insert baru, harga_jual = harga + 30%
-        c.execute("""
-            INSERT INTO produk_xl (id, nama_produk, kategori, produk_kode, harga, harga_jual, total_amount, deskripsi, status)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            produk["id"],
+    catalog_cache.bump_version()
+
+# Aturan harga sama dengan insert_or_update_produk: produk baru harga_jual = harga + 30%;
+# produk lama hanya mengganti harga/harga_jual jika harga_jual baru lebih tinggi, dan tidak
+# pernah mengubah nama_produk, kategori, deskripsi.
+_UPSERT_SQL = """
+    INSERT INTO produk_xl (id, nama_produk, kategori, produk_kode, harga, harga_jual, total_amount, deskripsi, status)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        harga = CASE WHEN COALESCE(produk_xl.harga_jual, -1) < excluded.harga_jual
+                     THEN excluded.harga ELSE produk_xl.harga END,
+        harga_jual = CASE WHEN COALESCE(produk_xl.harga_jual, -1) < excluded.harga_jual
+                          THEN excluded.harga_jual ELSE produk_xl.harga_jual END,
+        produk_kode = excluded.produk_kode,
+        total_amount = excluded.total_amount,
+        status = excluded.status
+"""
+
+# batas jumlah parameter per query IN (...) agar aman untuk SQLite lama (limit 999)
+_IN_CHUNK = 500
+
+
+def _rows_from_api(list_produk: list) -> list:
+    rows = []
+    for produk in list_produk:
+        harga_baru = int(produk["harga"])
+        rows.append((
+            str(produk["id"]),
             produk["nama_produk"],
             produk["kategori"],
             produk["produk_kode"],
             harga_baru,
-            harga_jual_baru,
+            math.ceil(harga_baru * 1.3),
             int(produk["total_amount"]),
             produk.get("deskripsi", ""),
-            produk.get("status", "active")
+            produk.get("status", "active"),
         ))
-    conn.commit()
-    conn.close()
+    return rows
+
+
+def _upsert_changed(c, rows: list) -> dict:
+    """
+    Bandingkan rows dengan isi DB lalu tulis HANYA baris yang baru / berubah (satu
+    executemany di cursor/transaksi pemanggil). Return ringkasan seperti bulk_upsert_produk.
+    """
+    summary = {"total": len(rows), "inserted": [], "harga_naik": [], "updated": [], "unchanged": 0}
+    if not rows:
+        return summary
+    ids = [r[0] for r in rows]
+    existing = {}
+    for i in range(0, len(ids), _IN_CHUNK):
+        chunk = ids[i:i + _IN_CHUNK]
+        c.execute(
+            f"SELECT id, harga_jual, produk_kode, total_amount, status FROM produk_xl "
+            f"WHERE id IN ({','.join('?' for _ in chunk)})",
+            chunk,
+        )
+        existing.update({str(r[0]): r[1:] for r in c.fetchall()})
+
+    changed = []
+    for r in rows:
+        old = existing.get(r[0])
+        if old is None:
+            summary["inserted"].append(r[0])
+        else:
+            harga_jual_lama, kode_lama, total_lama, status_lama = old
+            if (harga_jual_lama if harga_jual_lama is not None else -1) < r[5]:
+                summary["harga_naik"].append(r[0])
+            elif (kode_lama, total_lama, status_lama) != (r[3], r[6], r[8]):
+                summary["updated"].append(r[0])
+            else:
+                summary["unchanged"] += 1
+                continue
+        changed.append(r)
+    if changed:
+        c.executemany(_UPSERT_SQL, changed)
+    return summary
+
+
+def _bump_if_changed(summary: dict) -> None:
+    if summary["inserted"] or summary["harga_naik"] or summary["updated"] or summary.get("deleted"):
+        catalog_cache.bump_version()
+
+
+def bulk_upsert_produk(list_produk: list) -> dict:
+    """
+    Simpan banyak produk sekaligus dalam SATU transaksi (executemany + ON CONFLICT DO UPDATE).
+    Produk yang datanya sama dengan DB tidak ditulis ulang.
+
+    Return ringkasan perubahan:
+      {"total": n, "inserted": [id...], "harga_naik": [id...], "updated": [id...], "unchanged": n}
+    updated = produk lama yang produk_kode/total_amount/status-nya berubah (tanpa kenaikan harga).
+    """
+    rows = _rows_from_api(list_produk)
+    if not rows:
+        return {"total": 0, "inserted": [], "harga_naik": [], "updated": [], "unchanged": 0}
+    with transaction() as c:
+        summary = _upsert_changed(c, rows)
+    _bump_if_changed(summary)
+    return summary
+
+
+def get_sync_state() -> dict:
+    """
+    State sinkronisasi terakhir per kategori:
+      {kategori: {"content_hash", "etag", "last_modified", "produk_count", "updated_at"}}
+    """
+    c = get_connection().execute(
+        "SELECT kategori, content_hash, etag, last_modified, produk_count, updated_at FROM produk_sync_state"
+    )
+    return {
+        r[0]: {
+            "content_hash": r[1],
+            "etag": r[2],
+            "last_modified": r[3],
+            "produk_count": r[4],
+            "updated_at": r[5],
+        }
+        for r in c.fetchall()
+    }
+
+
+def sinkron_kategori_produk(kategori, list_produk, content_hash, etag=None, last_modified=None) -> dict:
+    """
+    Terapkan list produk SATU kategori yang isinya berubah (hash beda dari sync terakhir):
+    tulis hanya baris baru/berubah dan simpan hash/etag baru, dalam satu transaksi.
+
+    Return ringkasan bulk_upsert_produk ditambah:
+      "nama": {id: nama_produk} untuk produk di list,
+      "missing": [(id, nama_produk)...] produk kategori ini di DB yang tidak ada lagi di API
+                 (tidak dihapus, hanya dilaporkan),
+      "count_before": jumlah produk kategori ini di DB sebelum sync.
+    """
+    rows = _rows_from_api(list_produk)
+    ids_api = {r[0] for r in rows}
+    with transaction() as c:
+        c.execute("SELECT id, nama_produk FROM produk_xl WHERE kategori = ? ORDER BY id", (kategori,))
+        db_produk = [(str(r[0]), r[1]) for r in c.fetchall()]
+        summary = _upsert_changed(c, rows)
+        c.execute(
+            """
+            INSERT INTO produk_sync_state (kategori, content_hash, etag, last_modified, produk_count, updated_at)
+            VALUES (?, ?, ?, ?, ?, datetime('now'))
+            ON CONFLICT(kategori) DO UPDATE SET
+                content_hash = excluded.content_hash,
+                etag = excluded.etag,
+                last_modified = excluded.last_modified,
+                produk_count = excluded.produk_count,
+                updated_at = excluded.updated_at
+            """,
+            (kategori, content_hash, etag, last_modified, len(rows)),
+        )
+    _bump_if_changed(summary)
+    summary["nama"] = {r[0]: r[1] for r in rows}
+    summary["missing"] = [(i, nama) for i, nama in db_produk if i not in ids_api]
+    summary["count_before"] = len(db_produk)
+    return summary
+
 
 def sinkronisasi_produk_xl(list_produk_api):
     """
     Sinkronisasi data produk:
-    - Hanya insert/update produk yang ada di list_produk_api (menggunakan insert_or_update_produk)
+    - Hanya insert/update produk yang ada di list_produk_api (seperti bulk_upsert_produk)
     - Hapus produk di database yang id-nya TIDAK ada di list_produk_api
+    Keduanya dalam satu transaksi.
+    Return ringkasan bulk_upsert_produk ditambah "deleted": [id...].
     """
     ids_api = set(str(produk["id"]) for produk in list_produk_api)
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    # Ambil semua id produk di database
-    c.execute("SELECT id FROM produk_xl")
-    ids_db = set(row[0] for row in c.fetchall())
-    # Hapus produk yang sudah tidak ada di API
-    ids_to_delete = ids_db - ids_api
-    if ids_to_delete:
-        c.executemany("DELETE FROM produk_xl WHERE id = ?", [(id_,) for id_ in ids_to_delete])
-    conn.commit()
-    conn.close()
-    # Insert/update produk dari API
-    for produk in list_produk_api:
-        insert_or_update_produk(produk)
+    rows = _rows_from_api(list_produk_api)
+    # hapus + upsert dalam SATU transaksi: katalog tidak pernah setengah tersinkron
+    with transaction() as c:
+        # Ambil semua id produk di database
+        c.execute("SELECT id FROM produk_xl")
+        ids_db = set(row[0] for row in c.fetchall())
+        # Hapus produk yang sudah tidak ada di API
+        ids_to_delete = ids_db - ids_api
+        if ids_to_delete:
+            c.executemany("DELETE FROM produk_xl WHERE id = ?", [(id_,) for id_ in ids_to_delete])
+        # Insert/update produk dari API
+        if rows:
+            summary = _upsert_changed(c, rows)
+        else:
+            summary = {"total": 0, "inserted": [], "harga_naik": [], "updated": [], "unchanged": 0}
+    summary["deleted"] = sorted(ids_to_delete)
+    _bump_if_changed(summary)
+    return summary
 
 def get_produk_by_kategori(kategori):
     """
     Ambil semua produk di kategori tertentu dari database.
     Return list of tuple: (id, nama_produk)
     """
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT id, nama_produk FROM produk_xl WHERE kategori=? ORDER BY id", (kategori,))
-    result = c.fetchall()
-    conn.close()
-    return result
\ No newline at end of file
+    c = get_connection().execute("SELECT id, nama_produk FROM produk_xl WHERE kategori=? ORDER BY id", (kategori,))
+    return c.fetchall()
@@ -1,50 +1,14 @@
-import sqlite3
-import os
 from typing import Optional, List, Tuple, Any
 
-# DB path (sama seperti file lain di project)
-DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "database.db")
-
-def _ensure_data_dir():
-    data_dir = os.path.dirname(DB_PATH)
-    os.makedirs(data_dir, exist_ok=True)
+from data.connection import get_connection, transaction
+from data.migrations import run_migrations
 
 def init_db():
     """
-    Membuat tabel riwayat_transaksi jika belum ada.
-    Dipanggil otomatis saat module di-import dan juga sebelum operasi insert.
+    Skema tabel riwayat_transaksi dikelola data.migrations (dijalankan sekali saat startup).
+    Fungsi ini dipertahankan untuk pemanggil lama.
     """
-    _ensure_data_dir()
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS riwayat_transaksi (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id TEXT,
-            msisdn TEXT,
-            produk_id TEXT,
-            produk_nama TEXT,
-            kategori TEXT,
-            harga_jual INTEGER,
-            metode_pembayaran TEXT,
-            amount_charged INTEGER,
-            saldo_tersisa REAL,
-            trx_id TEXT,
-            status TEXT,
-            waktu TEXT DEFAULT CURRENT_TIMESTAMP,
-            keterangan TEXT
-        )
-    """)
-    conn.commit()
-    conn.close()
-
-# Pastikan tabel dibuat saat module diimport (mencegah OperationalError: no such table)
-try:
-    init_db()
-except Exception:
-    # jangan mem-blok app jika pembuatan tabel gagal di import-time,
-    # tapi insert_riwayat juga akan memanggil init_db() sebelum insert.
-    pass
+    run_migrations()
 
 def insert_riwayat(
     user_id: str,
@@ -61,14 +25,9 @@ def insert_riwayat(
     keterangan: Optional[str] = None
 ) -> None:
     """
-    Menyimpan satu riwayat transaksi. Memastikan tabel ada sebelum insert.
+    Menyimpan satu riwayat transaksi.
     """
-    # Pastikan tabel ada
-    init_db()
-
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    try:
+    with transaction() as c:
         c.execute("""
             INSERT INTO riwayat_transaksi
             (user_id, msisdn, produk_id, produk_nama, kategori, harga_jual, metode_pembayaran,
@@ -78,42 +37,58 @@ def insert_riwayat(
             user_id, msisdn, produk_id, produk_nama, kategori, harga_jual, metode_pembayaran,
             amount_charged, saldo_tersisa, trx_id, status, keterangan
         ))
-        conn.commit()
-    finally:
-        conn.close()
 
 def get_riwayat_by_user(user_id: str, limit: int = 20) -> List[Tuple[Any, ...]]:
     """
     Mengambil riwayat transaksi terakhir untuk user tertentu.
     """
-    # Pastikan tabel ada sehingga query tidak melempar OperationalError
-    init_db()
-
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
+    c = get_connection().execute("""
         SELECT id, waktu, produk_nama, metode_pembayaran, amount_charged, saldo_tersisa, trx_id, status, keterangan
         FROM riwayat_transaksi
         WHERE user_id = ?
         ORDER BY waktu DESC
         LIMIT ?
     """, (user_id, limit))
-    result = c.fetchall()
-    conn.close()
-    return result
+    return c.fetchall()
+
+def get_riwayat_page(
+    user_id: str,
+    limit: int = 10,
+    cursor: Optional[int] = None,
+    direction: str = "next",
+) -> Tuple[List[Tuple[Any, ...]], Optional[int], Optional[int]]:
+    """
+    Pagination keyset riwayat transaksi user (terbaru dulu, index user_id + id).
+    cursor: id baris batas halaman sebelumnya; direction "next" = lebih lama, "prev" = lebih baru.
+    Return (rows, prev_cursor, next_cursor); kolom rows sama dengan get_riwayat_by_user.
+    """
+    cols = (
+        "SELECT id, waktu, produk_nama, metode_pembayaran, amount_charged, saldo_tersisa, trx_id, status, keterangan "
+        "FROM riwayat_transaksi WHERE user_id = ?"
+    )
+    conn = get_connection()
+    if cursor is None:
+        rows = conn.execute(f"{cols} ORDER BY id DESC LIMIT ?", (user_id, limit + 1)).fetchall()
+        has_prev, has_next = False, len(rows) > limit
+        rows = rows[:limit]
+    elif direction == "prev":
+        rows = conn.execute(f"{cols} AND id > ? ORDER BY id ASC LIMIT ?", (user_id, cursor, limit + 1)).fetchall()
+        has_prev, has_next = len(rows) > limit, True
+        rows = list(reversed(rows[:limit]))
+    else:
+        rows = conn.execute(f"{cols} AND id < ? ORDER BY id DESC LIMIT ?", (user_id, cursor, limit + 1)).fetchall()
+        has_prev, has_next = True, len(rows) > limit
+        rows = rows[:limit]
+    if not rows:
+        return rows, None, None
+    return rows, (rows[0][0] if has_prev else None), (rows[-1][0] if has_next else None)
 
 def get_riwayat_by_trx_id(trx_id: str) -> Optional[Tuple[Any, ...]]:
     """
     Mengambil detail transaksi berdasarkan trx_id.
     """
-    init_db()
-
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
+    c = get_connection().execute("""
         SELECT * FROM riwayat_transaksi
         WHERE trx_id = ?
     """, (trx_id,))
-    result = c.fetchone()
-    conn.close()
-    return result
\ No newline at end of file
+    return c.fetchone()
@@ -1,50 +1,25 @@
 from __future__ import annotations
-import os
-import sqlite3
-from typing import Optional, List, Dict, Any
+import time
+from typing import Optional, List, Dict, Any, Tuple, Union
 
-DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "database.db")
+from data import database as _db
+from data.connection import get_connection, transaction
+from data.migrations import run_migrations
 
 
-def _ensure_db_dir():
-    data_dir = os.path.dirname(DB_PATH)
-    os.makedirs(data_dir, exist_ok=True)
+# waktu_pembelian disimpan sebagai waktu lokal Asia/Jakarta (UTC+7, tanpa DST)
+_DUE_EPOCH_SQL = "CAST(strftime('%s', {col}, '-7 hours') AS INTEGER)"
 
 
-def init_db() -> None:
-    _ensure_db_dir()
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    # Create table with msisdn column. If table exists but missing column, add it.
-    c.execute(
-        """
-        CREATE TABLE IF NOT EXISTS transaksi_terjadwal (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            userid INTEGER NOT NULL,
-            produk_id TEXT,
-            produk_nama TEXT,
-            kategori TEXT,
-            harga_jual INTEGER,
-            metode_pembayaran TEXT,
-            msisdn TEXT,
-            waktu_pembelian TEXT,
-            status TEXT DEFAULT 'pending',
-            created_at TEXT DEFAULT (datetime('now'))
-        )
-        """
-    )
-    # Ensure msisdn column exists for older DBs
-    try:
-        c.execute("PRAGMA table_info(transaksi_terjadwal)")
-        cols = [r[1] for r in c.fetchall()]
-        if "msisdn" not in cols:
-            c.execute("ALTER TABLE transaksi_terjadwal ADD COLUMN msisdn TEXT")
-    except Exception:
-        # ignore if cannot alter
-        pass
+def to_due_epoch(waktu_iso: str) -> Optional[int]:
+    """Epoch detik untuk string waktu Asia/Jakarta (format yang sama dengan waktu_pembelian)."""
+    row = get_connection().execute(f"SELECT {_DUE_EPOCH_SQL.format(col='?')}", (waktu_iso,)).fetchone()
+    return row[0] if row else None
 
-    conn.commit()
-    conn.close()
+
+def init_db() -> None:
+    """Skema dikelola data.migrations; fungsi ini dipertahankan untuk pemanggil lama."""
+    run_migrations()
 
 
 def create_transaksi(
@@ -58,33 +33,25 @@ def create_transaksi(
     msisdn: Optional[str] = None,
     status: str = "pending",
 ) -> int:
-    init_db()
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute(
-        """
-        INSERT INTO transaksi_terjadwal
-        (userid, produk_id, produk_nama, kategori, harga_jual, metode_pembayaran, msisdn, waktu_pembelian, status)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-        (userid, produk_id, produk_nama, kategori, harga_jual, metode_pembayaran, msisdn, waktu_pembelian_iso, status),
-    )
-    conn.commit()
-    rowid = c.lastrowid
-    conn.close()
+    with transaction() as c:
+        c.execute(
+            """
+            INSERT INTO transaksi_terjadwal
+            (userid, produk_id, produk_nama, kategori, harga_jual, metode_pembayaran, msisdn, waktu_pembelian, status, due_at_epoch)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, {due_epoch})
+            """.format(due_epoch=_DUE_EPOCH_SQL.format(col="?")),
+            (userid, produk_id, produk_nama, kategori, harga_jual, metode_pembayaran, msisdn, waktu_pembelian_iso, status, waktu_pembelian_iso),
+        )
+        rowid = c.lastrowid
     return rowid
 
 
 def get_transaksi_by_id(tx_id: int) -> Optional[Dict[str, Any]]:
-    init_db()
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute(
+    c = get_connection().execute(
         "SELECT id, userid, produk_id, produk_nama, kategori, harga_jual, metode_pembayaran, msisdn, waktu_pembelian, status, created_at FROM transaksi_terjadwal WHERE id = ?",
         (tx_id,),
     )
     row = c.fetchone()
-    conn.close()
     if not row:
         return None
     return {
@@ -103,15 +70,11 @@ def get_transaksi_by_id(tx_id: int) -> Optional[Dict[str, Any]]:
 
 
 def get_transaksi_by_user(userid: int, limit: int = 50) -> List[Dict[str, Any]]:
-    init_db()
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute(
+    c = get_connection().execute(
         "SELECT id, userid, produk_id, produk_nama, kategori, harga_jual, metode_pembayaran, msisdn, waktu_pembelian, status, created_at FROM transaksi_terjadwal WHERE userid = ? ORDER BY waktu_pembelian DESC LIMIT ?",
         (userid, limit),
     )
     rows = c.fetchall()
-    conn.close()
     out = []
     for r in rows:
         out.append({
@@ -130,16 +93,78 @@ def get_transaksi_by_user(userid: int, limit: int = 50) -> List[Dict[str, Any]]:
     return out
 
 
-def list_pending_due(before_iso: str) -> List[Dict[str, Any]]:
-    init_db()
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute(
-        "SELECT id, userid, produk_id, produk_nama, kategori, harga_jual, metode_pembayaran, msisdn, waktu_pembelian, status, created_at FROM transaksi_terjadwal WHERE status = 'pending' AND datetime(waktu_pembelian) <= datetime(?) ORDER BY waktu_pembelian ASC",
-        (before_iso,),
+def list_pending_due(before: Union[str, int, float]) -> List[Dict[str, Any]]:
+    """Transaksi pending yang jatuh tempo sebelum `before` (string waktu Asia/Jakarta atau epoch detik)."""
+    before_epoch = before if isinstance(before, (int, float)) else to_due_epoch(before)
+    c = get_connection().execute(
+        "SELECT id, userid, produk_id, produk_nama, kategori, harga_jual, metode_pembayaran, msisdn, waktu_pembelian, status, created_at "
+        "FROM transaksi_terjadwal WHERE status = 'pending' AND due_at_epoch <= ? ORDER BY due_at_epoch ASC, id ASC",
+        (before_epoch,),
+    )
+    rows = c.fetchall()
+    return [
+        {
+            "id": r[0],
+            "userid": r[1],
+            "produk_id": r[2],
+            "produk_nama": r[3],
+            "kategori": r[4],
+            "harga_jual": r[5],
+            "metode_pembayaran": r[6],
+            "msisdn": r[7],
+            "waktu_pembelian": r[8],
+            "status": r[9],
+            "created_at": r[10],
+        }
+        for r in rows
+    ]
+
+
+def list_pending(limit: Optional[int] = None, userid: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Transaksi berstatus pending (jadwal terakhir dulu), semua user atau satu userid."""
+    q = (
+        "SELECT id, userid, produk_id, produk_nama, kategori, harga_jual, metode_pembayaran, msisdn, waktu_pembelian, status, created_at "
+        "FROM transaksi_terjadwal WHERE status = 'pending'"
+    )
+    params: List[Any] = []
+    if userid is not None:
+        q += " AND userid = ?"
+        params.append(userid)
+    q += " ORDER BY due_at_epoch DESC, id DESC"
+    if limit:
+        q += " LIMIT ?"
+        params.append(limit)
+    c = get_connection().execute(q, params)
+    rows = c.fetchall()
+    return [
+        {
+            "id": r[0],
+            "userid": r[1],
+            "produk_id": r[2],
+            "produk_nama": r[3],
+            "kategori": r[4],
+            "harga_jual": r[5],
+            "metode_pembayaran": r[6],
+            "msisdn": r[7],
+            "waktu_pembelian": r[8],
+            "status": r[9],
+            "created_at": r[10],
+        }
+        for r in rows
+    ]
+
+
+def list_pending_by_ids(tx_ids: List[int]) -> List[Dict[str, Any]]:
+    """Transaksi pending dengan id di tx_ids (dipakai scheduler saat deadline tercapai)."""
+    if not tx_ids:
+        return []
+    placeholders = ",".join("?" for _ in tx_ids)
+    c = get_connection().execute(
+        "SELECT id, userid, produk_id, produk_nama, kategori, harga_jual, metode_pembayaran, msisdn, waktu_pembelian, status, created_at "
+        f"FROM transaksi_terjadwal WHERE status = 'pending' AND id IN ({placeholders}) ORDER BY waktu_pembelian ASC, id ASC",
+        tuple(tx_ids),
     )
     rows = c.fetchall()
-    conn.close()
     return [
         {
             "id": r[0],
@@ -158,31 +183,165 @@ def list_pending_due(before_iso: str) -> List[Dict[str, Any]]:
     ]
 
 
-def update_status(tx_id: int, status: str) -> bool:
-    init_db()
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("UPDATE transaksi_terjadwal SET status = ? WHERE id = ?", (status, tx_id))
-    conn.commit()
-    changed = c.rowcount > 0
-    conn.close()
+def claim_pending_by_ids(tx_ids: List[int], worker_id: str, lease_seconds: float) -> List[Dict[str, Any]]:
+    """
+    Klaim atomik transaksi pending: status -> 'processing' dengan claimed_by=worker_id dan
+    lease_expires_at=now+lease_seconds. Hanya baris yang berhasil diklaim worker ini yang
+    dikembalikan, jadi beberapa proses bisa berbagi tabel tanpa eksekusi ganda.
+    """
+    if not tx_ids:
+        return []
+    placeholders = ",".join("?" for _ in tx_ids)
+    lease_expires_at = time.time() + lease_seconds
+    with transaction() as c:
+        c.execute(
+            f"UPDATE transaksi_terjadwal SET status = 'processing', claimed_by = ?, lease_expires_at = ? "
+            f"WHERE status = 'pending' AND id IN ({placeholders})",
+            (worker_id, lease_expires_at, *tx_ids),
+        )
+        if c.rowcount <= 0:
+            return []
+        c.execute(
+            "SELECT id, userid, produk_id, produk_nama, kategori, harga_jual, metode_pembayaran, msisdn, waktu_pembelian, status, created_at "
+            f"FROM transaksi_terjadwal WHERE status = 'processing' AND claimed_by = ? AND id IN ({placeholders}) "
+            "ORDER BY waktu_pembelian ASC, id ASC",
+            (worker_id, *tx_ids),
+        )
+        rows = c.fetchall()
+    return [
+        {
+            "id": r[0],
+            "userid": r[1],
+            "produk_id": r[2],
+            "produk_nama": r[3],
+            "kategori": r[4],
+            "harga_jual": r[5],
+            "metode_pembayaran": r[6],
+            "msisdn": r[7],
+            "waktu_pembelian": r[8],
+            "status": r[9],
+            "created_at": r[10],
+        }
+        for r in rows
+    ]
+
+
+def reap_expired_leases(now: Optional[float] = None) -> Tuple[int, List[int]]:
+    """
+    Tangani baris 'processing' yang lease-nya habis (worker mati):
+    - belum mengirim settlement -> kembali ke 'pending' (aman dieksekusi ulang);
+    - settlement sudah dikirim (settlement_sent_at terisi) -> 'unknown', perlu dicek manual:
+      transaksi mungkin sudah sukses di supplier, jadi tidak boleh diulang atau di-refund.
+    Return (jumlah yang dikembalikan ke pending, [id yang menjadi 'unknown']).
+    """
+    now = time.time() if now is None else now
+    with transaction() as c:
+        c.execute(
+            "UPDATE transaksi_terjadwal SET status = 'unknown', claimed_by = NULL, lease_expires_at = NULL "
+            "WHERE status = 'processing' AND lease_expires_at < ? AND settlement_sent_at IS NOT NULL "
+            "RETURNING id",
+            (now,),
+        )
+        unknown_ids = [r[0] for r in c.fetchall()]
+        c.execute(
+            "UPDATE transaksi_terjadwal SET status = 'pending', claimed_by = NULL, lease_expires_at = NULL "
+            "WHERE status = 'processing' AND lease_expires_at < ?",
+            (now,),
+        )
+        reaped = c.rowcount
+    return reaped, unknown_ids
+
+
+def mark_settlement_sent(tx_id: int, worker_id: str) -> bool:
+    """
+    Tandai (dan commit) bahwa settlement akan dikirim untuk baris yang diklaim worker_id.
+    Dipanggil sebelum request settlement; False jika klaim sudah hilang (jangan kirim).
+    """
+    with transaction() as c:
+        c.execute(
+            "UPDATE transaksi_terjadwal SET settlement_sent_at = ? "
+            "WHERE id = ? AND status = 'processing' AND claimed_by = ?",
+            (time.time(), tx_id, worker_id),
+        )
+        marked = c.rowcount > 0
+    return marked
+
+
+def release_claim(tx_id: int, worker_id: str) -> bool:
+    """Kembalikan baris yang diklaim worker_id ke 'pending' tanpa dieksekusi (mis. supplier gangguan)."""
+    with transaction() as c:
+        c.execute(
+            "UPDATE transaksi_terjadwal SET status = 'pending', claimed_by = NULL, lease_expires_at = NULL, "
+            "settlement_sent_at = NULL "
+            "WHERE id = ? AND status = 'processing' AND claimed_by = ?",
+            (tx_id, worker_id),
+        )
+        released = c.rowcount > 0
+    return released
+
+
+def renew_lease(tx_id: int, worker_id: str, lease_seconds: float) -> bool:
+    """Perpanjang lease baris yang masih diklaim worker_id; False jika klaim sudah hilang."""
+    with transaction() as c:
+        c.execute(
+            "UPDATE transaksi_terjadwal SET lease_expires_at = ? "
+            "WHERE id = ? AND status = 'processing' AND claimed_by = ?",
+            (time.time() + lease_seconds, tx_id, worker_id),
+        )
+        renewed = c.rowcount > 0
+    return renewed
+
+
+def update_status(tx_id: int, status: str, worker_id: Optional[str] = None) -> bool:
+    """
+    Ubah status transaksi. Dengan worker_id, hanya berlaku jika baris masih diklaim
+    worker tersebut (status 'processing'), dan kolom lease dikosongkan sekaligus, sehingga
+    worker yang klaimnya sudah diambil alih tidak menimpa hasil worker lain.
+    """
+    with transaction() as c:
+        if worker_id is None:
+            c.execute("UPDATE transaksi_terjadwal SET status = ? WHERE id = ?", (status, tx_id))
+        else:
+            c.execute(
+                "UPDATE transaksi_terjadwal SET status = ?, claimed_by = NULL, lease_expires_at = NULL "
+                "WHERE id = ? AND status = 'processing' AND claimed_by = ?",
+                (status, tx_id, worker_id),
+            )
+        changed = c.rowcount > 0
     return changed
 
 
+def finish_claim(
+    tx_id: int,
+    worker_id: str,
+    status: str,
+    refund_userid: Any = None,
+    refund_amount: int = 0,
+    reason: Optional[str] = None,
+    ref_trx_id: Optional[str] = None,
+) -> bool:
+    """
+    Tulis status akhir (fenced seperti update_status dengan worker_id) dan, hanya jika
+    klaim masih dipegang worker_id, kembalikan refund_amount ke saldo user, dalam SATU
+    transaksi. Worker yang klaimnya sudah hilang tidak membayar refund sama sekali.
+    Return True jika status (dan refund) tertulis.
+    """
+    with transaction() as c:
+        c.execute(
+            "UPDATE transaksi_terjadwal SET status = ?, claimed_by = NULL, lease_expires_at = NULL "
+            "WHERE id = ? AND status = 'processing' AND claimed_by = ?",
+            (status, tx_id, worker_id),
+        )
+        if c.rowcount != 1:
+            return False
+        if refund_amount:
+            _db.update_user_saldo(refund_userid, refund_amount, reason=reason, ref_trx_id=ref_trx_id)
+    return True
+
+
 def delete_transaksi(tx_id: int) -> bool:
-    init_db()
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("DELETE FROM transaksi_terjadwal WHERE id = ?", (tx_id,))
-    conn.commit()
-    changed = c.rowcount > 0
-    conn.close()
+    with transaction() as c:
+        c.execute("DELETE FROM transaksi_terjadwal WHERE id = ?", (tx_id,))
+        changed = c.rowcount > 0
     return changed
 
-
-# Ensure table exists on import so handlers/workers can use the model immediately
-try:
-    init_db()
-except Exception:
-    # don't block imports if DB creation fails at import-time; functions call init_db() too
-    pass
\ No newline at end of file
@@ -1,6 +1,6 @@
 from aiogram import Router, F
 from aiogram.types import CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
-from models.seting_bot import set_bot_status, get_latest_bot_status_full
+from data.async_database import set_bot_status, get_latest_bot_status_full
 
 router = Router()
 
@@ -23,7 +23,7 @@ def get_status_choice_keyboard():
 
 @router.callback_query(F.data == "seting_status_bot")
 async def ask_bot_status_handler(callback: CallbackQuery):
-    current = get_latest_bot_status_full()
+    current = await get_latest_bot_status_full()
     current_status = current["status"] if current else None
     current_mode = current["private_public"] if current else "public"
     status_text = {
@@ -54,9 +54,9 @@ async def set_bot_status_handler(callback: CallbackQuery):
     }
     status = status_map[callback.data]
     # Ambil mode terakhir
-    current = get_latest_bot_status_full()
+    current = await get_latest_bot_status_full()
     private_public = current["private_public"] if current else "public"
-    set_bot_status(status, private_public)
+    await set_bot_status(status, private_public)
     status_text = {
         "open": "🟢 <b>Open</b> (Bot aktif dan bisa digunakan)",
         "close": "🔴 <b>Close</b> (Bot tidak bisa dipakai user)",
@@ -82,9 +82,9 @@ async def set_bot_mode_handler(callback: CallbackQuery):
     }
     private_public = mode_map[callback.data]
     # Ambil status terakhir
-    current = get_latest_bot_status_full()
+    current = await get_latest_bot_status_full()
     status = current["status"] if current else "open"
-    set_bot_status(status, private_public)
+    await set_bot_status(status, private_public)
     status_text = {
         "open": "🟢 <b>Open</b> (Bot aktif dan bisa digunakan)",
         "close": "🔴 <b>Close</b> (Bot tidak bisa dipakai user)",
@@ -2,30 +2,31 @@ from aiogram import Router, F
 from aiogram.types import CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton, Message
 from aiogram.fsm.context import FSMContext
 from setup.admin_edit_produk import EditProdukStates
-from data.database import get_all_kategori, get_produk_by_kategori, get_produk_detail, get_user
-import sqlite3
-import os
-
-DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "database.db")
-
+from data.async_database import delete_produk
+from helper.keyboard_cache import get_keyboard
+from data.catalog_cache import get_all_kategori, get_produk_by_kategori, get_produk_detail
 router = Router()
 
 
-def get_kategori_keyboard():
-    kategori_list = get_all_kategori()
-    keyboard = []
-    for kategori in kategori_list:
-        keyboard.append([InlineKeyboardButton(text=kategori, callback_data=f"kategori_{kategori}")])
-    keyboard.append([InlineKeyboardButton(text="🔙 Kembali ke Admin", callback_data="admin_start")])
-    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+async def get_kategori_keyboard():
+    async def build():
+        kategori_list = await get_all_kategori()
+        keyboard = []
+        for kategori in kategori_list:
+            keyboard.append([InlineKeyboardButton(text=kategori, callback_data=f"kategori_{kategori}")])
+        keyboard.append([InlineKeyboardButton(text="🔙 Kembali ke Admin", callback_data="admin_start")])
+        return InlineKeyboardMarkup(inline_keyboard=keyboard)
+    return await get_keyboard("admin_daftar_kategori", None, build)
 
-def get_produk_keyboard(kategori):
-    produk_list = get_produk_by_kategori(kategori)
-    keyboard = []
-    for prod_id, nama in produk_list:
-        keyboard.append([InlineKeyboardButton(text=nama, callback_data=f"produk_{prod_id}")])
-    keyboard.append([InlineKeyboardButton(text="🔙 Kembali ke Kategori", callback_data="back_to_kategori")])
-    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+async def get_produk_keyboard(kategori):
+    async def build():
+        produk_list = await get_produk_by_kategori(kategori)
+        keyboard = []
+        for prod_id, nama in produk_list:
+            keyboard.append([InlineKeyboardButton(text=nama, callback_data=f"produk_{prod_id}")])
+        keyboard.append([InlineKeyboardButton(text="🔙 Kembali ke Kategori", callback_data="back_to_kategori")])
+        return InlineKeyboardMarkup(inline_keyboard=keyboard)
+    return await get_keyboard("admin_daftar_produk", kategori, build)
 
 def get_detail_produk_keyboard(prod_id):
     keyboard = [
@@ -52,29 +53,29 @@ async def show_kategori(callback: CallbackQuery, state: FSMContext):
     await state.clear()
     await callback.message.edit_text(
         "Pilih kategori produk:",
-        reply_markup=get_kategori_keyboard()
+        reply_markup=await get_kategori_keyboard()
     )
     await callback.answer()
 
 @router.callback_query(F.data.startswith("kategori_"))
 async def show_produk_by_kategori(callback: CallbackQuery, state: FSMContext):
     kategori = callback.data.replace("kategori_", "", 1)
-    produk_list = get_produk_by_kategori(kategori)
+    produk_list = await get_produk_by_kategori(kategori)
     await state.update_data(last_kategori=kategori)
     if not produk_list:
-        await callback.message.edit_text("Tidak ada produk pada kategori ini.", reply_markup=get_kategori_keyboard())
+        await callback.message.edit_text("Tidak ada produk pada kategori ini.", reply_markup=await get_kategori_keyboard())
         return
     await callback.message.edit_text(
         f"Daftar produk di kategori <b>{kategori}</b>:",
         parse_mode="HTML",
-        reply_markup=get_produk_keyboard(kategori)
+        reply_markup=await get_produk_keyboard(kategori)
     )
     await callback.answer()
 
 @router.callback_query(F.data.startswith("produk_"))
 async def show_produk_detail(callback: CallbackQuery, state: FSMContext):
     produk_id = callback.data.replace("produk_", "", 1)
-    produk = get_produk_detail(produk_id)
+    produk = await get_produk_detail(produk_id)
     if not produk:
         # Ambil kategori terakhir dari FSMContext
         data = await state.get_data()
@@ -82,12 +83,12 @@ async def show_produk_detail(callback: CallbackQuery, state: FSMContext):
         if kategori:
             await callback.message.edit_text(
                 "Produk tidak ditemukan atau sudah dihapus.",
-                reply_markup=get_produk_keyboard(kategori)
+                reply_markup=await get_produk_keyboard(kategori)
             )
         else:
             await callback.message.edit_text(
                 "Produk tidak ditemukan atau sudah dihapus.",
-                reply_markup=get_kategori_keyboard()
+                reply_markup=await get_kategori_keyboard()
             )
         await callback.answer()
         return
@@ -116,12 +117,7 @@ async def show_produk_detail(callback: CallbackQuery, state: FSMContext):
 async def konfirmasi_hapus_produk(callback: CallbackQuery, state: FSMContext):
     produk_id = callback.data.replace("hapus_produk_confirm_", "", 1)
     # Hapus produk
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("DELETE FROM produk_xl WHERE id = ?", (produk_id,))
-    deleted = c.rowcount
-    conn.commit()
-    conn.close()
+    deleted = await delete_produk(produk_id)
     # Ambil kategori terakhir dari FSM
     data = await state.get_data()
     kategori = data.get("last_kategori")
@@ -132,7 +128,7 @@ async def konfirmasi_hapus_produk(callback: CallbackQuery, state: FSMContext):
     await callback.message.edit_text(
         msg,
         parse_mode="HTML",
-        reply_markup=get_produk_keyboard(kategori) if kategori else get_kategori_keyboard()
+        reply_markup=await get_produk_keyboard(kategori) if kategori else await get_kategori_keyboard()
     )
     await callback.answer()
 
@@ -144,12 +140,12 @@ async def batal_hapus_produk(callback: CallbackQuery, state: FSMContext):
         await callback.message.edit_text(
             f"Pilih produk yang ingin dihapus dari kategori <b>{kategori}</b>:",
             parse_mode="HTML",
-            reply_markup=get_produk_keyboard(kategori)
+            reply_markup=await get_produk_keyboard(kategori)
         )
     else:
         await callback.message.edit_text(
             "Pilih kategori produk:",
-            reply_markup=get_kategori_keyboard()
+            reply_markup=await get_kategori_keyboard()
         )
     await callback.answer()
 
@@ -165,7 +161,7 @@ async def hapus_produk_from_daftar(callback: CallbackQuery, state: FSMContext):
     if not produk_id:
         await callback.message.edit_text(
             "Produk tidak valid.",
-            reply_markup=get_produk_keyboard(kategori) if kategori else get_kategori_keyboard()
+            reply_markup=await get_produk_keyboard(kategori) if kategori else await get_kategori_keyboard()
         )
         await callback.answer()
         return
@@ -185,12 +181,12 @@ async def back_to_produk_list(callback: CallbackQuery, state: FSMContext):
         await callback.message.edit_text(
             f"Daftar produk di kategori <b>{kategori}</b>:",
             parse_mode="HTML",
-            reply_markup=get_produk_keyboard(kategori)
+            reply_markup=await get_produk_keyboard(kategori)
         )
     else:
         await callback.message.edit_text(
             "Pilih kategori produk:",
-            reply_markup=get_kategori_keyboard()
+            reply_markup=await get_kategori_keyboard()
         )
     await callback.answer()
 
@@ -198,6 +194,6 @@ async def back_to_produk_list(callback: CallbackQuery, state: FSMContext):
 async def back_to_kategori_list(callback: CallbackQuery, state: FSMContext):
     await callback.message.edit_text(
         "Pilih kategori produk:",
-        reply_markup=get_kategori_keyboard()
+        reply_markup=await get_kategori_keyboard()
     )
     await callback.answer()
\ No newline at end of file
@@ -1,16 +1,12 @@
 from __future__ import annotations
-import os
-import sqlite3
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from html import escape as _escape
 
 from aiogram import Router, F
 from aiogram.types import CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 
-from data.database import DB_PATH
-import models.riwayat_transaksi as rtx
-import models.transaksi_terjadwal as ttx
+from data.async_database import get_users_keyset, get_users_transaction_stats
 
 router = Router()
 logger = logging.getLogger(__name__)
@@ -26,107 +22,63 @@ def _format_currency(value: Optional[int]) -> str:
         return str(value or "-")
 
 
-def _fetch_users_page(page: int = 1, per_page: int = PER_PAGE) -> (List[Dict[str, Any]], int):
+# cursor keyset: (tanggal_daftar, userid) baris batas, lihat data.database.get_users_keyset
+Cursor = Tuple[str, int]
+_CALLBACK_RE = r"^admin_daftar_user(?::([pn]):(\d+):(-?\d+):(.*))?$"
+
+
+async def _fetch_users_page(
+    cursor: Optional[Cursor] = None, direction: str = "next", per_page: int = PER_PAGE
+) -> (List[Dict[str, Any]], Optional[Cursor], Optional[Cursor]):
     """
-    Return (users_list, total_count). Users ordered by tanggal_daftar DESC.
+    Return (users_list, prev_cursor, next_cursor). Users ordered by tanggal_daftar DESC.
+    Keyset pagination: cursor is the (tanggal_daftar, userid) at the page boundary, so deep pages
+    cost the same as page 1 and keep working even if the boundary user is deleted.
     Each user dict: userid, username, saldo, role, tanggal_daftar, status
     """
-    users: List[Dict[str, Any]] = []
-    total = 0
     try:
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        c.execute("SELECT COUNT(1) FROM users")
-        row = c.fetchone()
-        total = int(row[0]) if row else 0
-
-        offset = (page - 1) * per_page
-        c.execute(
-            "SELECT userid, username, saldo, role, tanggal_daftar, status "
-            "FROM users ORDER BY tanggal_daftar DESC LIMIT ? OFFSET ?",
-            (per_page, offset),
-        )
-        rows = c.fetchall()
-        conn.close()
-        for r in rows:
-            users.append({
-                "userid": r[0],
-                "username": r[1],
-                "saldo": r[2],
-                "role": r[3],
-                "tanggal_daftar": r[4],
-                "status": r[5],
-            })
+        return await get_users_keyset(per_page, cursor, direction)
     except Exception:
         logger.exception("Failed to fetch paged users from DB")
-    return users, total
+    return [], None, None
 
 
-def _user_stats(userid: Any) -> Dict[str, Any]:
+async def _page_stats(userids: List[Any]) -> Dict[Any, Dict[str, Any]]:
     """
-    Compute per-user statistics:
+    Compute statistics for all users on the page at once (one grouped query per table):
       - total (from riwayat_transaksi)
       - sukses (riwayat_transaksi)
       - gagal (riwayat_transaksi)
       - pending (from transaksi_terjadwal per user with status='pending')
       - total_amount (sum(amount_charged) from riwayat_transaksi)
     """
-    stats = {"total": 0, "sukses": 0, "gagal": 0, "pending": 0, "total_amount": 0}
     try:
-        # riwayat_transaksi DB
-        dbp = getattr(rtx, "DB_PATH", None) or DB_PATH
-        conn = sqlite3.connect(dbp)
-        c = conn.cursor()
-        # total riwayat
-        c.execute("SELECT COUNT(1) FROM riwayat_transaksi WHERE user_id = ?", (str(userid),))
-        r = c.fetchone()
-        stats["total"] = int(r[0]) if r else 0
-
-        # sukses
-        c.execute("SELECT COUNT(1) FROM riwayat_transaksi WHERE user_id = ? AND lower(status) IN ('sukses','success')", (str(userid),))
-        r = c.fetchone()
-        stats["sukses"] = int(r[0]) if r else 0
-
-        # gagal
-        c.execute("SELECT COUNT(1) FROM riwayat_transaksi WHERE user_id = ? AND lower(status) IN ('gagal','failed','failure','fail')", (str(userid),))
-        r = c.fetchone()
-        stats["gagal"] = int(r[0]) if r else 0
-
-        # total_amount (sum of amount_charged)
-        c.execute("SELECT COALESCE(SUM(amount_charged),0) FROM riwayat_transaksi WHERE user_id = ?", (str(userid),))
-        r = c.fetchone()
-        stats["total_amount"] = int(r[0]) if r and r[0] is not None else 0
-
-        conn.close()
-
-        # pending from transaksi_terjadwal (as requested)
-        dbp2 = getattr(ttx, "DB_PATH", None) or DB_PATH
-        conn2 = sqlite3.connect(dbp2)
-        c2 = conn2.cursor()
-        c2.execute("SELECT COUNT(1) FROM transaksi_terjadwal WHERE userid = ? AND lower(status) = 'pending'", (str(userid),))
-        r2 = c2.fetchone()
-        stats["pending"] = int(r2[0]) if r2 else 0
-        conn2.close()
+        return await get_users_transaction_stats(userids)
     except Exception:
-        logger.exception("Failed to compute stats for user %s", userid)
-    return stats
+        logger.exception("Failed to compute stats for users %s", userids)
+    return {}
+
 
+def _cursor_data(cursor: Cursor) -> str:
+    # tanggal_daftar di posisi terakhir karena bisa mengandung ':'
+    return f"{cursor[1]}:{cursor[0]}"
 
-def _build_pagination_kb(page: int, total_count: int, per_page: int = PER_PAGE) -> InlineKeyboardMarkup:
+
+def _build_pagination_kb(page: int, prev_cursor: Optional[Cursor], next_cursor: Optional[Cursor]) -> InlineKeyboardMarkup:
+    # callback_data membawa cursor: admin_daftar_user:<p|n>:<nomor halaman tujuan>:<userid batas>:<tanggal_daftar batas>
     kb_rows = []
-    total_pages = max(1, (total_count + per_page - 1) // per_page)
     nav_row = []
-    if page > 1:
-        nav_row.append(InlineKeyboardButton(text="⏮️ Prev", callback_data=f"admin_daftar_user:{page-1}"))
-    nav_row.append(InlineKeyboardButton(text=f"Page {page}/{total_pages}", callback_data="noop"))
-    if page < total_pages:
-        nav_row.append(InlineKeyboardButton(text="Next ⏭️", callback_data=f"admin_daftar_user:{page+1}"))
+    if prev_cursor is not None and page > 1:
+        nav_row.append(InlineKeyboardButton(text="⏮️ Prev", callback_data=f"admin_daftar_user:p:{page-1}:{_cursor_data(prev_cursor)}"))
+    nav_row.append(InlineKeyboardButton(text=f"Page {page}", callback_data="noop"))
+    if next_cursor is not None:
+        nav_row.append(InlineKeyboardButton(text="Next ⏭️", callback_data=f"admin_daftar_user:n:{page+1}:{_cursor_data(next_cursor)}"))
     kb_rows.append(nav_row)
     kb_rows.append([InlineKeyboardButton(text="⬅️ Kembali ke Menu Seting User", callback_data="seting_user")])
     return InlineKeyboardMarkup(inline_keyboard=kb_rows)
 
 
-@router.callback_query(F.data.regexp(r"^admin_daftar_user(?::(\d+))?$"))
+@router.callback_query(F.data.regexp(_CALLBACK_RE))
 async def admin_daftar_user_handler(callback: CallbackQuery):
     """
     Paginated admin view of users (PER_PAGE per page).
@@ -137,15 +89,20 @@ async def admin_daftar_user_handler(callback: CallbackQuery):
     await callback.answer()
     # determine page if provided
     import re
-    match = re.match(r"^admin_daftar_user(?::(\d+))?$", callback.data)
+    match = re.match(_CALLBACK_RE, callback.data)
     page = 1
+    cursor: Optional[Cursor] = None
+    direction = "next"
     if match and match.group(1):
-        try:
-            page = max(1, int(match.group(1)))
-        except Exception:
-            page = 1
-
-    users, total_count = _fetch_users_page(page, PER_PAGE)
+        direction = "prev" if match.group(1) == "p" else "next"
+        page = max(1, int(match.group(2)))
+        cursor = (match.group(4), int(match.group(3)))
+
+    users, prev_cursor, next_cursor = await _fetch_users_page(cursor, direction, PER_PAGE)
+    if not users and cursor is not None:
+        # tidak ada lagi user setelah batas (mis. user dihapus): kembali ke halaman pertama
+        page = 1
+        users, prev_cursor, next_cursor = await _fetch_users_page(None, "next", PER_PAGE)
     if not users:
         try:
             await callback.message.edit_text("Tidak ada user terdaftar.", reply_markup=InlineKeyboardMarkup(inline_keyboard=[
@@ -157,6 +114,8 @@ async def admin_daftar_user_handler(callback: CallbackQuery):
             ]))
         return
 
+    page_stats = await _page_stats([u.get("userid") for u in users])
+    empty_stats = {"total": 0, "sukses": 0, "gagal": 0, "pending": 0, "total_amount": 0}
     lines_html: List[str] = []
     for u in users:
         userid = u.get("userid", "-")
@@ -167,7 +126,7 @@ async def admin_daftar_user_handler(callback: CallbackQuery):
         tanggal = u.get("tanggal_daftar") or "-"
         status = u.get("status") or "-"
 
-        stats = _user_stats(userid)
+        stats = page_stats.get(userid) or empty_stats
         total_trx = stats.get("total", 0)
         sukses = stats.get("sukses", 0)
         gagal = stats.get("gagal", 0)
@@ -187,7 +146,7 @@ async def admin_daftar_user_handler(callback: CallbackQuery):
         )
 
     content_html = "<b>Daftar User Terdaftar</b>\n\n" + "\n".join(lines_html)
-    kb = _build_pagination_kb(page, total_count, PER_PAGE)
+    kb = _build_pagination_kb(page, prev_cursor, next_cursor)
     try:
         await callback.message.edit_text(content_html, reply_markup=kb, parse_mode="HTML")
     except Exception:
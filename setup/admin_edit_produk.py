@@ -3,10 +3,8 @@ from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
 from button.admin_set_produk import get_admin_set_produk_keyboard
-import sqlite3
-import os
-
-DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "database.db")
+from data.async_database import update_produk_by_id
+from data.catalog_cache import get_produk_detail
 
 router = Router()
 
@@ -18,44 +16,6 @@ class EditProdukStates(StatesGroup):
     waiting_deskripsi = State()
     waiting_status = State()
 
-def get_produk_by_id(produk_id):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute(
-        "SELECT id, nama_produk, kategori, harga_jual, deskripsi, status FROM produk_xl WHERE id = ?",
-        (produk_id,),
-    )
-    row = c.fetchone()
-    conn.close()
-    if row:
-        return {
-            "id": row[0],
-            "nama_produk": row[1],
-            "kategori": row[2],
-            "harga_jual": row[3],
-            "deskripsi": row[4],
-            "status": row[5],
-        }
-    return None
-
-def update_produk_by_id(produk_id, nama_produk, kategori, harga_jual, deskripsi, status):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute(
-        """
-        UPDATE produk_xl SET
-            nama_produk = ?,
-            kategori = ?,
-            harga_jual = ?,
-            deskripsi = ?,
-            status = ?
-        WHERE id = ?
-        """,
-        (nama_produk, kategori, harga_jual, deskripsi, status, produk_id),
-    )
-    conn.commit()
-    conn.close()
-
 @router.callback_query(F.data == "edit_produk")
 async def admin_edit_produk_menu(callback: CallbackQuery, state: FSMContext):
     await callback.message.edit_text("Masukkan ID produk yang ingin diedit:")
@@ -65,7 +25,7 @@ async def admin_edit_produk_menu(callback: CallbackQuery, state: FSMContext):
 @router.callback_query(F.data.startswith("edit_produk_"))
 async def edit_produk_from_any_menu(callback: CallbackQuery, state: FSMContext):
     produk_id = callback.data.replace("edit_produk_", "", 1).split("_")[0]
-    produk = get_produk_by_id(produk_id)
+    produk = await get_produk_detail(produk_id)
     if not produk:
         await callback.message.answer("Produk dengan ID tersebut tidak ditemukan.")
         return
@@ -87,7 +47,7 @@ async def edit_produk_from_any_menu(callback: CallbackQuery, state: FSMContext):
 @router.message(EditProdukStates.waiting_id)
 async def admin_edit_produk_id(message: Message, state: FSMContext):
     produk_id = message.text.strip()
-    produk = get_produk_by_id(produk_id)
+    produk = await get_produk_detail(produk_id)
     if not produk:
         await message.answer("Produk dengan ID tersebut tidak ditemukan. Silakan masukkan ID yang valid.")
         return
@@ -166,7 +126,7 @@ async def admin_edit_produk_status(message: Message, state: FSMContext):
             return
         await state.update_data(status=status)
     final = await state.get_data()
-    update_produk_by_id(
+    await update_produk_by_id(
         produk_id=final["produk_id"],
         nama_produk=final["nama_produk"],
         kategori=final["kategori"],
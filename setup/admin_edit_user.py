@@ -2,21 +2,25 @@ from aiogram import Router, F
 from aiogram.types import CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton, Message
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
-import sqlite3
-import os
 import re
 import aiohttp
 import asyncio
 import time
 from datetime import datetime
 from zoneinfo import ZoneInfo
-import json
 import logging
 import random
 
+from helper.config import read_setup
+from data.async_database import (
+    get_user,
+    update_user_username,
+    update_user_role,
+    update_user_status,
+    adjust_user_saldo,
+)
+
 logger = logging.getLogger(__name__)
-# Lokasi database
-DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "database.db")
 
 # FSM State group untuk proses edit user
 class EditUserState(StatesGroup):
@@ -56,14 +60,7 @@ TELEGRAM_USERNAME_REGEX = re.compile(r"^(?!.*__)[a-zA-Z0-9_]{5,32}$")
 
 # --- helper: load setup and send notification via notification bot ----------------
 def _load_setup():
-    setup_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "core", "setup.json")
-    if not os.path.exists(setup_path):
-        return {}
-    try:
-        with open(setup_path, "r", encoding="utf-8") as f:
-            return json.load(f) or {}
-    except Exception:
-        return {}
+    return read_setup()
 
 async def _send_notif_message(notif_token: str, chat_id: str, text: str, parse_mode: str = "HTML", max_try: int = 3) -> bool:
     """
@@ -119,11 +116,7 @@ async def process_edit_userid(message: Message, state: FSMContext):
         return
     userid = int(message.text)
     # Cek user ada atau tidak
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT * FROM users WHERE userid = ?", (userid,))
-    user = c.fetchone()
-    conn.close()
+    user = await get_user(userid)
     if not user:
         await message.answer("❗ User ID tidak ditemukan di database.")
         await state.clear()
@@ -194,11 +187,7 @@ async def edit_username(message: Message, state: FSMContext):
         return
     data = await state.get_data()
     userid = data["userid"]
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("UPDATE users SET username = ? WHERE userid = ?", (username, userid))
-    conn.commit()
-    conn.close()
+    await update_user_username(userid, username)
     await message.answer(f"Username user <code>{userid}</code> berhasil diubah menjadi <code>{username}</code>.", parse_mode="HTML", reply_markup=get_back_keyboard())
     await state.clear()
 
@@ -219,27 +208,17 @@ async def edit_saldo(message: Message, state: FSMContext):
     data = await state.get_data()
     userid = data["userid"]
 
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT saldo, username FROM users WHERE userid = ?", (userid,))
-    row = c.fetchone()
-    if not row:
-        conn.close()
+    # saldo baru = saldo lama + delta (tidak boleh negatif); adjust_user_saldo mengunci baris
+    # user sebelum membaca saldo, jadi debit bersamaan tidak hilang
+    result = await adjust_user_saldo(userid, delta, reason="admin")
+    if not result:
         await message.answer("❗ User ID tidak ditemukan di database.")
         await state.clear()
         return
 
-    old_saldo = row[0] or 0
-    username = row[1] or "-"
-
-    new_saldo = old_saldo + delta
-    if new_saldo < 0:
-        new_saldo = 0  # prevent negative balance, adjust as you prefer
-
-    # update saldo to new_saldo
-    c.execute("UPDATE users SET saldo = ? WHERE userid = ?", (new_saldo, userid))
-    conn.commit()
-    conn.close()
+    old_saldo = result["old_saldo"]
+    new_saldo = result["new_saldo"]
+    username = result["username"] or "-"
 
     verb = "ditambahkan" if delta > 0 else "dikurangi"
     abs_delta = abs(delta)
@@ -295,25 +274,18 @@ async def set_role_callback(callback: CallbackQuery, state: FSMContext):
     userid = int(match.group(1))
     new_role = match.group(2)
 
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT role, username FROM users WHERE userid = ?", (userid,))
-    row = c.fetchone()
-    if not row:
-        conn.close()
+    user = await get_user(userid)
+    if not user:
         await callback.answer("User ID tidak ditemukan.", show_alert=True)
         return
-    old_role = row[0] or "-"
-    username = row[1] or "-"
+    old_role = user.get("role") or "-"
+    username = user.get("username") or "-"
 
     if old_role == new_role:
-        conn.close()
         await callback.answer(f"Role sudah {new_role}.", show_alert=True)
         return
 
-    c.execute("UPDATE users SET role = ? WHERE userid = ?", (new_role, userid))
-    conn.commit()
-    conn.close()
+    await update_user_role(userid, new_role)
 
     # notify admin (confirmation) and user via notification bot
     await callback.message.edit_text(f"Role user <code>{userid}</code> berhasil diubah menjadi <code>{new_role}</code>.", parse_mode="HTML", reply_markup=get_back_keyboard())
@@ -354,25 +326,18 @@ async def set_status_callback(callback: CallbackQuery, state: FSMContext):
     userid = int(match.group(1))
     new_status = match.group(2)
 
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT status, username FROM users WHERE userid = ?", (userid,))
-    row = c.fetchone()
-    if not row:
-        conn.close()
+    user = await get_user(userid)
+    if not user:
         await callback.answer("User ID tidak ditemukan.", show_alert=True)
         return
-    old_status = row[0] or "-"
-    username = row[1] or "-"
+    old_status = user.get("status") or "-"
+    username = user.get("username") or "-"
 
     if old_status == new_status:
-        conn.close()
         await callback.answer(f"Status sudah {new_status}.", show_alert=True)
         return
 
-    c.execute("UPDATE users SET status = ? WHERE userid = ?", (new_status, userid))
-    conn.commit()
-    conn.close()
+    await update_user_status(userid, new_status)
 
     # confirm to admin in UI
     await callback.message.edit_text(f"Status user <code>{userid}</code> berhasil diubah menjadi <code>{new_status}</code>.", parse_mode="HTML", reply_markup=get_back_keyboard())
@@ -2,11 +2,7 @@ from aiogram import Router, F
 from aiogram.types import CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton, Message
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
-import sqlite3
-import os
-
-# Lokasi database
-DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "database.db")
+from data.async_database import get_user, delete_user
 
 # FSM State group untuk proses hapus user
 class HapusUserState(StatesGroup):
@@ -58,24 +54,20 @@ async def process_hapus_userid(message: Message, state: FSMContext):
         return
     userid = int(message.text)
     # Cek user ada atau tidak
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT * FROM users WHERE userid = ?", (userid,))
-    user = c.fetchone()
-    conn.close()
+    user = await get_user(userid)
     if not user:
         await message.answer("❗ User ID tidak ditemukan di database.", reply_markup=get_back_keyboard())
         await state.clear()
         return
-    saldo_fmt = format_rupiah(user[2])
+    saldo_fmt = format_rupiah(user["saldo"])
     await state.update_data(userid=userid)
     await message.answer(
         f"Apakah Anda yakin ingin menghapus user berikut?\n\n"
         f"<b>User ID:</b> <code>{userid}</code>\n"
-        f"<b>Username:</b> <code>@{user[1]}</code>\n"
+        f"<b>Username:</b> <code>@{user['username']}</code>\n"
         f"<b>Saldo:</b> <code>{saldo_fmt}</code>\n"
-        f"<b>Role:</b> <code>{user[3]}</code>\n"
-        f"<b>Status:</b> <code>{user[5]}</code>",
+        f"<b>Role:</b> <code>{user['role']}</code>\n"
+        f"<b>Status:</b> <code>{user['status']}</code>",
         parse_mode="HTML",
         reply_markup=get_confirm_keyboard()
     )
@@ -91,11 +83,7 @@ async def confirm_delete_user(callback: CallbackQuery, state: FSMContext):
         await callback.answer()
         return
 
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("DELETE FROM users WHERE userid = ?", (userid,))
-    conn.commit()
-    conn.close()
+    await delete_user(userid)
     await callback.message.edit_text(
         f"✅ User dengan User ID <code>{userid}</code> berhasil dihapus.",
         parse_mode="HTML",
@@ -2,10 +2,7 @@ from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message, InlineKeyboardMarkup, InlineKeyboardButton, InputMediaPhoto, InputMediaVideo, InputMediaAudio, InputMediaDocument
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
-import sqlite3
-import os
-
-DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "database.db")
+from data.async_database import get_active_user_ids
 
 class KirimNotifStates(StatesGroup):
     waiting_for_content = State()
@@ -30,13 +27,8 @@ async def notif_menu(callback: CallbackQuery, state: FSMContext):
     await state.set_state(KirimNotifStates.waiting_for_content)
     await callback.answer()
 
-def get_all_user_ids():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT userid FROM users WHERE status='active'")
-    userids = [row[0] for row in c.fetchall()]
-    conn.close()
-    return userids
+async def get_all_user_ids():
+    return await get_active_user_ids()
 
 async def broadcast_to_all_users(bot, user_ids, message: Message):
     sent, failed = 0, 0
@@ -71,7 +63,7 @@ async def process_broadcast(message: Message, state: FSMContext):
     from aiogram import Bot
     bot: Bot = message.bot
 
-    user_ids = get_all_user_ids()
+    user_ids = await get_all_user_ids()
     sent, failed = await broadcast_to_all_users(bot, user_ids, message)
     await message.answer(
         f"✅ Selesai broadcast.\n"
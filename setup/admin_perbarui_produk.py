@@ -1,67 +1,84 @@
+import time
+from html import escape
+
 from aiogram import Router, F
 from aiogram.types import CallbackQuery
 from button.admin_set_produk import get_admin_set_produk_keyboard
-from api.ambil_produk import ambil_kategori_xl, ambil_produk_xl, simpan_produk_ke_db
-from models.produk_xl import get_produk_by_kategori as get_produk_db_by_kategori
+from helper.sync_produk import sinkron_produk_xl
 
 router = Router()
 
-def perbarui_semua_produk_xl():
+async def perbarui_semua_produk_xl():
     """
-    Ambil semua kategori dari API, ambil semua produk per kategori, lalu simpan ke DB.
-    Bandingkan dengan data sebelumnya dan tampilkan ringkasan perubahan.
+    Sinkronisasi inkremental semua kategori (helper.sync_produk.sinkron_produk_xl):
+    kategori yang tidak berubah dilewati, ringkasan perubahan diambil langsung dari change set.
     """
     summary = []
-    kategori_list = ambil_kategori_xl().get("data", [])
+    started = time.monotonic()
+    hasil_list = await sinkron_produk_xl()
     total_produk_awal = 0
     total_produk_akhir = 0
-    perubahan_semua = []
-
-    for kategori in kategori_list:
-        # Produk sebelum update
-        db_produk = {str(row[0]): row[1] for row in get_produk_db_by_kategori(kategori)}
-        produk_awal = set(db_produk.keys())
-
-        # Produk dari API
-        api_produk = ambil_produk_xl(kategori).get("data", [])
-        api_produk_dict = {str(prod['id']): prod['nama_produk'] for prod in api_produk}
-        produk_akhir = set(api_produk_dict.keys())
-
-        # Simpan ke DB
-        simpan_produk_ke_db(api_produk)
+    kategori_gagal = []
+    kategori_sama = []
 
-        # Hitung perubahan
-        baru = produk_akhir - produk_awal
-        hilang = produk_awal - produk_akhir
+    for hasil in hasil_list:
+        kategori = hasil["kategori"]
+        timing = f"⏱ {hasil['elapsed']:.2f}s" + (f" ({hasil['attempts']}x percobaan)" if hasil["attempts"] > 1 else "")
+        if hasil["status"] == "error":
+            kategori_gagal.append(kategori)
+            summary.append(
+                f"Kategori <b>{escape(str(kategori))}</b>: {timing}\n"
+                f"⚠️ Gagal diambil, data lama dipertahankan: {escape(hasil['error'][:200])}"
+            )
+            continue
+        if hasil["status"] == "unchanged":
+            kategori_sama.append(kategori)
+            jumlah = hasil["produk_count"] or 0
+            total_produk_awal += jumlah
+            total_produk_akhir += jumlah
+            continue
 
+        diff = hasil["diff"]
+        nama = diff["nama"]
         perubahan = []
-        if baru:
-            perubahan.append("➕ Baru: " + ", ".join([f"{api_produk_dict[i]} (ID:{i})" for i in baru]))
-        if hilang:
-            perubahan.append("❌ Dihapus: " + ", ".join([f"{db_produk[i]} (ID:{i})" for i in hilang]))
+        if diff["inserted"]:
+            perubahan.append("➕ Baru: " + ", ".join([f"{escape(str(nama[i]))} (ID:{i})" for i in diff["inserted"]]))
+        if diff["missing"]:
+            perubahan.append("❌ Dihapus: " + ", ".join([f"{escape(str(n))} (ID:{i})" for i, n in diff["missing"]]))
+        if diff["harga_naik"]:
+            perubahan.append("💹 Harga naik: " + ", ".join([f"{escape(str(nama[i]))} (ID:{i})" for i in diff["harga_naik"]]))
+        if diff["updated"]:
+            perubahan.append(f"🔄 Data diperbarui: {len(diff['updated'])} produk")
         if not perubahan:
             perubahan.append("✅ Tidak ada perubahan data produk.")
 
         summary.append(
-            f"Kategori <b>{kategori}</b>:\n"
-            f"• Sebelum: {len(produk_awal)} produk, Sesudah: {len(produk_akhir)} produk\n"
+            f"Kategori <b>{escape(str(kategori))}</b>: {timing}\n"
+            f"• Sebelum: {diff['count_before']} produk, Sesudah: {diff['total']} produk\n"
             + "\n".join(perubahan)
         )
-        total_produk_awal += len(produk_awal)
-        total_produk_akhir += len(produk_akhir)
-        perubahan_semua.extend(perubahan)
+        total_produk_awal += diff["count_before"]
+        total_produk_akhir += diff["total"]
+
+    if kategori_sama:
+        summary.append(
+            f"✅ Tidak berubah sejak sync terakhir ({len(kategori_sama)} kategori, dilewati): "
+            + ", ".join(escape(str(k)) for k in kategori_sama)
+        )
 
     header = (f"<b>Perbarui produk selesai.</b>\n"
-              f"Total kategori: <b>{len(kategori_list)}</b>\n"
+              f"Total kategori: <b>{len(hasil_list)}</b>"
+              + (f" (gagal: <b>{len(kategori_gagal)}</b>)" if kategori_gagal else "") + "\n"
               f"Total produk sebelum: <b>{total_produk_awal}</b>\n"
-              f"Total produk sesudah: <b>{total_produk_akhir}</b>\n")
+              f"Total produk sesudah: <b>{total_produk_akhir}</b>\n"
+              f"Total waktu: <b>{time.monotonic() - started:.2f}s</b>\n")
     return header + "\n\n" + "\n\n".join(summary)
-    
+
 @router.callback_query(F.data == "perbarui_produk")
 async def handle_perbarui_produk(callback: CallbackQuery):
     msg = await callback.message.edit_text("Memperbarui produk, mohon tunggu...")
     try:
-        result = perbarui_semua_produk_xl()
+        result = await perbarui_semua_produk_xl()
     except Exception as e:
         await msg.edit_text(f"Gagal memperbarui produk:\n{e}", reply_markup=get_admin_set_produk_keyboard())
         await callback.answer()
@@ -2,7 +2,7 @@ from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
-from models.seting_bot import set_cara_deposit, get_latest_cara_deposit
+from data.async_database import set_cara_deposit, get_latest_cara_deposit
 
 router = Router()
 
@@ -11,7 +11,7 @@ class CaraDepositStates(StatesGroup):
 
 @router.callback_query(F.data == "set_cara_deposit")
 async def set_cara_deposit_menu(callback: CallbackQuery, state: FSMContext):
-    current = get_latest_cara_deposit()
+    current = await get_latest_cara_deposit()
     await callback.message.edit_text(
         "<b>💰 Set Cara Deposit</b>\n\n"
         f"Berikut cara deposit saat ini:\n\n"
@@ -30,6 +30,6 @@ async def save_cara_deposit(message: Message, state: FSMContext):
         await state.clear()
         return
     content = message.text.strip()
-    set_cara_deposit(content)
+    await set_cara_deposit(content)
     await message.answer("<b>✅ Cara deposit berhasil diperbarui!</b>", parse_mode="HTML")
     await state.clear()
\ No newline at end of file
@@ -2,7 +2,7 @@ from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
-from models.seting_bot import set_cara_pembelian, get_latest_cara_pembelian
+from data.async_database import set_cara_pembelian, get_latest_cara_pembelian
 
 router = Router()
 
@@ -11,7 +11,7 @@ class CaraPembelianStates(StatesGroup):
 
 @router.callback_query(F.data == "set_cara_pembelian")
 async def set_cara_pembelian_menu(callback: CallbackQuery, state: FSMContext):
-    current = get_latest_cara_pembelian()
+    current = await get_latest_cara_pembelian()
     await callback.message.edit_text(
         "<b>🛒 Set Cara Pembelian</b>\n\n"
         f"Berikut cara pembelian saat ini:\n\n"
@@ -30,6 +30,6 @@ async def save_cara_pembelian(message: Message, state: FSMContext):
         await state.clear()
         return
     content = message.text.strip()
-    set_cara_pembelian(content)
+    await set_cara_pembelian(content)
     await message.answer("<b>✅ Cara pembelian berhasil diperbarui!</b>", parse_mode="HTML")
     await state.clear()
\ No newline at end of file
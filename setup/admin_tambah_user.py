@@ -2,15 +2,12 @@ from aiogram import Router, F, Bot
 from aiogram.types import CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton, Message
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
-import sqlite3
-import os
 from datetime import datetime
 import re
 import pytz
-import json
 
-# Lokasi database
-DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "database.db")
+from data.async_database import add_user
+from helper import config
 
 # State group untuk proses tambah user
 class AddUserState(StatesGroup):
@@ -29,15 +26,7 @@ def get_back_keyboard():
 TELEGRAM_USERNAME_REGEX = re.compile(r"^(?!.*__)[a-zA-Z0-9_]{5,32}$")
 
 def get_notif_bot_token_and_adminid():
-    setup_path = os.path.join("core", "setup.json")
-    if os.path.exists(setup_path):
-        with open(setup_path, "r") as f:
-            data = json.load(f)
-            notif_token = data.get("notifikasi")
-            admin = data.get("admin", {})
-            admin_id = admin.get("userid")
-            return notif_token, admin_id
-    return None, None
+    return config.get_notif_bot_token(), config.get_admin().get("userid")
 
 async def send_new_user_notification(userid, username, tanggal_daftar, message: Message):
     notif_token, admin_id = get_notif_bot_token_and_adminid()
@@ -106,25 +95,13 @@ async def process_username(message: Message, state: FSMContext):
     jakarta = pytz.timezone("Asia/Jakarta")
     tanggal_daftar = datetime.now(jakarta).strftime("%Y-%m-%d %H:%M:%S")
 
-    # Simpan ke database
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    # Cek, kalau user sudah ada, jangan dobel
-    c.execute("SELECT * FROM users WHERE userid = ?", (userid,))
-    user = c.fetchone()
-    if user:
+    # Simpan ke database (kalau user sudah ada, jangan dobel)
+    created = await add_user(userid, username, tanggal_daftar=tanggal_daftar)
+    if not created:
         await message.answer("❗ User ID tersebut sudah terdaftar di database.")
-        conn.close()
         await state.clear()
         return
 
-    c.execute(
-        "INSERT INTO users (userid, username, tanggal_daftar) VALUES (?, ?, ?)",
-        (userid, username, tanggal_daftar)
-    )
-    conn.commit()
-    conn.close()
-
     await message.answer(
         f"<b>User berhasil ditambahkan!</b>\n\n"
         f"<b>User ID:</b> <code>{userid}</code>\n"
@@ -4,6 +4,7 @@ import json
 import asyncio
 import logging
 import shutil
+import sqlite3
 import subprocess
 import zipfile
 import tempfile
@@ -44,6 +45,20 @@ def _service_account_valid(path: str) -> bool:
     except Exception:
         return False
 
+# Snapshot konsisten database: DB berjalan dalam mode WAL, jadi halaman yang sudah commit
+# bisa masih berada di database.db-wal. Backup API SQLite menyalin isi database lengkap
+# (termasuk WAL) ke file baru tanpa mengunci penulis terlalu lama.
+def _snapshot_database(dest_path: str) -> None:
+    src = sqlite3.connect(LOCAL_DB_PATH, timeout=30)
+    try:
+        dst = sqlite3.connect(dest_path)
+        try:
+            src.backup(dst)
+        finally:
+            dst.close()
+    finally:
+        src.close()
+
 # Setup.json reader
 def _load_setup() -> Dict[str, Any]:
     if not os.path.exists(SETUP_JSON_PATH):
@@ -192,10 +207,12 @@ async def _perform_backup_and_notify(bot=None) -> bool:
     zip_path = os.path.join(tmp_dir, zip_filename)
 
     try:
-        logger.info("Creating zip archive %s (from %s)", zip_path, LOCAL_DB_PATH)
+        snapshot_path = os.path.join(tmp_dir, os.path.basename(LOCAL_DB_PATH))
+        await asyncio.to_thread(_snapshot_database, snapshot_path)
+        logger.info("Creating zip archive %s (from snapshot of %s)", zip_path, LOCAL_DB_PATH)
         with zipfile.ZipFile(zip_path, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
             # Store database file with base name only
-            zf.write(LOCAL_DB_PATH, arcname=os.path.basename(LOCAL_DB_PATH))
+            zf.write(snapshot_path, arcname=os.path.basename(LOCAL_DB_PATH))
         zip_size = os.path.getsize(zip_path)
         size_hr = _human_readable_size(zip_size)
         logger.info("Zip created: %s (%s)", zip_path, size_hr)